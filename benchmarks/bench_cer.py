@@ -0,0 +1,54 @@
+"""
+Time the character error rate of a synthetic transcript: aligning all
+characters at once (using editdistance, or the ratcliffobershelp differ)
+versus the cer metric, which only aligns the characters of the words that
+differ.
+
+Usage::
+
+    python benchmarks/bench_cer.py --words 200000 --differ anchored
+"""
+
+import argparse
+import time
+import editdistance
+from benchmarkstt.diff.core import RatcliffObershelp
+from benchmarkstt.metrics.core import EvaluationContext, CER, WER, code_points, get_opcode_counts
+from benchmarkstt.input.core import PlainText
+from synthetic import transcript_pair
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, default=200000)
+    parser.add_argument('--error-rate', type=float, default=.1)
+    parser.add_argument('--differ', default='anchored', help='the differ used to align the words')
+    parser.add_argument('--full', action='store_true',
+                        help='also align all characters at once (very slow for more than 20000 words)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    ref, hyp = transcript_pair(args.words, args.error_rate, args.seed)
+    chars_ref = code_points(ref)
+    chars_hyp = code_points(hyp)
+    print('%d characters' % (len(chars_ref),))
+
+    print('%20s %10s %10s' % ('method', 'cer', 'time'))
+    if args.full:
+        start = time.perf_counter()
+        cer = editdistance.eval(chars_ref, chars_hyp) / len(chars_ref)
+        print('%20s %10.4f %9.3fs' % ('editdistance', cer, time.perf_counter() - start), flush=True)
+
+        start = time.perf_counter()
+        cer = WER().from_counts(get_opcode_counts(RatcliffObershelp(chars_ref, chars_hyp).get_opcodes()))
+        print('%20s %10.4f %9.3fs' % ('ratcliffobershelp', cer, time.perf_counter() - start), flush=True)
+
+    for mode in ('strict', 'levenshtein'):
+        context = EvaluationContext(PlainText(' '.join(ref)), PlainText(' '.join(hyp)))
+        start = time.perf_counter()
+        cer = CER(mode, args.differ).evaluate(context)
+        print('%20s %10.4f %9.3fs' % ('cer (%s)' % (mode,), cer, time.perf_counter() - start), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Throughput of the CSV reader (as used for normalization rule files), reading
+one character at a time versus reading in chunks.
+
+Usage::
+
+    python benchmarks/bench_csv.py --lines 200000
+"""
+
+import argparse
+import time
+from io import StringIO
+from benchmarkstt import csv
+from synthetic import words
+
+
+def throughput(method, text):
+    start = time.perf_counter()
+    lines = list(getattr(csv.Reader(StringIO(text), csv.DefaultDialect), method)())
+    elapsed = time.perf_counter() - start
+    return len(text) / elapsed / 1e6, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    vocabulary = words(args.lines * 2, args.seed)
+    rows = ['# replacement rules']
+    for idx in range(args.lines):
+        search, replace = vocabulary[idx * 2:idx * 2 + 2]
+        if idx % 10 == 0:
+            rows.append('"%s, ""%s""",  %s' % (search, search, replace))
+        else:
+            rows.append('%s,%s' % (search, replace))
+    text = '\n'.join(rows) + '\n'
+
+    print('%.1f MB, %d lines' % (len(text) / 1e6, args.lines))
+    chars_speed, expected = throughput('_iter_chars', text)
+    print('%14s %8.2f MB/s' % ('per character', chars_speed), flush=True)
+    chunks_speed, lines = throughput('_iter_chunks', text)
+    assert lines == expected
+    print('%14s %8.2f MB/s' % ('chunked', chunks_speed))
+
+
+if __name__ == '__main__':
+    main()
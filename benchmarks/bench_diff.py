@@ -0,0 +1,48 @@
+"""
+Compare the speed of the available differs on synthetic word sequences,
+differs that use the word timings (timebanded) get the synthetic timings.
+
+Usage::
+
+    python benchmarks/bench_diff.py --sizes 1000 10000 100000 --differs myers ratcliffobershelp timebanded
+"""
+
+import argparse
+import time
+from benchmarkstt.diff import factory
+from synthetic import timed_transcript_pair
+
+
+def run(differ_class, ref, hyp, times):
+    start = time.perf_counter()
+    args = (ref, hyp) + (times if differ_class.timed else ())
+    opcodes = differ_class(*args).get_opcodes()
+    elapsed = time.perf_counter() - start
+    equal = sum(i2 - i1 for tag, i1, i2, j1, j2 in opcodes if tag == 'equal')
+    return elapsed, equal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000],
+                        help='amount of reference words')
+    parser.add_argument('--differs', nargs='+',
+                        default=['anchored', 'levenshtein', 'myers', 'ratcliffobershelp', 'timebanded'],
+                        choices=list(factory.keys()))
+    parser.add_argument('--error-rate', type=float, default=.1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print('%10s %20s %12s %10s' % ('words', 'differ', 'seconds', 'equal'))
+    for size in args.sizes:
+        timed_ref, timed_hyp = timed_transcript_pair(size, args.error_rate, args.seed)
+        ref = [word['item'] for word in timed_ref]
+        hyp = [word['item'] for word in timed_hyp]
+        times = ([word['start'] for word in timed_ref], [word['start'] for word in timed_hyp])
+        for name in args.differs:
+            elapsed, equal = run(factory[name], ref, hyp, times)
+            print('%10d %20s %12.4f %10d' % (size, name, elapsed, equal), flush=True)
+
+
+if __name__ == '__main__':
+    main()
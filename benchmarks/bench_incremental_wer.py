@@ -0,0 +1,50 @@
+"""
+Time the running WER of a hypothesis that comes in in chunks (eg. live
+captioning): recalculating the WER of the whole hypothesis so far after each
+chunk versus updating the alignment with each chunk using incrementalwer.
+
+Usage::
+
+    python benchmarks/bench_incremental_wer.py --words 20000 --chunk 10 --band 100
+"""
+
+import argparse
+import time
+from benchmarkstt.metrics.core import IncrementalWER, WER
+from benchmarkstt.schema import Schema
+from synthetic import transcript_pair
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, default=20000)
+    parser.add_argument('--chunk', type=int, default=10, help='amount of hypothesis words per chunk')
+    parser.add_argument('--band', type=int, default=100)
+    parser.add_argument('--error-rate', type=float, default=.1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    ref, hyp = transcript_pair(args.words, args.error_rate, args.seed)
+    ref = Schema([dict(item=word) for word in ref])
+    hyp = Schema([dict(item=word) for word in hyp])
+    chunks = range(args.chunk, len(hyp) + args.chunk, args.chunk)
+
+    print('%16s %10s %10s' % ('method', 'wer', 'time'))
+    start = time.perf_counter()
+    wer = WER(WER.MODE_LEVENSHTEIN)
+    for end in chunks:
+        # the reference up to about where the hypothesis got
+        result = wer.compare(ref[:end], hyp[:end])
+    print('%16s %10.4f %9.3fs' % ('recalculated', result, time.perf_counter() - start), flush=True)
+
+    start = time.perf_counter()
+    incremental = IncrementalWER(band=args.band)
+    incremental.reset(ref)
+    for end in chunks:
+        incremental.feed(hyp[end - args.chunk:end])
+        result = incremental.get_wer()
+    print('%16s %10.4f %9.3fs' % ('incrementalwer', result, time.perf_counter() - start), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Time loading the words of a synthetic AWS Transcribe JSON transcript: loading
+the complete JSON and segmenting its transcript text (as the word timings
+used to be dropped by converting to plain text first) versus the aws input
+class, which streams the list of words with their timings.
+
+Usage::
+
+    python benchmarks/bench_input.py --words 300000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from benchmarkstt.input.core import File, PlainText
+from benchmarkstt.schema import ColumnarSchema
+from synthetic import words
+
+
+def aws_json(amount, seed):
+    items = []
+    for idx, word in enumerate(words(amount, seed)):
+        items.append(dict(start_time='%.2f' % (idx * .3,), end_time='%.2f' % (idx * .3 + .25,),
+                          alternatives=[dict(confidence='0.9000', content=word)], type='pronunciation'))
+        if idx % 10 == 9:
+            items.append(dict(alternatives=[dict(confidence=None, content='.')], type='punctuation'))
+    transcript = ' '.join(item['alternatives'][0]['content'] for item in items)
+    return dict(jobName='bench', results=dict(transcripts=[dict(transcript=transcript)], items=items))
+
+
+def measure(load):
+    """:return: seconds and peak memory in MB (traced separately)"""
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = load()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, default=300000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        file = os.path.join(path, 'transcript.json')
+        with open(file, 'w') as f:
+            json.dump(aws_json(args.words, args.seed), f, indent=4)
+        print('JSON: %.1f MB' % (os.path.getsize(file) / 1e6,))
+
+        def plain_text():
+            with open(file) as f:
+                transcript = json.load(f)['results']['transcripts'][0]['transcript']
+            return ColumnarSchema(PlainText(transcript))
+
+        methods = (
+            ('plain text', plain_text),
+            ('aws', lambda: ColumnarSchema(File(file, 'aws'))),
+        )
+
+        print('%16s %10s %14s' % ('method', 'time', 'peak memory'))
+        for name, load in methods:
+            elapsed, peak = measure(load)
+            print('%16s %9.3fs %11.1f MB' % (name, elapsed, peak), flush=True)
+
+
+if __name__ == '__main__':
+    main()
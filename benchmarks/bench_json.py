@@ -0,0 +1,114 @@
+"""
+Time loading a word level JSON transcript: decoding every object into an Item
+through the JSONDecoder hooks (as it used to) versus the bulk loader (with
+orjson, if installed, and with the standard library), into a Schema or a
+ColumnarSchema, and streaming it with Schema.iterload.
+
+Then time writing it to a file: building the complete JSON first (as it used
+to) versus Schema.dump encoding and writing a batch of items at a time.
+
+Usage::
+
+    python benchmarks/bench_json.py --words 1000000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from benchmarkstt import schema
+from benchmarkstt.schema import Schema, ColumnarSchema, JSONDecoder, JSONEncoder
+from synthetic import words
+
+
+def measure(load):
+    """:return: seconds, peak memory in MB (traced separately) and the result"""
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = load()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    items = [dict(item=word, type='word', start=idx * .3, end=idx * .3 + .25, confidence=.9)
+             for idx, word in enumerate(words(args.words, args.seed))]
+    text = json.dumps(items)
+    del items
+    print('JSON: %.1f MB, orjson %s' % (len(text) / 1e6, 'installed' if schema.orjson else 'not installed'))
+
+    orjson = schema.orjson
+
+    def stdlib(load):
+        def _():
+            schema.orjson = None
+            try:
+                return load()
+            finally:
+                schema.orjson = orjson
+        return _
+
+    methods = (
+        ('hooks', lambda: json.loads(text, cls=JSONDecoder)),
+        ('bulk', lambda: Schema.loads(text)),
+        ('bulk stdlib', stdlib(lambda: Schema.loads(text))),
+        ('bulk columnar', lambda: Schema.loads(text, columnar=True)),
+        ('streaming', None),
+    )
+
+    with tempfile.TemporaryDirectory() as path:
+        file = os.path.join(path, 'transcript.json')
+        with open(file, 'w') as f:
+            f.write(text)
+
+        def streaming():
+            with open(file) as f:
+                return ColumnarSchema(Schema.iterload(f))
+
+        print('%16s %10s %14s' % ('method', 'time', 'peak memory'))
+        expected = None
+        for name, load in methods:
+            elapsed, peak, result = measure(load or streaming)
+            expected = result if expected is None else expected
+            assert len(result) == len(expected) and result[-1] == expected[-1]
+            print('%16s %9.3fs %11.1f MB' % (name, elapsed, peak), flush=True)
+            del result
+
+        loaded = Schema.loads(text)
+        columnar = Schema.loads(text, columnar=True)
+        del text
+        out_file = os.path.join(path, 'out.json')
+
+        def dump(write):
+            def _():
+                with open(out_file, 'w') as f:
+                    write(f)
+            return _
+
+        methods = (
+            ('complete', dump(lambda f: f.write(json.dumps(loaded._aslist(), cls=JSONEncoder)))),
+            ('dump', dump(loaded.dump)),
+            ('dump columnar', dump(columnar.dump)),
+        )
+        print()
+        print('%16s %10s %14s' % ('dumping', 'time', 'peak memory'))
+        for name, write in methods:
+            elapsed, peak, _ = measure(write)
+            with open(out_file) as f:
+                assert f.read() == expected.json()
+            print('%16s %9.3fs %11.1f MB' % (name, elapsed, peak), flush=True)
+
+
+if __name__ == '__main__':
+    main()
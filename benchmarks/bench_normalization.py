@@ -0,0 +1,101 @@
+"""
+Time a normalization with a large amount of rules on synthetic text, applying
+the rules one by one versus the compiled normalization, and the overhead per
+rule of the normalization logging (with and without a log handler attached).
+
+Usage::
+
+    python benchmarks/bench_normalization.py --rules 3000 --size 1000000
+"""
+
+import argparse
+import logging
+import time
+from benchmarkstt.normalization import Base, NormalizationComposite, core
+from benchmarkstt.normalization.logger import Logger
+from synthetic import words
+
+
+def timed(normalize, text):
+    start = time.perf_counter()
+    result = normalize(text)
+    return time.perf_counter() - start, result
+
+
+class Precomputed(Base):
+    """Normalizer without any work of its own, changing the last character"""
+
+    def __init__(self, text):
+        self.result = text[:-1] + '!'
+
+    def _normalize(self, text):
+        return self.result
+
+
+def logging_overhead(text, repeat):
+    """
+    Time per call spent in normalize() on top of the actual normalization, in
+    microseconds
+    """
+    normalizer = Precomputed(text)
+
+    def run(normalize):
+        best = None
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                normalize(text)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    return (run(normalizer.normalize) - run(normalizer._normalize)) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rules', type=int, default=3000, help='amount of rules of each type')
+    parser.add_argument('--size', type=int, default=1000000, help='approximate size of the text in characters')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    text = ' '.join(words(args.size // 6, args.seed))
+    rule_sets = {
+        'replace': [core.Replace('w%d ' % (idx,), 'W%d ' % (idx,)) for idx in range(args.rules)],
+        'replacewords': [core.ReplaceWords('w%d' % (idx,), 'x%d' % (idx,)) for idx in range(args.rules)],
+    }
+
+    print('%14s %8s %14s %14s %8s' % ('rules', 'amount', 'sequential', 'compiled', 'passes'))
+    for name, rules in rule_sets.items():
+        composite = NormalizationComposite()
+        for rule in rules:
+            composite.add(rule)
+
+        def sequential(text):
+            for rule in rules:
+                text = rule.normalize(text)
+            return text
+
+        sequential_time, expected = timed(sequential, text)
+        compile_time, passes = timed(lambda rules: composite.compile(), rules)
+        compiled_time, result = timed(composite.normalize, text)
+        assert result == expected
+        total_time = compile_time + compiled_time
+        print('%14s %8d %13.3fs %13.3fs %8d' % (name, len(rules), sequential_time, total_time, len(passes)),
+              flush=True)
+
+    print()
+    print('%10s %20s %18s' % ('text', 'logging', 'overhead/call'))
+    line = ' '.join(words(10, args.seed))
+    for name, sample, repeat in (('1 MB', text, 1000), ('short', line, 100000)):
+        print('%10s %20s %16.3fus' % (name, 'no handler', logging_overhead(sample, repeat)), flush=True)
+        handler = logging.NullHandler()
+        Logger.logger.addHandler(handler)
+        try:
+            print('%10s %20s %16.3fus' % (name, 'handler', logging_overhead(sample, repeat)), flush=True)
+        finally:
+            Logger.logger.removeHandler(handler)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Time loading a config file referencing large rules files, without the
+normalization rules cache, when filling the cache and when loading from it.
+
+Usage::
+
+    python benchmarks/bench_rules_cache.py --rules 10000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from benchmarkstt.normalization import core
+from synthetic import words
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rules', type=int, default=10000, help='amount of rules of each type')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    vocabulary = sorted(set(words(args.rules * 4, args.seed)))[:args.rules]
+    text = ' '.join(words(1000, args.seed + 1))
+
+    with tempfile.TemporaryDirectory() as path:
+        with open(os.path.join(path, 'words.csv'), 'w') as f:
+            f.writelines('%s,%s\n' % (word, word.upper()) for word in vocabulary)
+        with open(os.path.join(path, 'regex.csv'), 'w') as f:
+            f.writelines('"(?i)\\b%s\\b","%s"\n' % (word, word[::-1]) for word in vocabulary)
+        config = os.path.join(path, 'rules.conf')
+        with open(config, 'w') as f:
+            f.write('[normalization]\nreplacewords words.csv\nregex regex.csv\n')
+
+        print('%14s %12s %16s' % ('cache', 'load', 'first normalize'))
+        expected = None
+        for name in ('disabled', 'filling', 'loading'):
+            if name != 'disabled':
+                os.environ['NORMALIZATION_CACHE'] = os.path.join(path, 'cache')
+            load_time, normalizer = timed(lambda: core.Config(config))
+            normalize_time, result = timed(lambda: normalizer.normalize(text))
+            expected = result if expected is None else expected
+            assert result == expected
+            print('%14s %11.3fs %15.3fs' % (name, load_time, normalize_time), flush=True)
+
+
+if __name__ == '__main__':
+    main()
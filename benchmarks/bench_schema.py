@@ -0,0 +1,58 @@
+"""
+Memory used by a segmented transcript kept as a list of Items versus as a
+ColumnarSchema, and the time to intern the tokens of a reference and
+hypothesis pair for the differs.
+
+Usage::
+
+    python benchmarks/bench_schema.py --words 1000000
+"""
+
+import argparse
+import time
+import tracemalloc
+from benchmarkstt.metrics.core import intern_tokens
+from benchmarkstt.schema import ColumnarSchema
+from benchmarkstt.segmentation.core import Simple
+from synthetic import transcript_pair
+
+
+def build(schema_class, ref, hyp):
+    """
+    :return: schemas, seconds, MB of memory allocated for them (traced
+        separately, as tracing slows down building them)
+    """
+    start = time.perf_counter()
+    schema_class(Simple(ref)), schema_class(Simple(hyp))
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    schemas = schema_class(Simple(ref)), schema_class(Simple(hyp))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return schemas, elapsed, size / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    ref, hyp = transcript_pair(args.words, seed=args.seed)
+    ref, hyp = ' '.join(ref), ' '.join(hyp)
+
+    print('%14s %12s %12s %12s' % ('schema', 'segmenting', 'memory', 'interning'))
+    expected = None
+    for schema_class in (list, ColumnarSchema):
+        schemas, elapsed, size = build(schema_class, ref, hyp)
+        start = time.perf_counter()
+        interned = intern_tokens(*schemas)
+        intern_time = time.perf_counter() - start
+        expected = interned if expected is None else expected
+        assert interned == expected
+        print('%14s %11.3fs %9.1f MB %11.3fs' % (schema_class.__name__, elapsed, size, intern_time), flush=True)
+        del schemas
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Time and peak memory of segmenting a large transcript with the simple
+segmenter, splitting the complete text up front (as it used to) versus
+iterating over the matches, from a string and from a file read in chunks.
+
+Usage::
+
+    python benchmarks/bench_segmentation.py --words 1000000
+"""
+
+import argparse
+import os
+import re
+import tempfile
+import time
+import tracemalloc
+from benchmarkstt.schema import Item
+from benchmarkstt.segmentation.core import Simple
+from synthetic import words
+
+
+def split_segmenter(text, pattern=r'[\n\t\s]+'):
+    """The simple segmenter as it used to be, based on re.split"""
+    regex = re.compile('(%s)' % (pattern,))
+    start_match = regex.match(text)
+    iterable = regex.split(text)
+    if iterable[0] == '':
+        iterable.pop(0)
+
+    pos = 0
+    length = len(iterable)
+    if start_match is not None:
+        matches = iterable[0:3]
+        pos = 3
+        yield Item({"item": matches[1], "type": "word", "@raw": ''.join(matches)})
+
+    while pos < length:
+        raw = ''.join(iterable[pos:pos+2])
+        if raw != '':
+            yield Item({"item": iterable[pos], "type": "word", "@raw": raw})
+        pos += 2
+
+
+def measure(segments):
+    """
+    Consume the segments one by one (tracing memory separately as it slows
+    down the segmenting), returns time, peak memory (MB) and amount
+    """
+    start = time.perf_counter()
+    amount = sum(1 for _ in segments())
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    sum(1 for _ in segments())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6, amount
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    text = ' '.join(words(args.words, args.seed))
+
+    with tempfile.TemporaryDirectory() as path:
+        file = os.path.join(path, 'transcript.txt')
+        with open(file, 'w') as f:
+            f.write(text)
+
+        def from_file():
+            with open(file) as f:
+                yield from Simple(f)
+
+        methods = (
+            ('re.split', lambda: split_segmenter(text)),
+            ('finditer', lambda: iter(Simple(text))),
+            ('file chunks', from_file),
+        )
+
+        print('text: %.1f MB' % (len(text) / 1e6,))
+        print('%14s %10s %14s' % ('method', 'time', 'peak memory'))
+        amounts = set()
+        for name, segments in methods:
+            elapsed, peak, amount = measure(segments)
+            amounts.add(amount)
+            print('%14s %9.3fs %11.1f MB' % (name, elapsed, peak), flush=True)
+        assert len(amounts) == 1
+
+
+if __name__ == '__main__':
+    main()
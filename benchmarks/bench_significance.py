@@ -0,0 +1,51 @@
+"""
+Time the bootstrap confidence interval and the paired bootstrap test of the
+corpus WER, using synthetic per utterance counts.
+
+Usage::
+
+    python benchmarks/bench_significance.py --utterances 50000 --iterations 10000
+"""
+
+import argparse
+import random
+import time
+from benchmarkstt.metrics.core import OpcodeCounts
+from benchmarkstt.metrics.significance import UtteranceCounts, bootstrap, paired_bootstrap
+
+
+def utterance_counts(lengths, error_rate, seed=None):
+    rnd = random.Random(seed)
+    counts = UtteranceCounts()
+    for length in lengths:
+        replace = sum(rnd.random() < error_rate / 3 for _ in range(length))
+        delete = sum(rnd.random() < error_rate / 3 for _ in range(length - replace))
+        insert = sum(rnd.random() < error_rate / 3 for _ in range(length))
+        counts.add(OpcodeCounts(length - replace - delete, replace, insert, delete))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--utterances', type=int, default=50000)
+    parser.add_argument('--iterations', type=int, default=10000)
+    parser.add_argument('--error-rate', type=float, default=.1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    lengths = [rnd.randint(1, 40) for _ in range(args.utterances)]
+    counts_a = utterance_counts(lengths, args.error_rate, args.seed)
+    counts_b = utterance_counts(lengths, args.error_rate * 1.1, args.seed + 1)
+
+    start = time.perf_counter()
+    result = bootstrap(counts_a, args.iterations, seed=args.seed)
+    print('bootstrap         %8.3fs  %r' % (time.perf_counter() - start, result))
+
+    start = time.perf_counter()
+    result = paired_bootstrap(counts_a, counts_b, args.iterations, seed=args.seed)
+    print('paired_bootstrap  %8.3fs  %r' % (time.perf_counter() - start, result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Time the WER per time window of a long synthetic transcript: aligning the
+words of each window separately versus the windowedwer metric, which aligns
+once and counts the differences per window (also timed once the alignment
+is cached, as when calculating it along with other metrics).
+
+Usage::
+
+    python benchmarks/bench_windowed_wer.py --words 200000 --window 60 --differ anchored
+"""
+
+import argparse
+import time
+from benchmarkstt.metrics.core import EvaluationContext, WER, WindowedWER
+from benchmarkstt.schema import ColumnarSchema
+from synthetic import timed_transcript_pair
+
+
+def per_window(ref, hyp, window, differ):
+    """The WER of each window, aligning the words within each window"""
+    windows = {}
+    for idx, words in enumerate((ref, hyp)):
+        for word in words:
+            windows.setdefault(int(word['start'] // window), ([], []))[idx].append(word)
+    return [WER(differ_class=differ).compare(*windows[idx]) for idx in sorted(windows)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, default=200000)
+    parser.add_argument('--window', type=float, default=60, help='duration of the windows in seconds')
+    parser.add_argument('--error-rate', type=float, default=.1)
+    parser.add_argument('--differ', default='anchored')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    ref, hyp = timed_transcript_pair(args.words, args.error_rate, args.seed)
+    context = EvaluationContext(ColumnarSchema(ref), ColumnarSchema(hyp))
+
+    print('%16s %10s %10s' % ('method', 'windows', 'time'))
+    start = time.perf_counter()
+    result = per_window(ref, hyp, args.window, args.differ)
+    print('%16s %10d %9.3fs' % ('per window', len(result), time.perf_counter() - start), flush=True)
+
+    start = time.perf_counter()
+    result = WindowedWER(args.window, differ_class=args.differ).evaluate(context)
+    print('%16s %10d %9.3fs' % ('windowedwer', len(result), time.perf_counter() - start), flush=True)
+
+    start = time.perf_counter()
+    WindowedWER(args.window, differ_class=args.differ).evaluate(context)
+    print('%16s %10d %9.3fs' % ('(aligned)', len(result), time.perf_counter() - start), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Helpers to generate synthetic reference/hypothesis pairs for the benchmarks
+"""
+
+import random
+
+
+def vocabulary(size=5000):
+    return ['w%d' % (idx,) for idx in range(size)]
+
+
+def words(amount, seed=None, vocabulary_size=5000):
+    """
+    Zipf-like distributed words, so that (like in real transcripts) a handful of
+    words (the filler words) are repeated a lot.
+    """
+    rnd = random.Random(seed)
+    vocab = vocabulary(vocabulary_size)
+    weights = [1 / (idx + 1) for idx in range(len(vocab))]
+    return rnd.choices(vocab, weights, k=amount)
+
+
+def transcript_pair(amount, error_rate=.1, seed=None):
+    """
+    Returns a reference of `amount` words and a hypothesis with roughly
+    `error_rate` substitutions, insertions and deletions applied to it.
+    """
+    rnd = random.Random(seed)
+    vocab = vocabulary()
+    ref = words(amount, seed)
+    hyp = []
+    for word in ref:
+        chance = rnd.random()
+        if chance < error_rate / 3:
+            continue
+        if chance < error_rate * 2 / 3:
+            hyp.append(rnd.choice(vocab))
+        elif chance < error_rate:
+            hyp.extend([word, rnd.choice(vocab)])
+        else:
+            hyp.append(word)
+    return ref, hyp
+
+
+def timed_transcript_pair(amount, error_rate=.1, seed=None, duration=.4):
+    """
+    Like :py:func:`transcript_pair`, as lists of dicts of words with their
+    start time, each reference word taking `duration` seconds (words of the
+    hypothesis get the time of the reference word they were derived from).
+    """
+    rnd = random.Random(seed)
+    vocab = vocabulary()
+    ref = []
+    hyp = []
+    for idx, word in enumerate(words(amount, seed)):
+        start = idx * duration
+        ref.append(dict(item=word, start=start))
+        chance = rnd.random()
+        if chance < error_rate / 3:
+            continue
+        if chance < error_rate * 2 / 3:
+            hyp.append(dict(item=rnd.choice(vocab), start=start))
+        elif chance < error_rate:
+            hyp.extend([dict(item=word, start=start), dict(item=rnd.choice(vocab), start=start)])
+        else:
+            hyp.append(dict(item=word, start=start))
+    return ref, hyp
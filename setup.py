@@ -67,6 +67,12 @@ setup(
             "pycodestyle==2.5.0",
             "pytest-cov==2.5.1",
             "attrs==19.1.0"
+        ],
+        'significance': [
+            "numpy>=1.17"
+        ],
+        'json': [
+            "orjson>=3"
         ]
     },
     platforms='any',
@@ -59,5 +59,22 @@ class _Settings:
     def default_encoding(self):
         return getenv('DEFAULT_ENCODING', 'UTF-8')
 
+    @property
+    def normalization_cache(self):
+        """Directory of the normalization rules cache, see :py:mod:`benchmarkstt.normalization.cache`"""
+        return getenv('NORMALIZATION_CACHE') or None
+
+    @property
+    def normalization_cache_size(self):
+        return int(getenv('NORMALIZATION_CACHE_SIZE', 256 * 1024 * 1024))
+
+    @property
+    def config_cache_entries(self):
+        return int(getenv('CONFIG_CACHE_ENTRIES', 64))
+
+    @property
+    def config_cache_size(self):
+        return int(getenv('CONFIG_CACHE_SIZE', 64 * 1024 * 1024))
+
 
 settings = _Settings()
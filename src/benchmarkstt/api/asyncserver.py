@@ -0,0 +1,366 @@
+"""
+Asynchronous server for the JSON-RPC_ api, for when the api is used with
+large transcripts: the calls doing the actual (CPU bound) work, like metrics
+and normalization, are run by a bounded pool of worker processes, so a long
+running call doesn't hold up the others, and small calls like ``version``,
+``help`` and ``list.*`` are answered right away.
+
+The calls of a batch request are made concurrently, identical calls only
+once. When too many calls are already waiting for a worker, new ones are
+refused with a "server busy" error (and HTTP status 429 if none of the calls
+of the request could be accepted), so clients can back off and try again
+later. Calls that were running in a worker process that died (eg. out of
+memory) get a "worker lost" error (HTTP status 503), after which the
+workers are restarted.
+
+.. attention::
+
+    Only supported for Python versions 3.6 and above
+
+.. _JSON-RPC: https://www.jsonrpc.org
+
+"""
+
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from inspect import signature
+from jsonrpcserver import async_dispatch
+from jsonrpcserver.exceptions import ApiError
+from jsonrpcserver.methods import Methods
+from jsonrpcserver.response import ApiErrorResponse
+from .jsonrpc import get_methods, is_batch, is_direct, deduplicate_batch, assemble_batch, WorkerLostError, \
+    WORKER_LOST_CODE
+
+logger = logging.getLogger(__name__)
+
+# JSON-RPC error code (in the range reserved for server errors) of the calls
+# refused because too many are waiting for a worker, like HTTP status 429
+SERVER_BUSY_CODE = -32029
+
+# default maximum size of a request body in bytes
+MAX_REQUEST_SIZE = 128 * 1024 * 1024
+
+_worker_methods = None
+
+
+def _call(name, args, kwargs):
+    """Call an api method in a worker process"""
+    global _worker_methods
+    if _worker_methods is None:
+        _worker_methods = get_methods()
+    return _worker_methods.items[name](*args, **kwargs)
+
+
+class ServerBusyError(ApiError):
+    """Too many calls are waiting for a worker"""
+
+    def __init__(self):
+        super().__init__("Server busy, try again later", code=SERVER_BUSY_CODE)
+
+
+class WorkerPool:
+    """
+    Bounded pool of worker processes to run api calls in
+
+    :param workers: Amount of worker processes, default is the amount of CPUs
+    :param max_pending: Maximum amount of calls running or waiting for a
+        worker, further calls are refused with a :py:class:`ServerBusyError`.
+        Default is 4 per worker.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if max_pending is None:
+            max_pending = workers * 4
+        if workers < 1 or max_pending < 1:
+            raise ValueError("Expected at least one worker and pending call", workers, max_pending)
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = ProcessPoolExecutor(workers)
+
+    async def run(self, name, args, kwargs):
+        """
+        Call api method `name` in one of the workers
+
+        :raises: ServerBusyError, WorkerLostError
+        """
+        if self.pending >= self.max_pending:
+            raise ServerBusyError()
+        self.pending += 1
+        executor = self._executor
+        try:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(executor, _call, name, args, kwargs)
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise WorkerLostError()
+        finally:
+            self.pending -= 1
+
+    def _restart(self, executor):
+        """
+        Replace the executor after one of its worker processes died, unless
+        that's done already
+        """
+        if self._executor is not executor:
+            return
+        logger.warning('A worker process died, restarting the workers')
+        self._executor = ProcessPoolExecutor(self.workers)
+        executor.shutdown(wait=False)
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+def _asynchronous(name, func, pool):
+    """
+    Coroutine version of api method `func`, with the same documentation and
+    signature (so the arguments are still validated before calling it)
+    """
+    if is_direct(name):
+        async def method(*args, **kwargs):
+            return func(*args, **kwargs)
+    else:
+        async def method(*args, **kwargs):
+            return await pool.run(name, args, kwargs)
+
+    method.__doc__ = func.__doc__
+    method.__signature__ = signature(func)
+    return method
+
+
+def get_async_methods(pool: WorkerPool) -> Methods:
+    """
+    Returns the available JSON-RPC api methods as coroutines, running the
+    CPU bound ones in the `pool`
+
+    :return: jsonrpcserver.methods.Methods
+    """
+    methods = Methods()
+    for name, func in get_methods().items.items():
+        methods.add(**{name: _asynchronous(name, func, pool)})
+    return methods
+
+
+def _is_busy(response):
+    """Whether the call was refused because the server is busy"""
+    return isinstance(response, ApiErrorResponse) and response.code == SERVER_BUSY_CODE
+
+
+def _status(response):
+    """The HTTP status of the response to a single call"""
+    if _is_busy(response):
+        return HTTPStatus.TOO_MANY_REQUESTS
+    if isinstance(response, ApiErrorResponse) and response.code == WORKER_LOST_CODE:
+        return HTTPStatus.SERVICE_UNAVAILABLE
+    return response.http_status
+
+
+class _RequestError(Exception):
+    """The HTTP request cannot be handled, the connection is closed"""
+
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class Server:
+    """
+    A minimal asyncio HTTP/1.1 server for the JSON-RPC api
+
+    :param entrypoint: The HTTP path on which the api will be served
+    :param pool: The :py:class:`WorkerPool` to run the api calls in
+    :param max_request_size: Maximum size of a request body in bytes, larger
+        requests are refused (HTTP status 413). Default is 128 MiB.
+    """
+
+    def __init__(self, entrypoint: str = None, pool: WorkerPool = None, max_request_size: int = None):
+        if entrypoint is None:
+            entrypoint = '/api'
+        if pool is None:
+            pool = WorkerPool()
+        if max_request_size is None:
+            max_request_size = MAX_REQUEST_SIZE
+        self.entrypoint = entrypoint
+        self.pool = pool
+        self.max_request_size = max_request_size
+        self.methods = get_async_methods(pool)
+
+    async def dispatch(self, request: str):
+        """
+        Handle a JSON-RPC request
+
+        :return: tuple of the HTTP status and the JSON-RPC response
+        """
+        if is_batch(request):
+            try:
+                batch = json.loads(request)
+            except ValueError:
+                batch = None
+            if type(batch) is list and len(batch):
+                return await self.dispatch_batch(batch)
+
+        response = await async_dispatch(request, methods=self.methods, debug=True, convert_camel_case=False)
+        return _status(response), str(response)
+
+    async def dispatch_batch(self, batch: list):
+        """
+        Handle a JSON-RPC batch request: the calls are made concurrently,
+        identical calls only once, and the responses are in the order of the
+        batch
+
+        :return: tuple of the HTTP status and the JSON-RPC response
+        """
+        calls, indexes = deduplicate_batch(batch)
+        responses = await asyncio.gather(*[
+            async_dispatch(json.dumps(call), methods=self.methods, debug=True, convert_camel_case=False)
+            for call in calls])
+        result = assemble_batch(batch, indexes, [response.deserialized() for response in responses])
+        if not len(result):
+            return HTTPStatus.NO_CONTENT, ''
+        status = HTTPStatus.TOO_MANY_REQUESTS if all(map(_is_busy, responses)) else HTTPStatus.OK
+        return status, json.dumps(result)
+
+    async def respond(self, method: str, path: str, body: bytes):
+        """
+        :return: tuple of the HTTP status and the response body
+        """
+        if path.split('?', 1)[0] != self.entrypoint:
+            return HTTPStatus.NOT_FOUND, ''
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, ''
+        try:
+            request = body.decode()
+        except UnicodeDecodeError:
+            return HTTPStatus.BAD_REQUEST, ''
+        return await self.dispatch(request)
+
+    async def _read_body(self, reader, headers):
+        """
+        Read the body of a request, either of the given Content-Length or
+        using chunked Transfer-Encoding
+
+        :raises: _RequestError
+        """
+        encoding = headers.get('transfer-encoding')
+        if encoding is None:
+            length = headers.get('content-length', '0')
+            if not length.isdigit():
+                raise _RequestError(HTTPStatus.BAD_REQUEST)
+            length = int(length)
+            if length > self.max_request_size:
+                raise _RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return await reader.readexactly(length)
+
+        if encoding.lower() != 'chunked':
+            raise _RequestError(HTTPStatus.NOT_IMPLEMENTED)
+        chunks = []
+        size = 0
+        while True:
+            # the chunk size, possibly followed by extensions
+            length = (await reader.readline()).split(b';', 1)[0].strip()
+            if not length or length.strip(b'0123456789abcdefABCDEF'):
+                raise _RequestError(HTTPStatus.BAD_REQUEST)
+            length = int(length, 16)
+            size += length
+            if size > self.max_request_size:
+                raise _RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            if not length:
+                break
+            chunks.append(await reader.readexactly(length))
+            if await reader.readexactly(2) != b'\r\n':
+                raise _RequestError(HTTPStatus.BAD_REQUEST)
+        # skip the trailer
+        while (await reader.readline()).strip():
+            pass
+        return b''.join(chunks)
+
+    async def handle(self, reader, writer):
+        """
+        Handle the HTTP requests of a connection
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line.strip() == b'':
+                            break
+                        name, _, value = line.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+
+                    try:
+                        method, path, version = request_line.decode('latin-1').split()
+                    except ValueError:
+                        raise _RequestError(HTTPStatus.BAD_REQUEST)
+                    body = await self._read_body(reader, headers)
+                except _RequestError as e:
+                    await self._write(writer, e.status, '', False)
+                    break
+                except ValueError:
+                    # a line longer than the limit of the reader
+                    await self._write(writer, HTTPStatus.BAD_REQUEST, '', False)
+                    break
+                status, response = await self.respond(method, path, body)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self._write(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _write(writer, status, response, keep_alive):
+        status = HTTPStatus(status)
+        body = response.encode()
+        head = ['HTTP/1.1 %d %s' % (status.value, status.phrase),
+                'Content-Type: application/json',
+                'Content-Length: %d' % (len(body),),
+                'Connection: %s' % ('keep-alive' if keep_alive else 'close',)]
+        if status in (HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE):
+            head.append('Retry-After: 1')
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+    async def start(self, host=None, port=8080):
+        """
+        Start serving
+
+        :return: asyncio.AbstractServer
+        """
+        return await asyncio.start_server(self.handle, host, port)
+
+
+def serve(host=None, port=8080, entrypoint=None, workers=None, max_pending=None,
+          max_request_size=None):  # pragma: nocover
+    """
+    Run the asynchronous api server until interrupted
+    """
+    pool = WorkerPool(workers, max_pending)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = loop.run_until_complete(Server(entrypoint, pool, max_request_size).start(host, port))
+    logger.info('Serving on %s with %d workers', ', '.join(str(sock.getsockname()) for sock in server.sockets),
+                pool.workers)
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+        pool.shutdown()
@@ -9,10 +9,20 @@ Make benchmarkstt available through a rudimentary JSON-RPC_ interface
 
 """
 
+import json
 import jsonrpcserver
+import logging
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import zip_longest
 from flask import Flask, request, Response, render_template
 from benchmarkstt.docblock import format_docs, parse, process_rst
-from .jsonrpc import get_methods
+from .jsonrpc import get_methods, is_batch, is_direct, deduplicate_batch, assemble_batch, dispatch_call, \
+    worker_lost_response
+
+logger = logging.getLogger(__name__)
 
 
 def argparser(parser):
@@ -30,6 +40,19 @@ def argparser(parser):
                         help='The jsonrpc api address')
     parser.add_argument('--list-methods', action='store_true',
                         help='List the available jsonrpc methods')
+    parser.add_argument('--async', action='store_true', dest='asynchronous',
+                        help='Run the asynchronous server, which runs the api calls in a pool '
+                             'of worker processes (the explorer is not available)')
+    parser.add_argument('--workers', type=int,
+                        help='Amount of worker processes to run the calls of batch requests in, or those of the '
+                             'asynchronous server, default is the amount of CPUs')
+    parser.add_argument('--max-pending', type=int,
+                        help='Maximum amount of api calls running or waiting for a worker of the '
+                             'asynchronous server, further calls are refused (HTTP status 429). '
+                             'Default is 4 per worker')
+    parser.add_argument('--max-request-size', type=int,
+                        help='Maximum size in bytes of a request to the asynchronous server, larger requests are '
+                             'refused (HTTP status 413). Default is 128 MiB')
     parser.add_argument('--with-explorer', action='store_true',
                         help='Also create the explorer to test api calls with, '
                              'this is a rudimentary feature currently '
@@ -39,12 +62,14 @@ def argparser(parser):
     return parser
 
 
-def create_app(entrypoint: str = None, with_explorer: bool = None):
+def create_app(entrypoint: str = None, with_explorer: bool = None, workers: int = None):
     """
     Create the Flask app
 
     :param entrypoint: The HTTP path on which the api will be served
     :param bool with_explorer: Whether to also serve the JSON-RPC API explorer
+    :param workers: Amount of worker processes to run the calls of batch
+        requests in, default is the amount of CPUs
     :return:
     """
 
@@ -54,10 +79,87 @@ def create_app(entrypoint: str = None, with_explorer: bool = None):
         entrypoint = '/api'
 
     methods = get_methods()
+    executor = None
+    executor_lock = threading.Lock()
+
+    def get_executor():
+        nonlocal executor
+        with executor_lock:
+            if executor is None:
+                executor = ProcessPoolExecutor(workers)
+                # stop the worker processes along with the app
+                weakref.finalize(app, executor.shutdown)
+            return executor
+
+    def restart_executor(broken):
+        """Replace the executor after one of its worker processes died"""
+        nonlocal executor
+        with executor_lock:
+            if executor is not broken:
+                return
+            logger.warning('A worker process died, restarting the workers')
+            executor = None
+        broken.shutdown(wait=False)
+
+    def run_in_executor(calls):
+        """
+        :return: The responses to the calls, the calls that were running in a
+            worker process that died get a worker lost error
+        """
+        pool = get_executor()
+        futures = []
+        try:
+            for call in calls:
+                futures.append(pool.submit(dispatch_call, call))
+        except BrokenProcessPool:
+            pass
+        responses = []
+        for call, future in zip_longest(calls, futures):
+            response = None
+            if future is not None:
+                try:
+                    response = future.result()
+                except BrokenProcessPool:
+                    pass
+            if response is None:
+                restart_executor(pool)
+                response = worker_lost_response(call)
+            responses.append(response)
+        return responses
+
+    def dispatch_batch(batch):
+        """
+        Make the calls of a batch request in parallel, identical calls only
+        once, and respond in the order of the batch. Only the calls to the
+        methods doing actual work (like metrics and normalization) are made
+        in the worker processes.
+        """
+        calls, indexes = deduplicate_batch(batch)
+        # invalid calls are answered directly too
+        pooled = [idx for idx, call in enumerate(calls)
+                  if isinstance(call, dict) and type(call.get('method')) is str and not is_direct(call['method'])]
+        responses = [None] * len(calls)
+        if len(pooled) > 1:
+            for idx, response in zip(pooled, run_in_executor([calls[idx] for idx in pooled])):
+                responses[idx] = response
+        for idx, call in enumerate(calls):
+            if responses[idx] is None:
+                responses[idx] = dispatch_call(call)
+        result = assemble_batch(batch, indexes, responses)
+        if not len(result):
+            return Response('', 204)
+        return Response(json.dumps(result), 200, mimetype="application/json")
 
     @app.route(entrypoint, methods=["POST"])
     def jsonrpc():
         req = request.get_data().decode()
+        if is_batch(req):
+            try:
+                batch = json.loads(req)
+            except ValueError:
+                batch = None
+            if type(batch) is list and len(batch):
+                return dispatch_batch(batch)
         response = jsonrpcserver.dispatch(req, methods=methods, debug=True, convert_camel_case=False)
         response_str = str(response)
         return Response(response_str, response.http_status, mimetype="application/json")
@@ -95,6 +197,9 @@ def main(parser, args):  # pragma: nocover
             print('')
             print(format_docs(func.__doc__))
             print('')
+    elif args.asynchronous:
+        from .asyncserver import serve
+        serve(args.host, args.port, args.entrypoint, args.workers, args.max_pending, args.max_request_size)
     else:
-        app = create_app(args.entrypoint, args.with_explorer)
+        app = create_app(args.entrypoint, args.with_explorer, args.workers)
         app.run(host=args.host, port=args.port, debug=args.debug)
@@ -12,8 +12,10 @@ import jsonrpcserver
 import json
 from benchmarkstt import __meta__
 from functools import wraps
+from collections import OrderedDict
 from benchmarkstt.docblock import format_docs
 from benchmarkstt.modules import Modules
+from benchmarkstt.normalization.cache import get_config_cache
 from inspect import _empty, Parameter, signature
 import os
 
@@ -138,6 +140,22 @@ class DefaultMethods:
         """
         return __meta__.__version__
 
+    @staticmethod
+    def cache_stats():
+        """
+        Get the hit and miss counters and the size of the cache of the
+        normalizers built from the configs sent along with the api calls.
+
+        Each (worker) process has its own cache, the stats are those of the
+        process that handled the call, identified by its pid.
+
+        :return object: The pid, the counters and the amount and size in bytes
+            of the cached normalizers, along with their limits
+        """
+        stats = OrderedDict(pid=os.getpid())
+        stats.update(get_config_cache().stats())
+        return stats
+
     @staticmethod
     def help(methods):
         def _():
@@ -159,8 +177,119 @@ def get_methods() -> jsonrpcserver.methods.Methods:
 
     methods = MagicMethods()
     methods.register('version', DefaultMethods.version)
+    methods.register('cache.stats', DefaultMethods.cache_stats)
     for name, module in Modules('api'):
         methods.load(name, module)
 
     methods.register('help', DefaultMethods.help(methods.methods))
     return methods.methods
+
+
+# JSON-RPC error code (in the range reserved for server errors) of the calls
+# that were running in a worker process that died, they can be retried
+WORKER_LOST_CODE = -32030
+
+
+class WorkerLostError(jsonrpcserver.exceptions.ApiError):
+    """The worker process making the call died"""
+
+    def __init__(self):
+        super().__init__("Worker process lost, try again later", code=WORKER_LOST_CODE)
+
+
+def worker_lost_response(call: dict) -> dict:
+    """
+    :return: The deserialized :py:class:`WorkerLostError` response to the
+        (deserialized) call
+    """
+    error = WorkerLostError()
+    return {"jsonrpc": "2.0", "error": {"code": error.code, "message": str(error)}, "id": call.get('id')}
+
+
+# the cheap api methods, which are called directly instead of in a worker process
+DIRECT_METHODS = ('version', 'help')
+DIRECT_PREFIXES = ('list.',)
+
+
+def is_direct(name: str) -> bool:
+    """
+    Whether api method `name` is cheap enough to call directly, instead of
+    in a worker process
+    """
+    return name in DIRECT_METHODS or name.startswith(DIRECT_PREFIXES)
+
+
+def is_batch(request: str) -> bool:
+    """
+    Whether the (serialized) JSON-RPC request is a batch of calls
+    """
+    return request.lstrip().startswith('[')
+
+
+def deduplicate_batch(batch: list):
+    """
+    The calls to make for a JSON-RPC batch request, calls that are identical
+    (apart from their id) are only made once. Each call gets its index as id,
+    so it also gets a response if it was only requested as a notification.
+
+    :param batch: The deserialized batch request
+    :return: tuple of the list of calls, and for each item of the batch the
+        index of its call
+    """
+    calls = []
+    indexes = []
+    seen = {}
+    for item in batch:
+        if isinstance(item, dict):
+            call = {key: value for key, value in item.items() if key != 'id'}
+            call['id'] = None
+        else:
+            call = item
+        key = json.dumps(call, sort_keys=True)
+        if key not in seen:
+            seen[key] = len(calls)
+            if isinstance(call, dict):
+                call['id'] = len(calls)
+            calls.append(call)
+        indexes.append(seen[key])
+    return calls, indexes
+
+
+def assemble_batch(batch: list, indexes: list, responses: list) -> list:
+    """
+    The response to a JSON-RPC batch request, in the order of the batch
+
+    :param batch: The deserialized batch request
+    :param indexes: The index of the call of each item of the batch, see
+        :py:func:`deduplicate_batch`
+    :param responses: The deserialized response to each call
+    :return: list of the deserialized responses (without the notifications)
+    """
+    result = []
+    for item, idx in zip(batch, indexes):
+        response = responses[idx]
+        if isinstance(item, dict):
+            if 'id' not in item:
+                # notification
+                continue
+            response = response.copy()
+            response['id'] = item['id']
+        result.append(response)
+    return result
+
+
+_methods = None
+
+
+def dispatch_call(call):
+    """
+    Make a single (deserialized) JSON-RPC call, eg. of a batch in a worker
+    process (the methods are only created once per process)
+
+    :return: The deserialized response
+    """
+    global _methods
+    if _methods is None:
+        _methods = get_methods()
+    response = jsonrpcserver.dispatch(json.dumps(call), methods=_methods, debug=True, convert_camel_case=False)
+    return response.deserialized()
@@ -1,7 +1,6 @@
 import benchmarkstt.metrics as metrics
-from io import StringIO
 from benchmarkstt.input.core import PlainText
-from benchmarkstt.normalization.core import Config
+from benchmarkstt.normalization.cache import get_config_cache
 from benchmarkstt.normalization.logger import LogCapturer
 
 factory = metrics.factory
@@ -29,7 +28,7 @@ def callback(cls, ref: str, hyp: str, config: str = None, return_logs: bool = No
 
     normalizer = None
     if config is not None and len(config.strip()):
-        normalizer = Config(StringIO(config), section='normalization')
+        normalizer = get_config_cache().get(config, section='normalization')
 
     ref = PlainText(ref, normalizer=normalizer)
     hyp = PlainText(hyp, normalizer=normalizer)
@@ -0,0 +1,237 @@
+"""
+Batch mode: benchmark a whole corpus of reference and hypothesis file pairs,
+spread over a pool of worker processes
+"""
+
+import os
+import json
+import logging
+import uuid
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from benchmarkstt import csv, settings
+import benchmarkstt.metrics.cli as metrics_cli
+from benchmarkstt.normalization.cli import get_normalizer_from_args
+from benchmarkstt.normalization.logger import Logger
+from benchmarkstt.output import factory as output_factory
+from benchmarkstt.metrics.aggregate import WERAggregate
+from benchmarkstt.metrics.core import EvaluationContext
+from benchmarkstt.schema import ColumnarSchema
+
+logger = logging.getLogger(__name__)
+
+Pair = namedtuple('Pair', ('title', 'reference', 'hypothesis'))
+
+# per process state (normalizer and metrics), so they're only built once per worker
+_worker_state = {}
+
+
+class ManifestError(ValueError):
+    """The batch manifest is invalid"""
+
+
+def argparser(parser):
+    """
+    Adds the batch mode arguments
+    """
+    desc = 'Instead of a single --reference and --hypothesis, benchmark a list of file pairs, given either ' \
+           'as a manifest, or as two directories containing reference and hypothesis files with the same filename. ' \
+           'Results are output per file pair, as they become available.'
+    batch = parser.add_argument_group('batch mode', description=desc)
+    batch.add_argument('--manifest', metavar='file',
+                       help='CSV file (reference, hypothesis and an optional title per line) or JSON lines file '
+                            '(.jsonl, with "reference", "hypothesis" and optional "title" keys) listing the '
+                            'file pairs. Relative paths are relative to the manifest.')
+    batch.add_argument('--reference-dir', metavar='dir',
+                       help='Directory containing the reference files')
+    batch.add_argument('--hypothesis-dir', metavar='dir',
+                       help='Directory containing the hypothesis files')
+    batch.add_argument('--aggregate', nargs='*', metavar='arg', default=None,
+                       help='After all file pairs, output the corpus level WER (pooled and mean per file) and '
+                            'percentiles. Optionally followed by the mode and differ_class, as for --wer.')
+    batch.add_argument('--jobs', type=int, default=None, metavar='amount',
+                       help='Amount of worker processes, defaults to the amount of CPUs')
+    return parser
+
+
+def is_batch(args):
+    return bool(getattr(args, 'manifest', None) or
+                getattr(args, 'reference_dir', None) or
+                getattr(args, 'hypothesis_dir', None))
+
+
+def read_manifest(file, encoding=None):
+    """
+    Read the reference and hypothesis file pairs from a manifest
+
+    :param file: CSV or JSON lines (.jsonl extension) file
+    :param encoding: The file encoding
+    :return: generator of Pair
+    :raises: ManifestError
+    """
+    if encoding is None:
+        encoding = settings.default_encoding
+
+    path = os.path.dirname(os.path.realpath(file))
+
+    def make_pair(reference, hypothesis, title=None):
+        if title is None:
+            title = hypothesis
+        return Pair(title, os.path.join(path, reference), os.path.join(path, hypothesis))
+
+    with open(file, encoding=encoding) as f:
+        if file.lower().endswith('.jsonl'):
+            for lineno, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                    yield make_pair(item['reference'], item['hypothesis'], item.get('title'))
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    raise ManifestError("%s:%d %r" % (file, lineno, e))
+        else:
+            for line in csv.reader(f):
+                if len(line) not in (2, 3):
+                    raise ManifestError("%s:%d expected reference, hypothesis and optional title, got %r" %
+                                        (file, line.lineno, list(line)))
+                yield make_pair(*line)
+
+
+def pairs_from_directories(reference_dir, hypothesis_dir):
+    """
+    Match files in reference_dir with the files with the same name in
+    hypothesis_dir
+
+    :return: generator of Pair
+    """
+    hypotheses = set(os.listdir(hypothesis_dir))
+    for name in sorted(os.listdir(reference_dir)):
+        reference = os.path.join(reference_dir, name)
+        if not os.path.isfile(reference):
+            continue
+        if name not in hypotheses:
+            logger.warning("No hypothesis found for reference %r, skipping", reference)
+            continue
+        yield Pair(name, reference, os.path.join(hypothesis_dir, name))
+
+
+def get_pairs(parser, args):
+    if args.manifest:
+        if args.reference_dir or args.hypothesis_dir:
+            parser.error("use either --manifest or --reference-dir and --hypothesis-dir")
+        return read_manifest(args.manifest)
+
+    if not (args.reference_dir and args.hypothesis_dir):
+        parser.error("both --reference-dir and --hypothesis-dir are required")
+    return pairs_from_directories(args.reference_dir, args.hypothesis_dir)
+
+
+def evaluate_pair(key, args, pair):
+    """
+    Calculate the requested metrics for one file pair. The normalizer and
+    metrics are only created on the first call within a process.
+
+    :param key: Identifies the batch run the state belongs to
+    :return: (Pair, OrderedDict of results by metric name, OpcodeCounts or
+        None if not aggregating)
+    """
+    if key not in _worker_state:
+        _worker_state.clear()
+        _worker_state[key] = (get_normalizer_from_args(args), metrics_cli.get_metrics_from_args(args))
+    normalizer, metrics = _worker_state[key]
+
+    prev_title = Logger.title
+    try:
+        Logger.title = 'Reference %s' % (pair.title,)
+        ref = ColumnarSchema(metrics_cli.file_to_iterable(pair.reference, args.reference_type,
+                                                          normalizer=normalizer))
+        Logger.title = 'Hypothesis %s' % (pair.title,)
+        hyp = ColumnarSchema(metrics_cli.file_to_iterable(pair.hypothesis, args.hypothesis_type,
+                                                          normalizer=normalizer))
+    finally:
+        Logger.title = prev_title
+
+    context = EvaluationContext(ref, hyp)
+    results = OrderedDict()
+    for metric_name, result in metrics_cli.evaluate(context, metrics):
+        if isinstance(result, tuple) and hasattr(result, '_asdict'):
+            result = result._asdict()
+        results[metric_name] = result
+
+    counts = None
+    if args.aggregate is not None:
+        differ_class = args.aggregate[1] if len(args.aggregate) > 1 else None
+        counts = context.get_opcode_counts(differ_class)
+    return pair, results, counts
+
+
+def run(pairs, args, jobs=None):
+    """
+    Evaluate all file pairs, using `jobs` worker processes (or in the current
+    process if `jobs` is 1)
+
+    :return: generator of (Pair, results, counts, exception), in order of completion
+    """
+    key = uuid.uuid4().hex
+
+    if jobs == 1:
+        for pair in pairs:
+            try:
+                yield evaluate_pair(key, args, pair) + (None,)
+            except Exception as e:
+                yield pair, None, None, e
+        return
+
+    with ProcessPoolExecutor(jobs) as executor:
+        futures = {executor.submit(evaluate_pair, key, args, pair): pair for pair in pairs}
+        for future in as_completed(futures):
+            exception = future.exception()
+            if exception is not None:
+                yield futures[future], None, None, exception
+            else:
+                yield future.result() + (None,)
+
+
+def main(parser, args):
+    if ('metrics' not in args or not len(args.metrics)) and args.aggregate is None:
+        parser.error("need at least one metric or --aggregate")
+
+    if args.reference is not None or args.hypothesis is not None:
+        parser.error("--reference and --hypothesis cannot be combined with batch mode")
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs should be at least 1")
+
+    aggregate = None
+    if args.aggregate is not None:
+        if len(args.aggregate) > 2:
+            parser.error("--aggregate accepts at most 2 arguments: mode and differ_class")
+        try:
+            aggregate = WERAggregate(*args.aggregate[:1])
+        except ValueError as e:
+            parser.error(e.args[0])
+
+    try:
+        pairs = list(get_pairs(parser, args))
+    except (ManifestError, csv.CSVParserError, OSError) as e:
+        parser.error("could not read file pairs: %s" % (e,))
+
+    total = failed = 0
+    with output_factory.create(args.output_format) as out:
+        for pair, results, counts, exception in run(pairs, args, args.jobs):
+            total += 1
+            if exception is not None:
+                failed += 1
+                logger.error("Failed to benchmark %r (%s vs %s): %r",
+                             pair.title, pair.reference, pair.hypothesis, exception)
+                continue
+            if results:
+                out.result(pair.title, results)
+            if aggregate is not None:
+                aggregate.add(counts)
+
+        if aggregate is not None:
+            out.result('aggregate', aggregate.result())
+
+    if failed:
+        parser.exit(1, "%d of %d file pairs failed\n" % (failed, total))
@@ -3,6 +3,7 @@ Do a complete flow of input -> normalization -> segmentation -> metrics
 """
 
 import benchmarkstt.metrics.cli as metrics_cli
+from benchmarkstt.benchmark import batch
 from benchmarkstt.normalization.cli import args_logs, args_normalizers, get_normalizer_from_args
 import argparse
 
@@ -11,12 +12,15 @@ hidden = True
 
 
 def argparser(parser: argparse.ArgumentParser):
-    metrics_cli.argparser(parser)
+    metrics_cli.argparser(parser, required=False)
+    batch.argparser(parser)
     args_normalizers(parser)
     args_logs(parser)
     return parser
 
 
 def main(parser, args):
+    if batch.is_batch(args):
+        return batch.main(parser, args)
     normalizer = get_normalizer_from_args(args)
     metrics_cli.main(parser, args, normalizer)
@@ -2,10 +2,10 @@
 Module providing our own CSV file parser with support for whitespace trimming, empty lines filtering and comment lines
 """
 
+import re
 import typing
 import sys
-from functools import partial
-from benchmarkstt import DeferredList, make_printable
+from benchmarkstt import make_printable
 
 
 class InvalidDialectError(ValueError):
@@ -94,6 +94,9 @@ class Reader:
 
     """
 
+    # amount of characters read at once
+    chunk_size = 65536
+
     def __init__(self, file: typing.io.TextIO, dialect: Dialect, debug=None):
         if not issubclass(dialect, Dialect):
             raise InvalidDialectError("Invalid dialect", dialect)
@@ -133,10 +136,33 @@ class Reader:
         return char in self._dialect.delimiter
 
     def __iter__(self):
-        readchar = iter(partial(self._file.read, 1), '')
-        cur_line = 1
-
-        if self._debug:
+        return self._parse(not self._debug)
+
+    def _iter_chars(self):
+        """
+        Parse the file one character at a time
+        """
+        return self._parse(False)
+
+    def _iter_chunks(self):
+        """
+        Parse the file in chunks of `chunk_size` characters, skipping over the
+        characters that don't change the parser mode
+        """
+        return self._parse(True)
+
+    def _parse(self, skip: bool):
+        """
+        Parse the file, reading it in chunks of `chunk_size` characters.
+
+        :param skip: Skip over the characters that don't change the parser
+            mode (the contents of fields and comments) in one go, and split
+            blocks of lines without quotes, comments or leading delimiters
+            directly. Otherwise every character goes through the parser,
+            showing the parser mode of each character when debugging.
+        """
+        debug = self._debug and not skip
+        if debug:
             current_module = sys.modules[__name__]
             # print the color key the different modes
             print('MODES: ', end='')
@@ -145,29 +171,41 @@ class Reader:
                             if name.startswith('MODE_')
                             ]))
 
-            def debug(txt='', args=tuple(), **kwargs):
-                if type(args) is not tuple:
-                    args = tuple(DeferredList(args))
-                print(txt % args, **kwargs)
-                pass
-        else:
-            def debug(*args, **kwargs):
-                pass
-
+        dialect = self._dialect
+        delimiters = dialect.delimiter
+        quotechar = dialect.quotechar
+        commentchars = '' if dialect.commentchar is None else dialect.commentchar
+        trimleft = '' if dialect.trimleft is None else dialect.trimleft
+        trimright = '' if dialect.trimright is None else dialect.trimright
         newlinechars = '\n\r'
+        delimiter_is_whitespace = dialect.trimright is not None and delimiters in dialect.trimright
+
+        inside_special = re.compile('[%s]' % (re.escape(newlinechars + delimiters + (quotechar or '')),))
+        newline = re.compile('[%s]' % (newlinechars,))
+
+        # lines without quotes or comments can simply be split on the delimiters, as long as
+        # delimiters are not skipped as whitespace at the start of a field
+        simple_lines = None
+        if skip and not delimiter_is_whitespace and not any(char in trimleft for char in delimiters):
+            simple_lines = re.compile('(?:[^%s]*[%s])+' % (re.escape(newlinechars + (quotechar or '') + commentchars),
+                                                           newlinechars))
+            split_lines = newline.split
+            split_fields = re.compile('[%s]' % (re.escape(delimiters),)).split
+            if trimleft == trimright:
+                def strip(part):
+                    return part.strip(trimleft)
+            else:
+                def strip(part):
+                    return self._trimright(part.lstrip(trimleft))
 
         mode = MODE_FIRST
         field = []
         line = Line()
-
-        if self._dialect.trimright is not None:
-            delimiter_is_whitespace = self._dialect.delimiter in self._dialect.trimright
-        else:
-            delimiter_is_whitespace = False
+        cur_line = 1
 
         def yield_line():
-            nonlocal line, field, mode, delimiter_is_whitespace, is_newline, cur_line
-            if not(mode == MODE_OUTSIDE and delimiter_is_whitespace):
+            nonlocal line, field, mode
+            if not (mode == MODE_OUTSIDE and delimiter_is_whitespace):
                 next_field()
             field = []
             _line = line
@@ -182,9 +220,7 @@ class Reader:
             if mode != MODE_INSIDE_QUOTED_QUOTE:
                 field = self._trimright(field)
 
-            field = Field(field)
-            line.append(field)
-
+            line.append(Field(field))
             field = []
             mode = MODE_OUTSIDE
 
@@ -193,101 +229,167 @@ class Reader:
         last_quote_char = None
         last_quote_idx = None
         idx = 0
-        for char in readchar:
-            cur_char += 1
-            idx += 1
+        read = self._file.read
+        while True:
+            chunk = read(self.chunk_size)
+            if not chunk:
+                break
+            pos = 0
+            end = len(chunk)
+            while pos < end:
+                if mode == MODE_FIRST and simple_lines is not None:
+                    match = simple_lines.match(chunk, pos)
+                    if match is not None:
+                        stop = match.end()
+                        idx += stop - pos
+                        cur_char = 0
+                        # the last item is the empty string after the last newline
+                        texts = split_lines(chunk[pos:stop])
+                        texts.pop()
+                        pos = stop
+                        for text in texts:
+                            cur_line += 1
+                            if text.lstrip(trimleft):
+                                _line = Line(map(strip, split_fields(text)))
+                                _line.__dict__['lineno'] = cur_line
+                                yield _line
+                        continue
 
-            # print char to stdout with color defining mode
-            debug('\033[1;%d;40m%s\033[0;0m', lambda: (32+mode, make_printable(char)), end='')
+                # skip to the next character that may change the mode
+                if not skip:
+                    pass
+                elif mode == MODE_INSIDE:
+                    match = inside_special.search(chunk, pos)
+                    stop = end if match is None else match.start()
+                    if stop > pos:
+                        field.append(chunk[pos:stop])
+                        cur_char += stop - pos
+                        idx += stop - pos
+                        pos = stop
+                        continue
+                elif mode == MODE_INSIDE_QUOTED:
+                    stop = chunk.find(quotechar, pos)
+                    if stop == -1:
+                        stop = end
+                    if stop > pos:
+                        part = chunk[pos:stop]
+                        field.append(part)
+                        idx += stop - pos
+                        newlines = part.count('\n') + part.count('\r')
+                        if newlines:
+                            cur_line += newlines
+                            cur_char = len(part) - 1 - max(part.rfind('\n'), part.rfind('\r'))
+                        else:
+                            cur_char += stop - pos
+                        pos = stop
+                        continue
+                elif mode == MODE_COMMENT:
+                    match = newline.search(chunk, pos)
+                    stop = end if match is None else match.start()
+                    if stop > pos:
+                        cur_char += stop - pos
+                        idx += stop - pos
+                        pos = stop
+                        continue
 
-            is_newline = char in newlinechars
-            if is_newline:
-                cur_line += 1
-                cur_char = 0
+                char = chunk[pos]
+                pos += 1
+                cur_char += 1
+                idx += 1
 
-            if mode == MODE_COMMENT:
-                if is_newline:
-                    mode = MODE_FIRST
-                continue
+                if debug:
+                    # print char to stdout with color defining mode
+                    print('\033[1;%d;40m%s\033[0;0m' % (32 + mode, make_printable(char)), end='')
 
-            if mode in (MODE_OUTSIDE, MODE_FIRST):
+                is_newline = char in newlinechars
                 if is_newline:
-                    if mode != MODE_FIRST:
-                        yield yield_line()
-                    continue
+                    cur_line += 1
+                    cur_char = 0
 
-                if self._is_ignore_left(char):
+                if mode == MODE_COMMENT:
+                    if is_newline:
+                        mode = MODE_FIRST
                     continue
 
-                if self._is_comment(char):
-                    if mode is MODE_OUTSIDE:
-                        yield yield_line()
-                    mode = MODE_COMMENT
-                    continue
+                is_quote = char == quotechar
+                if mode in (MODE_OUTSIDE, MODE_FIRST):
+                    if is_newline:
+                        if mode != MODE_FIRST:
+                            yield yield_line()
+                        continue
 
-                if self._is_quote(char):
-                    mode = MODE_INSIDE_QUOTED
-                    last_quote_line = cur_line
-                    last_quote_char = cur_char
-                    last_quote_idx = idx
-                    continue
+                    if char in trimleft:
+                        continue
 
-                if self._is_delimiter(char):
-                    next_field()
-                    continue
+                    if char in commentchars:
+                        if mode is MODE_OUTSIDE:
+                            yield yield_line()
+                        mode = MODE_COMMENT
+                        continue
 
-                mode = MODE_INSIDE
-                field.append(char)
-                continue
+                    if is_quote:
+                        mode = MODE_INSIDE_QUOTED
+                        last_quote_line = cur_line
+                        last_quote_char = cur_char
+                        last_quote_idx = idx
+                        continue
 
-            if mode == MODE_INSIDE:
-                if self._is_quote(char):
-                    raise UnallowedQuoteError("Quote not allowed here", cur_line, cur_char, idx)
+                    if char in delimiters:
+                        next_field()
+                        continue
 
-                if is_newline:
-                    yield yield_line()
+                    mode = MODE_INSIDE
+                    field.append(char)
                     continue
 
-                if self._is_delimiter(char):
-                    next_field()
-                    continue
+                if mode == MODE_INSIDE:
+                    if is_quote:
+                        raise UnallowedQuoteError("Quote not allowed here", cur_line, cur_char, idx)
 
-                field.append(char)
-                continue
+                    if is_newline:
+                        yield yield_line()
+                        continue
 
-            if mode == MODE_INSIDE_QUOTED_QUOTE:
-                if self._is_quote(char):
-                    field.append(char)
-                    mode = MODE_INSIDE_QUOTED
-                    continue
+                    if char in delimiters:
+                        next_field()
+                        continue
 
-                if self._is_delimiter(char):
-                    next_field()
+                    field.append(char)
                     continue
 
-                if is_newline:
-                    yield yield_line()
-                    continue
+                if mode == MODE_INSIDE_QUOTED_QUOTE:
+                    if is_quote:
+                        field.append(char)
+                        mode = MODE_INSIDE_QUOTED
+                        continue
 
-                if not delimiter_is_whitespace:
-                    if self._is_ignore_right(char):
+                    if char in delimiters:
+                        next_field()
                         continue
-                    if self._is_comment(char):
+
+                    if is_newline:
                         yield yield_line()
-                        mode = MODE_COMMENT
                         continue
 
-                raise UnallowedQuoteError("Single quote inside quoted field", cur_line, cur_char, idx)
+                    if not delimiter_is_whitespace:
+                        if char in trimright:
+                            continue
+                        if char in commentchars:
+                            yield yield_line()
+                            mode = MODE_COMMENT
+                            continue
+
+                    raise UnallowedQuoteError("Single quote inside quoted field", cur_line, cur_char, idx)
 
-            if mode == MODE_INSIDE_QUOTED:
-                if self._is_quote(char):
+                # MODE_INSIDE_QUOTED
+                if is_quote:
                     mode = MODE_INSIDE_QUOTED_QUOTE
                     continue
 
                 field.append(char)
-                continue
 
-        debug()
+        if debug:
+            print()
 
         if mode == MODE_INSIDE_QUOTED:
             raise UnclosedQuoteError("Unexpected end", last_quote_line, last_quote_char, last_quote_idx)
@@ -2,6 +2,10 @@ from benchmarkstt.factory import Factory
 
 
 class Base:
+    # whether the differ takes the start times of the items of `a` and `b`
+    # (or None if unknown) as its third and fourth argument
+    timed = False
+
     def __init__(self, a='', b=''):
         raise NotImplementedError()
 
@@ -1,3 +1,7 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, groupby
+from concurrent.futures import ProcessPoolExecutor
 from difflib import SequenceMatcher
 from benchmarkstt.diff import Base
 
@@ -7,3 +11,825 @@ class RatcliffObershelp(SequenceMatcher, Base):
         if 'autojunk' not in kwargs:
             kwargs['autojunk'] = False
         super().__init__(a=a, b=b, *args, **kwargs)
+
+
+def opcodes_from_matching_blocks(blocks):
+    """
+    Convert matching blocks (ending with the `(len(a), len(b), 0)` sentinel) to
+    opcodes, as :py:meth:`difflib.SequenceMatcher.get_opcodes` does.
+    """
+    i = j = 0
+    opcodes = []
+    for ai, bj, size in blocks:
+        tag = ''
+        if i < ai and j < bj:
+            tag = 'replace'
+        elif i < ai:
+            tag = 'delete'
+        elif j < bj:
+            tag = 'insert'
+        if tag:
+            opcodes.append((tag, i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            opcodes.append(('equal', ai, i, bj, j))
+    return opcodes
+
+
+def _merge_adjacent(matches):
+    """Sort the matches and join the ones that are directly adjacent"""
+    blocks = []
+    for i, j, size in sorted(matches):
+        if blocks and blocks[-1][0] + blocks[-1][2] == i and blocks[-1][1] + blocks[-1][2] == j:
+            pi, pj, psize = blocks.pop()
+            i, j, size = pi, pj, psize + size
+        blocks.append((i, j, size))
+    return blocks
+
+
+def _middle_snake(a, alo, ahi, b, blo, bhi):
+    """
+    Find the middle snake of the shortest edit script between `a[alo:ahi]` and
+    `b[blo:bhi]` by running the greedy O(ND) search from both ends at once.
+
+    :return: (x, y, u, v, d) the snake from `(x, y)` to `(u, v)` (relative
+             to `alo` and `blo`) and the length of the edit script
+    """
+    a = list(a[alo:ahi])
+    b = list(b[blo:bhi])
+    ra = a[::-1]
+    rb = b[::-1]
+    n = len(a)
+    m = len(b)
+    delta = n - m
+    odd = delta & 1
+    offset = (n + m + 1) // 2 + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+
+    for d in range(offset):
+        for k in range(offset - d, offset + d + 1, 2):
+            if k == offset - d or (k != offset + d and forward[k - 1] < forward[k + 1]):
+                x = forward[k + 1]
+            else:
+                x = forward[k - 1] + 1
+            y = x - k + offset
+            x0, y0 = x, y
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            forward[k] = x
+            if odd and -d < delta - k + offset < d and x + backward[delta - k + 2 * offset] >= n:
+                return x0, y0, x, y, 2 * d - 1
+
+        for k in range(offset - d, offset + d + 1, 2):
+            if k == offset - d or (k != offset + d and backward[k - 1] < backward[k + 1]):
+                x = backward[k + 1]
+            else:
+                x = backward[k - 1] + 1
+            y = x - k + offset
+            x0, y0 = x, y
+            while x < n and y < m and ra[x] == rb[y]:
+                x += 1
+                y += 1
+            backward[k] = x
+            if not odd and -d <= delta - k + offset <= d and x + forward[delta - k + 2 * offset] >= n:
+                return n - x, m - y, n - x0, m - y0, 2 * d
+
+    raise AssertionError('No middle snake found')  # pragma: nocover
+
+
+class Myers(Base):
+    """
+    Shortest edit script (only insertions and deletions, adjacent ones are
+    reported as a 'replace') using Eugene W. Myers' O(ND) difference
+    algorithm, in its linear space variant.
+
+    Contrary to :py:class:`RatcliffObershelp`, the running time only depends
+    on the length of the inputs times the amount of differences, which makes it
+    suitable for long transcripts that share most of their words.
+
+    Insertions and deletions are shifted as far to the left as possible, so
+    that runs of repeated words are aligned deterministically.
+
+    See: http://www.xmailserver.org/diff2.pdf
+    """
+
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+        self._matching_blocks = None
+        self._opcodes = None
+
+    def _find_matches(self):
+        a = self.a
+        b = self.b
+        matches = []
+        todo = [(0, len(a), 0, len(b))]
+        while todo:
+            alo, ahi, blo, bhi = todo.pop()
+
+            start = alo
+            while alo < ahi and blo < bhi and a[alo] == b[blo]:
+                alo += 1
+                blo += 1
+            if alo > start:
+                matches.append((start, blo - alo + start, alo - start))
+
+            end = ahi
+            while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+                ahi -= 1
+                bhi -= 1
+            if ahi < end:
+                matches.append((ahi, bhi, end - ahi))
+
+            if alo == ahi or blo == bhi:
+                continue
+
+            x, y, u, v, d = _middle_snake(a, alo, ahi, b, blo, bhi)
+            if u > x:
+                matches.append((alo + x, blo + y, u - x))
+            if d > 1:
+                todo.append((alo, alo + x, blo, blo + y))
+                todo.append((alo + u, ahi, blo + v, bhi))
+        return matches
+
+    def _shift_left(self, matches):
+        """
+        Slide each pure insertion or deletion left over the equal block that
+        precedes it, by re-matching the last equal item with the last item of
+        the gap.
+        """
+        a = self.a
+        b = self.b
+        blocks = []
+        for i, j, size in matches:
+            if blocks:
+                pi, pj, psize = blocks[-1]
+                if pi + psize == i and pj + psize < j:
+                    # insertion of b[pj + psize:j]
+                    while psize and b[pj + psize - 1] == b[j - 1]:
+                        psize -= 1
+                        i -= 1
+                        j -= 1
+                        size += 1
+                elif pj + psize == j and pi + psize < i:
+                    # deletion of a[pi + psize:i]
+                    while psize and a[pi + psize - 1] == a[i - 1]:
+                        psize -= 1
+                        i -= 1
+                        j -= 1
+                        size += 1
+                if psize:
+                    blocks[-1] = (pi, pj, psize)
+                else:
+                    blocks.pop()
+
+            if blocks and blocks[-1][0] + blocks[-1][2] == i and blocks[-1][1] + blocks[-1][2] == j:
+                pi, pj, psize = blocks.pop()
+                i, j, size = pi, pj, psize + size
+            blocks.append((i, j, size))
+        return blocks
+
+    def get_matching_blocks(self):
+        """
+        Return list of triples describing matching subsequences, in the same
+        format as :py:meth:`difflib.SequenceMatcher.get_matching_blocks`.
+        """
+        if self._matching_blocks is None:
+            matches = _merge_adjacent(self._find_matches())
+            matches.append((len(self.a), len(self.b), 0))
+            matches = self._shift_left(matches)
+            if matches[-1][2]:
+                matches.append((len(self.a), len(self.b), 0))
+            self._matching_blocks = matches
+        return self._matching_blocks
+
+    def get_opcodes(self):
+        if self._opcodes is None:
+            self._opcodes = opcodes_from_matching_blocks(self.get_matching_blocks())
+        return self._opcodes
+
+
+def _unique_anchors(a, alo, ahi, b, blo, bhi):
+    """
+    Find the items that occur exactly once in both `a[alo:ahi]` and
+    `b[blo:bhi]`, with a matching neighbour (so a rare word that happens to
+    occur in the hypothesis by a recognition error elsewhere is not used), and
+    keep the longest chain of them that appears in the same order on both
+    sides.
+
+    :return: list of (i, j) positions, in increasing order
+    """
+    def unique_positions(seq, lo, hi):
+        positions = {}
+        for idx in range(lo, hi):
+            item = seq[idx]
+            positions[item] = None if item in positions else idx
+        return positions
+
+    positions_b = unique_positions(b, blo, bhi)
+    candidates = []
+    for item, i in unique_positions(a, alo, ahi).items():
+        if i is not None:
+            j = positions_b.get(item)
+            if j is None:
+                continue
+            if (i > alo and j > blo and a[i - 1] == b[j - 1]) or \
+                    (i + 1 < ahi and j + 1 < bhi and a[i + 1] == b[j + 1]):
+                candidates.append((i, j))
+    candidates.sort()
+
+    # longest increasing subsequence of j (patience sorting)
+    tails = []
+    tail_indexes = []
+    previous = [None] * len(candidates)
+    for idx, (i, j) in enumerate(candidates):
+        pos = bisect_left(tails, j)
+        if pos:
+            previous[idx] = tail_indexes[pos - 1]
+        if pos == len(tails):
+            tails.append(j)
+            tail_indexes.append(idx)
+        else:
+            tails[pos] = j
+            tail_indexes[pos] = idx
+
+    anchors = []
+    idx = tail_indexes[-1] if tail_indexes else None
+    while idx is not None:
+        anchors.append(candidates[idx])
+        idx = previous[idx]
+    anchors.reverse()
+    return anchors
+
+
+def _align_segment(differ_class, a, b):
+    return differ_class(a, b).get_matching_blocks()[:-1]
+
+
+class Anchored(Base):
+    """
+    Block-wise alignment for very long transcripts.
+
+    Items that occur exactly once in both sequences (in the same order) are
+    used as anchors, splitting the alignment in independent segments which are
+    in turn split on the items that are unique within that segment, and so on.
+    Only what remains, typically short stretches of common (filler) words and
+    recognition errors, is aligned using `differ_class`, so memory use and
+    running time are bounded by the largest remaining segment instead of by the
+    full length of the transcripts.
+
+    The result is not guaranteed to be a minimal alignment, but anchors are
+    very reliable for real world transcripts.
+
+    :param differ_class: The differ used for the segments between anchors,
+        either a class or the name of one of the available differs. Default is
+        'myers'.
+    :param jobs: Align the segments in this amount of worker processes,
+        default is to align them in the current process.
+    """
+
+    def __init__(self, a, b, differ_class=None, jobs=None):
+        if differ_class is None:
+            differ_class = Myers
+        elif type(differ_class) is str:
+            from benchmarkstt.diff import factory
+            differ_class = factory[differ_class]
+        self.a = a
+        self.b = b
+        self.differ_class = differ_class
+        self.jobs = jobs
+        self._matching_blocks = None
+        self._opcodes = None
+
+    def _find_segments(self):
+        """
+        :return: (matches, segments) the matches found by anchoring and the
+            (alo, ahi, blo, bhi) segments that are left to align
+        """
+        a = self.a
+        b = self.b
+        matches = []
+        segments = []
+        todo = [(0, len(a), 0, len(b))]
+        while todo:
+            alo, ahi, blo, bhi = todo.pop()
+
+            start = alo
+            while alo < ahi and blo < bhi and a[alo] == b[blo]:
+                alo += 1
+                blo += 1
+            if alo > start:
+                matches.append((start, blo - alo + start, alo - start))
+
+            end = ahi
+            while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+                ahi -= 1
+                bhi -= 1
+            if ahi < end:
+                matches.append((ahi, bhi, end - ahi))
+
+            if alo == ahi or blo == bhi:
+                continue
+
+            anchors = _unique_anchors(a, alo, ahi, b, blo, bhi)
+            if not anchors:
+                segments.append((alo, ahi, blo, bhi))
+                continue
+
+            for i, j in anchors:
+                matches.append((i, j, 1))
+                todo.append((alo, i, blo, j))
+                alo, blo = i + 1, j + 1
+            todo.append((alo, ahi, blo, bhi))
+        return matches, segments
+
+    def _align_segments(self, segments):
+        """
+        :return: generator of the matching blocks of each segment, relative to
+            the start of the segment
+        """
+        a = self.a
+        b = self.b
+        differ_classes = [self.differ_class] * len(segments)
+        segments_a = (list(a[alo:ahi]) for alo, ahi, blo, bhi in segments)
+        segments_b = (list(b[blo:bhi]) for alo, ahi, blo, bhi in segments)
+        if self.jobs is None or self.jobs <= 1 or len(segments) < 2:
+            return map(_align_segment, differ_classes, segments_a, segments_b)
+
+        with ProcessPoolExecutor(self.jobs) as executor:
+            chunksize = max(1, len(segments) // (self.jobs * 4))
+            return list(executor.map(_align_segment, differ_classes, segments_a, segments_b, chunksize=chunksize))
+
+    def get_matching_blocks(self):
+        """
+        Return list of triples describing matching subsequences, in the same
+        format as :py:meth:`difflib.SequenceMatcher.get_matching_blocks`.
+        """
+        if self._matching_blocks is None:
+            matches, segments = self._find_segments()
+            for (alo, ahi, blo, bhi), blocks in zip(segments, self._align_segments(segments)):
+                matches.extend((alo + i, blo + j, size) for i, j, size in blocks if size)
+            matches = _merge_adjacent(matches)
+            matches.append((len(self.a), len(self.b), 0))
+            self._matching_blocks = matches
+        return self._matching_blocks
+
+    def get_opcodes(self):
+        if self._opcodes is None:
+            self._opcodes = opcodes_from_matching_blocks(self.get_matching_blocks())
+        return self._opcodes
+
+
+def _levenshtein_row(a, b):
+    """
+    Last row of the Levenshtein distance matrix of `a` and `b`, i.e. the edit
+    distance between `a` and every prefix of `b`, in linear space.
+    """
+    previous = list(range(len(b) + 1))
+    for x in a:
+        current = [previous[0] + 1]
+        append = current.append
+        left = current[0]
+        for idx, y in enumerate(b):
+            cost = previous[idx] if x == y else previous[idx] + 1
+            up = previous[idx + 1] + 1
+            if up < cost:
+                cost = up
+            if left + 1 < cost:
+                cost = left + 1
+            append(cost)
+            left = cost
+        previous = current
+    return previous
+
+
+def _levenshtein_matches(a, b):
+    """
+    Matches of a minimal edit alignment of `a` and `b` using the full distance
+    matrix, only to be used for small inputs.
+
+    :return: list of (i, j, 1)
+    """
+    n = len(a)
+    m = len(b)
+    rows = [list(range(m + 1))]
+    for i in range(1, n + 1):
+        previous = rows[-1]
+        current = [i]
+        for j in range(1, m + 1):
+            current.append(min(previous[j - 1] + (a[i - 1] != b[j - 1]), previous[j] + 1, current[j - 1] + 1))
+        rows.append(current)
+
+    matches = []
+    i, j = n, m
+    while i and j:
+        cost = rows[i][j]
+        if a[i - 1] == b[j - 1] and cost == rows[i - 1][j - 1]:
+            matches.append((i - 1, j - 1, 1))
+            i -= 1
+            j -= 1
+        elif cost == rows[i - 1][j - 1] + 1:
+            i -= 1
+            j -= 1
+        elif cost == rows[i - 1][j] + 1:
+            i -= 1
+        else:
+            j -= 1
+    return matches
+
+
+class Hirschberg(Base):
+    """
+    Minimal edit (Levenshtein) alignment, using Hirschberg's linear space
+    divide and conquer algorithm, so the opcodes are consistent with the
+    'levenshtein' WER mode.
+
+    Running time is quadratic, memory use linear in the length of the inputs.
+    For very long transcripts, consider the 'anchored' differ with this one as
+    its `differ_class`.
+
+    See: https://doi.org/10.1145/360825.360861
+    """
+
+    # below this amount of cells the full distance matrix is used
+    MATRIX_SIZE = 4096
+
+    # last row of the distance matrix, and matches using the full matrix
+    _row = staticmethod(_levenshtein_row)
+    _matches = staticmethod(_levenshtein_matches)
+
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+        self._matching_blocks = None
+        self._opcodes = None
+
+    def _find_matches(self):
+        a = self.a
+        b = self.b
+        matches = []
+        todo = [(0, len(a), 0, len(b))]
+        while todo:
+            alo, ahi, blo, bhi = todo.pop()
+
+            start = alo
+            while alo < ahi and blo < bhi and a[alo] == b[blo]:
+                alo += 1
+                blo += 1
+            if alo > start:
+                matches.append((start, blo - alo + start, alo - start))
+
+            end = ahi
+            while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+                ahi -= 1
+                bhi -= 1
+            if ahi < end:
+                matches.append((ahi, bhi, end - ahi))
+
+            if alo == ahi or blo == bhi:
+                continue
+
+            if (ahi - alo) * (bhi - blo) <= self.MATRIX_SIZE or ahi - alo == 1:
+                matches.extend((alo + i, blo + j, size)
+                               for i, j, size in self._matches(a[alo:ahi], b[blo:bhi]))
+                continue
+
+            mid = (alo + ahi) // 2
+            segment_b = list(b[blo:bhi])
+            forward = self._row(list(a[alo:mid]), segment_b)
+            backward = self._row(list(a[ahi - 1:mid - 1 if mid else None:-1]), segment_b[::-1])
+            size = bhi - blo
+            split = min(range(size + 1), key=lambda j: forward[j] + backward[size - j])
+            todo.append((alo, mid, blo, blo + split))
+            todo.append((mid, ahi, blo + split, bhi))
+        return matches
+
+    def get_matching_blocks(self):
+        """
+        Return list of triples describing matching subsequences, in the same
+        format as :py:meth:`difflib.SequenceMatcher.get_matching_blocks`.
+        """
+        if self._matching_blocks is None:
+            matches = _merge_adjacent(self._find_matches())
+            matches.append((len(self.a), len(self.b), 0))
+            self._matching_blocks = matches
+        return self._matching_blocks
+
+    def get_opcodes(self):
+        if self._opcodes is None:
+            self._opcodes = opcodes_from_matching_blocks(self.get_matching_blocks())
+        return self._opcodes
+
+
+def _popcount(value):
+    return bin(value).count('1')
+
+
+def _bit_parallel_columns(a, b):
+    """
+    The columns of the Levenshtein distance matrix of `a` and `b`, computed
+    using Myers' bit-parallel algorithm (as formulated by Hyyrö), with a bit
+    per item of `a` in a (Python) integer, so all items of `a` are compared
+    to an item of `b` at once.
+
+    See: https://doi.org/10.1145/316542.316550
+
+    :return: generator of (positive, negative, distance) for each column `j`
+        from 1 to `len(b)`, bit `i - 1` of `positive` (`negative`) being set if
+        the distance of cell (i, j) is one more (less) than that of (i - 1, j),
+        and the distance of cell (len(a), j)
+    """
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    masks = {}
+    for idx, x in enumerate(a):
+        masks[x] = masks.get(x, 0) | (1 << idx)
+
+    positive = full
+    negative = 0
+    distance = len(a)
+    for y in b:
+        equal = masks.get(y, 0)
+        vertical = equal | negative
+        horizontal = (((equal & positive) + positive) ^ positive) | equal
+        horizontal_positive = negative | (~(horizontal | positive) & full)
+        horizontal_negative = positive & horizontal
+        if horizontal_positive & last:
+            distance += 1
+        elif horizontal_negative & last:
+            distance -= 1
+        # the distances of the first row increase by one for each column
+        horizontal_positive = (horizontal_positive << 1) | 1
+        horizontal_negative <<= 1
+        positive = (horizontal_negative | ~(vertical | horizontal_positive)) & full
+        negative = horizontal_positive & vertical
+        yield positive, negative, distance
+
+
+def _bit_parallel_row(a, b):
+    """Bit-parallel version of :py:func:`_levenshtein_row`"""
+    if not a:
+        return list(range(len(b) + 1))
+    row = [len(a)]
+    row.extend(distance for positive, negative, distance in _bit_parallel_columns(a, b))
+    return row
+
+
+def _bit_parallel_matches(a, b):
+    """
+    Bit-parallel version of :py:func:`_levenshtein_matches`, keeping two bits
+    per cell of the distance matrix.
+    """
+    n = len(a)
+    m = len(b)
+    if not n or not m:
+        return []
+    columns = [((1 << n) - 1, 0)]
+    row = [n]
+    for positive, negative, distance in _bit_parallel_columns(a, b):
+        columns.append((positive, negative))
+        row.append(distance)
+
+    def difference(j, i):
+        """Distance of cell (i, j) minus that of (i - 1, j)"""
+        positive, negative = columns[j]
+        return ((positive >> (i - 1)) & 1) - ((negative >> (i - 1)) & 1)
+
+    def cell(i, j):
+        """Distance of cell (i, j)"""
+        positive, negative = columns[j]
+        mask = (1 << i) - 1
+        return j + _popcount(positive & mask) - _popcount(negative & mask)
+
+    matches = []
+    i, j = n, m
+    # the distances of cells (i, j) and (i, j - 1)
+    current, left = row[m], row[m - 1]
+    while i and j:
+        up = current - difference(j, i)
+        diagonal = left - difference(j - 1, i)
+        equal = a[i - 1] == b[j - 1] and diagonal == current
+        if equal:
+            matches.append((i - 1, j - 1, 1))
+        if equal or diagonal + 1 == current:
+            i -= 1
+            j -= 1
+            current = diagonal
+        elif up + 1 == current:
+            i -= 1
+            current = up
+            left = diagonal
+            continue
+        else:
+            j -= 1
+            current = left
+        if j:
+            left = cell(i, j - 1)
+    return matches
+
+
+class Levenshtein(Hirschberg):
+    """
+    Minimal edit (Levenshtein) alignment, like :py:class:`Hirschberg`, but
+    comparing an item of `b` to all items of `a` at once using a bit-parallel
+    algorithm, which makes it a lot faster. The opcodes are consistent with
+    the 'levenshtein' WER mode, so eg. WER and DiffCounts can share one
+    alignment.
+
+    Memory use is linear in the length of the inputs (apart from the full
+    matrix used for the parts of up to `MATRIX_SIZE` cells, at two bits per
+    cell).
+    """
+
+    MATRIX_SIZE = 1 << 24
+
+    _row = staticmethod(_bit_parallel_row)
+    _matches = staticmethod(_bit_parallel_matches)
+
+    @property
+    def distance(self):
+        """The edit distance between `a` and `b`"""
+        return sum(max(i2 - i1, j2 - j1) for tag, i1, i2, j1, j2 in self.get_opcodes() if tag != 'equal')
+
+
+def _monotonic(times):
+    """The times, raised where needed so they never decrease"""
+    return list(accumulate(times, max))
+
+
+def _time_band(a_times, b_times, band):
+    """
+    The range of `j` allowed in row `i` of the edit distance matrix of `a` and
+    `b`, i.e. after aligning `a[:i]`: the items of `b` more than `band`
+    seconds before `a[i - 1]` should already be aligned, those up to `band`
+    seconds after it may be. The ranges only ever move forward, and overlap so there always is
+    a path from (0, 0) to (len(a), len(b)) (apart from the items of `b` after
+    the last range, which can only be inserted at the end).
+
+    :return: (lows, highs, firsts) arrays of the first and last allowed `j` of
+        each row, and the first item of `b` that `a[i - 1]` may be aligned with
+    """
+    n = len(a_times)
+    m = len(b_times)
+    a_times = _monotonic(a_times)
+    b_times = _monotonic(b_times)
+    lows = array('l', [0])
+    highs = array('l', [bisect_right(b_times, a_times[0] + band) if n else m])
+    firsts = array('l', [0])
+    for i in range(1, n + 1):
+        time = a_times[i - 1]
+        first = bisect_left(b_times, time - band)
+        low = min(max(first, lows[-1]), highs[-1])
+        high = max(bisect_right(b_times, time + band), highs[-1])
+        lows.append(low)
+        highs.append(high)
+        firsts.append(first)
+    return lows, highs, firsts
+
+
+class TimeBanded(Base):
+    """
+    Minimal edit (Levenshtein) alignment restricted to the items that are
+    close in time (a Sakoe-Chiba band over the timestamps): items more than
+    `band` seconds apart are never aligned with each other, they're reported
+    as deleted and inserted instead of replaced.
+
+    Running time and memory use are linear in the length of the inputs times
+    the amount of items within the band, which makes it suitable for multi-hour
+    timed transcripts. Without timings (eg. for plain text), the alignment is
+    done by :py:class:`Hirschberg` instead.
+
+    :param a_times: The start time of each item of `a`
+    :param b_times: The start time of each item of `b`
+    :param band: Maximum time difference in seconds, default 5
+    """
+
+    timed = True
+
+    def __init__(self, a, b, a_times=None, b_times=None, band=None):
+        if band is None:
+            band = 5.
+        self.a = a
+        self.b = b
+        self.a_times = a_times
+        self.b_times = b_times
+        self.band = band
+        self._matching_blocks = None
+        self._opcodes = None
+
+    def _distances(self, lows, highs, firsts):
+        """
+        The edit distance matrix within the band
+
+        :return: list of the costs of each row `i`, for `j` from `lows[i]` to
+            `highs[i]` (`len(b)` for the last row)
+        """
+        a = self.a
+        b = self.b
+        infinity = len(a) + len(b) + 1
+        rows = [array('l', range(highs[0] + 1))]
+        for i in range(1, len(a) + 1):
+            low = lows[i]
+            high = highs[i]
+            previous_low = lows[i - 1]
+            row = rows[-1]
+            # the previous row for j from low - 1 to high, without j = low - 1:
+            # a[i - 1] is not aligned with b[low - 1], which is too early
+            previous = [infinity]
+            previous.extend(row[low - previous_low:])
+            previous.extend([infinity] * (high - highs[i - 1]))
+
+            x = a[i - 1]
+            current = array('l')
+            append = current.append
+            left = infinity
+            # cells (i, j) for j up to firsts[i] can't align a[i - 1] with b[j - 1]
+            aligned = max(firsts[i] + 1, low) - low
+            for idx in range(high - low + 1):
+                cost = previous[idx + 1] + 1
+                if idx >= aligned:
+                    diagonal = previous[idx] + (x != b[low + idx - 1])
+                    if diagonal < cost:
+                        cost = diagonal
+                if left + 1 < cost:
+                    cost = left + 1
+                append(cost)
+                left = cost
+            rows.append(current)
+
+        # the items of b after the band of the last item of a are inserted
+        row = rows[-1]
+        row.extend(range(row[-1] + 1, row[-1] + 1 + len(b) - highs[-1]))
+        return rows
+
+    def _find_opcodes(self):
+        a = self.a
+        b = self.b
+        lows, highs, firsts = _time_band(self.a_times, self.b_times, self.band)
+        rows = self._distances(lows, highs, firsts)
+        infinity = len(a) + len(b) + 1
+
+        def cost(i, j):
+            if 0 <= j - lows[i] < len(rows[i]):
+                return rows[i][j - lows[i]]
+            return infinity
+
+        # the path through the matrix, backwards
+        steps = []
+        i, j = len(a), len(b)
+        while i and j:
+            current = cost(i, j)
+            diagonal = cost(i - 1, j - 1) if firsts[i] < j <= highs[i] else infinity
+            if a[i - 1] == b[j - 1] and diagonal == current:
+                steps.append('equal')
+                i -= 1
+                j -= 1
+            elif diagonal + 1 == current:
+                steps.append('replace')
+                i -= 1
+                j -= 1
+            elif cost(i - 1, j) + 1 == current:
+                steps.append('delete')
+                i -= 1
+            else:
+                steps.append('insert')
+                j -= 1
+        steps.extend(['delete'] * i)
+        steps.extend(['insert'] * j)
+
+        # each run of the same step is an opcode, so eg. items deleted next to
+        # inserted items (that are too far apart to be aligned) are not
+        # counted as replaced
+        opcodes = []
+        i = j = 0
+        for tag, run in groupby(reversed(steps)):
+            size = len(list(run))
+            i2 = i if tag == 'insert' else i + size
+            j2 = j if tag == 'delete' else j + size
+            opcodes.append((tag, i, i2, j, j2))
+            i, j = i2, j2
+        return opcodes
+
+    def get_matching_blocks(self):
+        """
+        Return list of triples describing matching subsequences, in the same
+        format as :py:meth:`difflib.SequenceMatcher.get_matching_blocks`.
+        """
+        if self._matching_blocks is None:
+            if self.a_times is None or self.b_times is None:
+                self._matching_blocks = Hirschberg(self.a, self.b).get_matching_blocks()
+            else:
+                self._matching_blocks = [(i1, j1, i2 - i1) for tag, i1, i2, j1, j2 in self.get_opcodes()
+                                         if tag == 'equal']
+                self._matching_blocks.append((len(self.a), len(self.b), 0))
+        return self._matching_blocks
+
+    def get_opcodes(self):
+        if self._opcodes is None:
+            if self.a_times is None or self.b_times is None:
+                self._opcodes = opcodes_from_matching_blocks(self.get_matching_blocks())
+            else:
+                self._opcodes = self._find_opcodes()
+        return self._opcodes
@@ -2,7 +2,7 @@ import logging
 from benchmarkstt import make_printable
 import difflib
 from markupsafe import escape
-from benchmarkstt.schema import Schema
+from benchmarkstt.schema import JSONListWriter
 from io import StringIO
 from collections import OrderedDict
 
@@ -120,12 +120,15 @@ class ListDialect(Dialect):
                 kind = 'delete'
             hyp = txt2[idx] if kind != 'delete' else None
             result = OrderedDict((('type', kind), ('reference', ref), ('hypothesis', hyp)))
-            self._output.append(result)
+            self._append(result)
 
         if idx < oor:
             for word_ in txt2[idx+1:]:
                 result = OrderedDict((('type', 'insert'), ('reference', None), ('hypothesis', word_)))
-                self._output.append(result)
+                self._append(result)
+
+    def _append(self, result):
+        self._output.append(result)
 
     def __enter__(self):
         self._output = []
@@ -139,21 +142,35 @@ class ListDialect(Dialect):
 
 
 class JSONDiffDialect(ListDialect):
-    def __init__(self):
+    """
+    :param stream: File-like object to write the JSON to while diffing,
+        instead of returning it as a string
+    """
+
+    def __init__(self, stream=None):
         self._line = None
+        self._target = stream
+        self._writer = None
 
     def __enter__(self):
         super().__enter__()
-        self._stream = StringIO()
+        self._stream = StringIO() if self._target is None else self._target
+        self._writer = JSONListWriter(self._stream)
         self._line = 0
         return self
 
+    def _append(self, result):
+        self._writer.write(result)
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         super().__exit__(exc_type, exc_val, exc_tb)
         self._line = None
-        self._stream.write(Schema.dumps(super().output()))
+        self._writer.close()
+        self._writer = None
 
     def output(self):
+        if self._target is not None:
+            return None
         return self._stream.getvalue()
 
 
@@ -167,6 +184,9 @@ class DiffFormatter:
         "rst": RestructuredTextDialect,
     }
 
+    # the dialects that can write the diff to a stream while diffing
+    stream_dialects = ("json",)
+
     def __init__(self, dialect=None, *args, **kwargs):
         if dialect is None:
             dialect = 'text'
@@ -227,6 +247,14 @@ class DiffFormatter:
         return dialect in cls.diff_dialects
 
 
-def format_diff(a, b, opcodes=None, dialect=None, preprocessor=None):
-    formatter = DiffFormatter(dialect)
+def format_diff(a, b, opcodes=None, dialect=None, preprocessor=None, stream=None):
+    """
+    :param stream: File-like object to write the diff to, only supported by
+        the :py:attr:`DiffFormatter.stream_dialects`
+    :return: The diff, None if written to `stream`
+    """
+    if stream is None:
+        formatter = DiffFormatter(dialect)
+    else:
+        formatter = DiffFormatter(dialect, stream=stream)
     return formatter.diff(a, b, opcodes, preprocessor)
@@ -3,6 +3,8 @@ Subpackage responsible for dealing with input formats and converting them to ben
 """
 
 from benchmarkstt.factory import Factory
+from benchmarkstt.schema import Item, iterload_array
+from io import StringIO
 
 
 class Base:
@@ -15,4 +17,41 @@ class Base:
         raise NotImplementedError()
 
 
+class TimedWordsBase(Base):
+    """
+    Base class for JSON transcripts with a list of words, each with its start
+    and end time (in seconds) and confidence.
+
+    The JSON is given as a string or a file-like object, the list of words is
+    read while iterating, without loading all of the JSON.
+
+    A normalizer is applied to each word separately (keeping its timing), so
+    rules spanning multiple words don't apply.
+    """
+
+    # keys of the list of words
+    path = ()
+    # skip any text before the JSON
+    preamble = False
+
+    def __init__(self, text, segmenter=None, normalizer=None):
+        self._text = text
+        self._normalizer = normalizer
+
+    def _words(self, elements):
+        """
+        :return: iterable of (word, start, end, confidence) tuples
+        """
+        raise NotImplementedError()
+
+    def __iter__(self):
+        fp = StringIO(self._text) if isinstance(self._text, str) else self._text
+        normalizer = self._normalizer
+        for word, start, end, confidence in self._words(iterload_array(fp, self.path, preamble=self.preamble)):
+            items = [word] if normalizer is None else normalizer.normalize(word).split()
+            for item in items:
+                yield Item._from_dict({"item": item, "type": "word", "@raw": word,
+                                       "start": start, "end": end, "confidence": confidence})
+
+
 factory = Factory(Base)
@@ -23,6 +23,49 @@ class PlainText(input.Base):
         return iter(self._segmenter(self._text, normalizer=self._normalizer))
 
 
+def _float(value):
+    return None if value is None else float(value)
+
+
+class AWS(input.TimedWordsBase):
+    """
+    AWS Transcribe JSON, punctuation is added to the preceding word
+    """
+
+    path = ('results', 'items')
+
+    def _words(self, elements):
+        word = None
+        for element in elements:
+            alternative = element['alternatives'][0]
+            if element.get('type') == 'punctuation':
+                if word is not None:
+                    word[0] += alternative['content']
+                continue
+            if word is not None:
+                yield tuple(word)
+            word = [alternative['content'], _float(element.get('start_time')), _float(element.get('end_time')),
+                    _float(alternative.get('confidence'))]
+        if word is not None:
+            yield tuple(word)
+
+
+class Kaldi(input.TimedWordsBase):
+    """
+    Kaldi JSON (as produced by the BBC), using the punctuated words if
+    available
+    """
+
+    path = ('words',)
+    preamble = True
+
+    def _words(self, elements):
+        for element in elements:
+            word = element.get('punct') or element['word']
+            yield word, _float(element.get('start')), _float(element.get('end')), \
+                _float(element.get('confidence'))
+
+
 class File(input.Base):
     """
     Load from a given filename.
@@ -66,9 +109,13 @@ class File(input.Base):
     def __iter__(self):
         encoding = settings.default_encoding
         with open(self._file, encoding=encoding) as f:
+            if issubclass(self._input_class, (PlainText, input.TimedWordsBase)):
+                # these read the file in chunks while iterating
+                yield from self._input_class(f, normalizer=self._normalizer)
+                return
             text = f.read()
 
-        return iter(self._input_class(text, normalizer=self._normalizer))
+        yield from self._input_class(text, normalizer=self._normalizer)
 
 # For future versions
 # class ExternalInput(LoadObjectProxy, input.Base):
@@ -9,5 +9,14 @@ class Base:
     def compare(self, ref: Schema, hyp: Schema):
         raise NotImplementedError()
 
+    def evaluate(self, context):
+        """
+        Calculate the metric for a
+        :py:class:`benchmarkstt.metrics.core.EvaluationContext`, metrics that
+        can reuse the alignment or other data cached by the context should
+        override this.
+        """
+        return self.compare(context.ref, context.hyp)
+
 
 factory = Factory(Base)
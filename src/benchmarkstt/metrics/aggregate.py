@@ -0,0 +1,132 @@
+"""
+Corpus level aggregation of metrics over any amount of reference and
+hypothesis pairs
+"""
+
+from benchmarkstt.metrics.core import OpcodeCounts, WER
+from collections import OrderedDict
+import math
+
+
+class WERAggregate:
+    """
+    Streaming corpus level Word Error Rate, accumulating the
+    :py:class:`benchmarkstt.metrics.core.OpcodeCounts` of each pair in constant
+    memory.
+
+    Reports both the pooled (micro averaged) WER, i.e. all edits of the
+    corpus divided by all reference words, and the mean of the per pair WERs
+    (macro averaged). Percentiles of the per pair WERs are approximated using a
+    histogram of WERs rounded to `resolution`.
+
+    Aggregates of different parts of a corpus (eg. calculated by different
+    worker processes) can be combined using :py:meth:`merge`.
+
+    :param mode: 'strict' (default) or 'hunt', see
+        :py:class:`benchmarkstt.metrics.core.WER`
+    :param resolution: Precision of the percentiles, default 0.001
+    """
+
+    def __init__(self, mode=None, resolution=None):
+        if mode is None:
+            mode = WER.MODE_STRICT
+        if mode not in (WER.MODE_STRICT, WER.MODE_HUNT):
+            raise ValueError("Unsupported WER mode for aggregation", mode)
+        if resolution is None:
+            resolution = .001
+
+        self.mode = mode
+        self.resolution = resolution
+        self._wer = WER(mode).from_counts
+        self.pairs = 0
+        self._counts = [0, 0, 0, 0]
+        self._wer_sum = 0
+        self._histogram = {}
+
+    def add(self, counts: OpcodeCounts):
+        """
+        Add the counts of one reference and hypothesis pair
+
+        :return: The WER of the pair
+        """
+        if not isinstance(counts, OpcodeCounts):
+            counts = OpcodeCounts(**counts)
+        self.pairs += 1
+        for idx, count in enumerate(counts):
+            self._counts[idx] += count
+
+        wer = self._wer(counts)
+        self._wer_sum += wer
+        bucket = int(round(wer / self.resolution))
+        self._histogram[bucket] = self._histogram.get(bucket, 0) + 1
+        return wer
+
+    def merge(self, other):
+        """
+        Add all pairs of another aggregate to this one
+
+        :param WERAggregate other:
+        :return: self
+        """
+        if (other.mode, other.resolution) != (self.mode, self.resolution):
+            raise ValueError("Can only merge aggregates with the same mode and resolution")
+        self.pairs += other.pairs
+        for idx, count in enumerate(other._counts):
+            self._counts[idx] += count
+        self._wer_sum += other._wer_sum
+        for bucket, count in other._histogram.items():
+            self._histogram[bucket] = self._histogram.get(bucket, 0) + count
+        return self
+
+    @property
+    def counts(self) -> OpcodeCounts:
+        return OpcodeCounts(*self._counts)
+
+    @property
+    def micro(self):
+        """Pooled WER of all pairs"""
+        if self.pairs == 0:
+            return None
+        return self._wer(self.counts)
+
+    @property
+    def macro(self):
+        """Mean of the per pair WERs"""
+        if self.pairs == 0:
+            return None
+        return self._wer_sum / self.pairs
+
+    def percentile(self, percent):
+        """
+        Approximate percentile of the per pair WERs (nearest rank)
+
+        :param percent: Between 0 and 100
+        """
+        if self.pairs == 0:
+            return None
+        if not 0 <= percent <= 100:
+            raise ValueError("Percentile should be between 0 and 100", percent)
+        rank = max(1, math.ceil(percent / 100 * self.pairs))
+        seen = 0
+        for bucket in sorted(self._histogram):
+            seen += self._histogram[bucket]
+            if seen >= rank:
+                # round to get rid of floating point artifacts of the multiplication
+                return round(bucket * self.resolution, 12)
+        return None  # pragma: nocover
+
+    def result(self, percentiles=None):
+        """
+        :param percentiles: The percentiles to report, default (50, 90, 95, 99)
+        :return: OrderedDict
+        """
+        if percentiles is None:
+            percentiles = (50, 90, 95, 99)
+        result = OrderedDict()
+        result['pairs'] = self.pairs
+        result['micro'] = self.micro
+        result['macro'] = self.macro
+        result['percentiles'] = {'p%g' % (percent,): self.percentile(percent)
+                                 for percent in percentiles}
+        result['counts'] = self.counts._asdict()
+        return result
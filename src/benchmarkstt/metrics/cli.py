@@ -5,6 +5,8 @@ Calculate metrics based on the comparison of a hypothesis with a reference.
 from benchmarkstt.input import core
 from benchmarkstt.output import factory as output_factory
 from benchmarkstt.metrics import factory
+from benchmarkstt.metrics.core import EvaluationContext
+from benchmarkstt.schema import ColumnarSchema
 from benchmarkstt.cli import args_from_factory
 from benchmarkstt.normalization.logger import Logger
 import argparse
@@ -13,11 +15,19 @@ import logging
 from collections import OrderedDict
 
 
-def argparser(parser: argparse.ArgumentParser):
+def argparser(parser: argparse.ArgumentParser, required=None):
+    """
+    Adds the help and arguments specific to this module
+
+    :param bool required: Whether --reference and --hypothesis are required arguments, default True
+    """
     # steps: input normalize[pre?] segmentation normalize[post?] compare
 
-    parser.add_argument('-r', '--reference', help='File to use as reference', required=True)
-    parser.add_argument('-h', '--hypothesis', help='File to use as hypothesis', required=True)
+    if required is None:
+        required = True
+
+    parser.add_argument('-r', '--reference', help='File to use as reference', required=required)
+    parser.add_argument('-h', '--hypothesis', help='File to use as hypothesis', required=required)
 
     types = OrderedDict(infer=' '.join([core.File.__doc__.strip(),
                                         'Automatically infer file type from the filename extension.']),
@@ -53,40 +63,74 @@ def file_to_iterable(file, type_, normalizer=None):
     return core.File(file, type_, normalizer=normalizer)
 
 
+def get_metrics_from_args(args):
+    """
+    Instantiate the metrics requested in the arguments
+
+    :return: list of (metric name, metric) tuples
+    """
+    metrics = []
+    for item in getattr(args, 'metrics', []):
+        item = list(item)
+        metric_name = item.pop(0).replace('-', '.')
+        cls = factory[metric_name]
+        kwargs = dict()
+
+        # somewhat hacky default diff formats for metrics
+        sig = signature(cls.__init__).parameters
+        sigkeys = list(sig)
+
+        if 'dialect' in sigkeys:
+            idx = sigkeys.index('dialect') - 1
+            sig = sig['dialect']
+            if sig.kind in (Parameter.POSITIONAL_OR_KEYWORD, Parameter.POSITIONAL_ONLY):
+                if len(item) <= idx:
+                    if args.output_format == 'json':
+                        # written straight to the output while diffing
+                        kwargs['dialect'] = 'json'
+                        if 'diff_formatter_dialect' in sigkeys:
+                            kwargs['diff_formatter_dialect'] = 'dict'
+                    else:
+                        kwargs['dialect'] = 'cli'
+
+        metrics.append((metric_name, cls(*item, **kwargs)))
+    return metrics
+
+
+def evaluate(context: EvaluationContext, metrics):
+    """
+    Calculate all metrics for the reference and hypothesis of the context,
+    sharing the alignment between them
+
+    :param metrics: list of (metric name, metric) tuples
+    :return: generator of (metric name, result) tuples, the result of the
+        metrics that can write it while calculating (like the worddiffs in
+        json) is a function writing it to a file-like object
+    """
+    for metric_name, metric in metrics:
+        writer = getattr(metric, 'writer', None)
+        result = None if writer is None else writer(context)
+        if result is None:
+            result = metric.evaluate(context)
+        yield metric_name, result
+
+
 def main(parser, args, normalizer=None):
+    if args.reference is None or args.hypothesis is None:
+        parser.error("the following arguments are required: -r/--reference, -h/--hypothesis")
+
     logging.getLogger()
     prev_title = Logger.title
     Logger.title = 'Reference'
-    ref = list(file_to_iterable(args.reference, args.reference_type, normalizer=normalizer))
+    ref = ColumnarSchema(file_to_iterable(args.reference, args.reference_type, normalizer=normalizer))
     Logger.title = 'Hypothesis'
-    hyp = list(file_to_iterable(args.hypothesis, args.hypothesis_type, normalizer=normalizer))
+    hyp = ColumnarSchema(file_to_iterable(args.hypothesis, args.hypothesis_type, normalizer=normalizer))
     Logger.title = prev_title
 
     if 'metrics' not in args or not len(args.metrics):
         parser.error("need at least one metric")
 
+    metrics = get_metrics_from_args(args)
     with output_factory.create(args.output_format) as out:
-        for item in args.metrics:
-            metric_name = item.pop(0).replace('-', '.')
-            cls = factory[metric_name]
-            kwargs = dict()
-
-            # somewhat hacky default diff formats for metrics
-            sig = signature(cls.__init__).parameters
-            sigkeys = list(sig)
-
-            if 'dialect' in sigkeys:
-                idx = sigkeys.index('dialect') - 1
-                sig = sig['dialect']
-                if sig.kind in (Parameter.POSITIONAL_OR_KEYWORD, Parameter.POSITIONAL_ONLY):
-                    if len(item) <= idx:
-                        if args.output_format == 'json':
-                            kwargs['dialect'] = 'list'
-                            if 'diff_formatter_dialect' in sigkeys:
-                                kwargs['diff_formatter_dialect'] = 'dict'
-                        else:
-                            kwargs['dialect'] = 'cli'
-
-            metric = cls(*item, **kwargs)
-            result = metric.compare(ref, hyp)
+        for metric_name, result in evaluate(EvaluationContext(ref, hyp), metrics):
             out.result(metric_name, result)
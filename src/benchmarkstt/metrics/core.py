@@ -1,24 +1,62 @@
-from benchmarkstt.schema import Schema
+from benchmarkstt.schema import Schema, ColumnarSchema
 import logging
-from benchmarkstt.diff.core import RatcliffObershelp
-from benchmarkstt.diff.formatter import format_diff
+from benchmarkstt.diff import factory as differ_factory
+from benchmarkstt.diff.core import RatcliffObershelp, Levenshtein
+from benchmarkstt.diff.formatter import format_diff, DiffFormatter
 from benchmarkstt.metrics import Base
-from collections import namedtuple
+from collections import namedtuple, Counter, OrderedDict
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+import sys
 # from benchmarkstt.modules import LoadObjectProxy
 import editdistance
 
 logger = logging.getLogger(__name__)
 
+_UTF32 = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+
 OpcodeCounts = namedtuple('OpcodeCounts',
                           ('equal', 'replace', 'insert', 'delete'))
 
+InternedPair = namedtuple('InternedPair', ('ref', 'hyp', 'vocabulary'))
+
 
 def traversible(schema, key=None):
     if key is None:
         key = 'item'
+    if isinstance(schema, ColumnarSchema):
+        return schema.column(key)
     return [word[key] for word in schema]
 
 
+def intern_tokens(ref, hyp, key=None):
+    """
+    Map each token of both the reference and hypothesis to a compact integer
+    id, identical tokens get the same id.
+
+    :return: InternedPair, with `ref` and `hyp` as array('I') of token ids
+        and `vocabulary` the dict mapping tokens to their id
+    """
+    if key is None:
+        key = 'item'
+    vocabulary = {}
+    add = vocabulary.setdefault
+
+    def ids(schema):
+        codes = schema.codes(key) if isinstance(schema, ColumnarSchema) else None
+        if codes is None:
+            return array('I', [add(word[key], len(vocabulary)) for word in schema])
+        # the tokens are already interned per schema, only map those ids
+        schema_ids, values = codes
+        mapping = [add(value, len(vocabulary)) for value in values]
+        return array('I', map(mapping.__getitem__, schema_ids))
+
+    ref_ids = ids(ref)
+    hyp_ids = ids(hyp)
+    return InternedPair(ref_ids, hyp_ids, vocabulary)
+
+
 def get_opcode_counts(opcodes):
     counts = OpcodeCounts(0, 0, 0, 0)._asdict()
     for tag, alo, ahi, blo, bhi in opcodes:
@@ -42,11 +80,95 @@ def get_opcode_counts(opcodes):
     return OpcodeCounts(counts['equal'], counts['replace'], counts['insert'], counts['delete'])
 
 
-def get_differ(a, b, differ_class):
+def get_differ_class(differ_class):
     if differ_class is None:
         # differ_class = HuntMcIlroy
         differ_class = RatcliffObershelp
-    return differ_class(traversible(a), traversible(b))
+    elif type(differ_class) is str:
+        differ_class = differ_factory[differ_class]
+    return differ_class
+
+
+def get_differ(a, b, differ_class):
+    interned = intern_tokens(a, b)
+    return get_differ_class(differ_class)(interned.ref, interned.hyp)
+
+
+def word_times(schema, key=None):
+    """
+    The time of each word, words without one get the time of the word
+    before them (or 0)
+
+    :param key: Default 'start'
+    :return: Sequence of times, or None if none of the words has a time
+    """
+    if key is None:
+        key = 'start'
+    try:
+        times = traversible(schema, key)
+    except KeyError:
+        times = [word.get(key) for word in schema]
+    if None not in times:
+        return times
+    if all(time is None for time in times):
+        return None
+
+    result = []
+    last = 0.
+    for time in times:
+        if time is not None:
+            last = time
+        result.append(last)
+    return result
+
+
+class EvaluationContext:
+    """
+    A reference and hypothesis pair, caching everything that can be shared
+    between the metrics calculated on it: the interned tokens, the word
+    times, and the opcodes of the alignment for each differ (so e.g. WER,
+    DiffCounts and WordDiffs only need one alignment).
+
+    :param ref: The reference
+    :param hyp: The hypothesis
+    """
+
+    def __init__(self, ref: Schema, hyp: Schema):
+        self.ref = ref
+        self.hyp = hyp
+        self._interned = None
+        self._times = None
+        self._opcodes = {}
+
+    @property
+    def interned(self) -> InternedPair:
+        if self._interned is None:
+            self._interned = intern_tokens(self.ref, self.hyp)
+        return self._interned
+
+    @property
+    def times(self):
+        """
+        Tuple of the start times of the reference and hypothesis words (see
+        :py:func:`word_times`)
+        """
+        if self._times is None:
+            self._times = (word_times(self.ref), word_times(self.hyp))
+        return self._times
+
+    def get_opcodes(self, differ_class=None):
+        differ_class = get_differ_class(differ_class)
+        if differ_class not in self._opcodes:
+            interned = self.interned
+            logger.debug('Aligning using %s', differ_class.__name__)
+            args = (interned.ref, interned.hyp)
+            if getattr(differ_class, 'timed', False):
+                args += self.times
+            self._opcodes[differ_class] = differ_class(*args).get_opcodes()
+        return self._opcodes[differ_class]
+
+    def get_opcode_counts(self, differ_class=None) -> OpcodeCounts:
+        return get_opcode_counts(self.get_opcodes(differ_class))
 
 
 class WordDiffs(Base):
@@ -55,7 +177,8 @@ class WordDiffs(Base):
 
     :param dialect: Presentation format. Default is 'cli'.
     :example dialect: 'html'
-    :param differ_class: For future use.
+    :param differ_class: The differ to use, either a class or the name of one
+        of the available differs (eg. 'myers'). Default is 'ratcliffobershelp'.
     """
 
     def __init__(self, dialect=None, differ_class=None):
@@ -63,12 +186,31 @@ class WordDiffs(Base):
         self._dialect = dialect
 
     def compare(self, ref: Schema, hyp: Schema):
-        differ = get_differ(ref, hyp, differ_class=self._differ_class)
-        a = traversible(ref)
-        b = traversible(hyp)
-        return format_diff(a, b, differ.get_opcodes(),
+        return self.evaluate(EvaluationContext(ref, hyp))
+
+    def evaluate(self, context: EvaluationContext, stream=None):
+        """
+        :param stream: File-like object to write the diff to instead, only
+            supported by the dialects that write while diffing (eg. 'json')
+        """
+        a = traversible(context.ref)
+        b = traversible(context.hyp)
+        return format_diff(a, b, context.get_opcodes(self._differ_class),
                            dialect=self._dialect,
-                           preprocessor=lambda x: ' %s' % (' '.join(x),))
+                           preprocessor=lambda x: ' %s' % (' '.join(x),),
+                           stream=stream)
+
+    def writer(self, context: EvaluationContext):
+        """
+        :return: A function writing the diff to a file-like object, or None if
+            the dialect doesn't support writing while diffing
+        """
+        if self._dialect not in DiffFormatter.stream_dialects:
+            return None
+
+        def write(stream):
+            self.evaluate(context, stream)
+        return write
 
 
 class WER(Base):
@@ -95,9 +237,15 @@ class WER(Base):
     Editdistance, c++ implementation by Hiroyuki Tanaka:
     https://github.com/aflc/editdistance.
     See: https://en.wikipedia.org/wiki/Levenshtein_distance
+    If a differ is given (eg. 'levenshtein', which gives
+    the same result), the distance is counted from its
+    alignment instead, so it can be shared with eg. the
+    DiffCounts and WordDiffs metrics.
 
     :param mode: 'strict' (default), 'hunt' or 'levenshtein'.
-    :param differ_class: For future use.
+    :param differ_class: The differ to use, either a class or the name of one
+        of the available differs (eg. 'myers'). Default is 'ratcliffobershelp',
+        or none in 'levenshtein' mode.
     """
 
     # WER modes
@@ -111,27 +259,30 @@ class WER(Base):
 
     def __init__(self, mode=None, differ_class=None):
         self._mode = mode
-        if mode == self.MODE_LEVENSHTEIN:
-            return
-
-        if differ_class is None:
+        if differ_class is None and mode != self.MODE_LEVENSHTEIN:
             differ_class = RatcliffObershelp
         self._differ_class = differ_class
         if mode == self.MODE_HUNT:
             self.DEL_PENALTY = self.INS_PENALTY = .5
 
     def compare(self, ref: Schema, hyp: Schema):
-        if self._mode == self.MODE_LEVENSHTEIN:
-            ref_list = [i['item'] for i in ref]
-            total_ref = len(ref_list)
+        return self.evaluate(EvaluationContext(ref, hyp))
+
+    def evaluate(self, context: EvaluationContext):
+        if self._differ_class is None:
+            interned = context.interned
+            total_ref = len(interned.ref)
             if total_ref == 0:
                 return 1
-            return editdistance.eval(ref_list, [i['item'] for i in hyp]) / total_ref
-
-        diffs = get_differ(ref, hyp, differ_class=self._differ_class)
+            return editdistance.eval(interned.ref, interned.hyp) / total_ref
 
-        counts = get_opcode_counts(diffs.get_opcodes())
+        return self.from_counts(context.get_opcode_counts(self._differ_class))
 
+    def from_counts(self, counts: OpcodeCounts):
+        """
+        Calculate the WER from the opcode counts of an alignment (in
+        'levenshtein' mode, of a minimal edit alignment)
+        """
         changes = counts.replace * self.SUB_PENALTY + \
             counts.delete * self.DEL_PENALTY + \
             counts.insert * self.INS_PENALTY
@@ -142,9 +293,346 @@ class WER(Base):
         return changes / total_ref
 
 
+class TimeWindows:
+    """
+    Index of consecutive time windows, either all of the same duration or
+    starting at the given times (the first one also contains everything
+    before it, the last one everything after it).
+
+    :param window: Duration in seconds, or list of start times (also
+        accepted as a comma separated string)
+    """
+
+    def __init__(self, window):
+        if isinstance(window, str):
+            window = window.split(',') if ',' in window else float(window)
+        if isinstance(window, (int, float)):
+            if window <= 0:
+                raise ValueError("Expected a positive window duration", window)
+            self.duration = float(window)
+            self.starts = None
+        else:
+            self.duration = None
+            self.starts = sorted(float(start) for start in window if start != '')
+            if not self.starts:
+                raise ValueError("Expected at least one window")
+
+    def locate(self, times):
+        """
+        :return: list of the index of the window of each time
+        """
+        if self.duration is not None:
+            duration = self.duration
+            return [int(time // duration) for time in times]
+        starts = self.starts
+        return [max(bisect_right(starts, time) - 1, 0) for time in times]
+
+    def bounds(self, idx):
+        """
+        :return: tuple of the start and end of a window, the end of the last
+            window is None
+        """
+        if self.duration is not None:
+            return idx * self.duration, (idx + 1) * self.duration
+        end = self.starts[idx + 1] if idx + 1 < len(self.starts) else None
+        return self.starts[idx], end
+
+
+def get_window_counts(opcodes, windows):
+    """
+    Count the opcodes per window, like :py:func:`get_opcode_counts`, each
+    counted in the window of the reference word it applies to. Inserted words
+    are counted in the window of the reference word before them.
+
+    :param windows: The index of the window of each reference word
+    :return: dict of window index to OpcodeCounts
+    """
+    counts = OpcodeCounts(Counter(), Counter(), Counter(), Counter())
+    for tag, alo, ahi, blo, bhi in opcodes:
+        if tag == 'insert':
+            if windows:
+                counts.insert[windows[max(alo - 1, 0)]] += bhi - blo
+            else:
+                counts.insert[0] += bhi - blo
+        elif tag == 'replace':
+            ca = ahi - alo
+            cb = bhi - blo
+            replaced = min(ca, cb)
+            counts.replace.update(windows[alo:alo + replaced])
+            if ca > cb:
+                counts.delete.update(windows[alo + replaced:ahi])
+            elif ca < cb:
+                counts.insert[windows[ahi - 1]] += cb - ca
+        else:
+            getattr(counts, tag).update(windows[alo:ahi])
+
+    result = {}
+    for idx in sorted(set().union(*counts)):
+        result[idx] = OpcodeCounts(*(counter[idx] for counter in counts))
+    return result
+
+
+class WindowedWER(Base):
+    """
+    Word Error Rate per time window, eg. per minute of a long broadcast,
+    using the timings of the reference words (eg. from the aws or kaldi input
+    formats).
+
+    The reference and hypothesis are aligned once, each difference is then
+    counted in the window of the reference word it applies to (insertions in
+    the window of the reference word before them). Only windows containing
+    any words are included.
+
+    :param window: Duration of the windows in seconds, default 60, or the
+        start times of the windows (eg. of chapters or speaker turns)
+        separated by commas
+    :example window: '0,300,1200'
+    :param mode: 'strict' (default), 'hunt' or 'levenshtein', see WER
+    :param differ_class: The differ to use, either a class or the name of one
+        of the available differs (eg. 'myers'). Default is 'ratcliffobershelp',
+        or 'levenshtein' in 'levenshtein' mode.
+    :return: list of windows, with their start and end time, WER and opcode
+        counts
+    """
+
+    def __init__(self, window=None, mode=None, differ_class=None):
+        if window is None:
+            window = 60
+        if mode not in (None, WER.MODE_STRICT, WER.MODE_HUNT, WER.MODE_LEVENSHTEIN):
+            raise ValueError("Unsupported WER mode for windows", mode)
+        if differ_class is None:
+            differ_class = Levenshtein if mode == WER.MODE_LEVENSHTEIN else RatcliffObershelp
+        self._windows = TimeWindows(window)
+        self._wer = WER(mode).from_counts
+        self._differ_class = differ_class
+
+    def compare(self, ref: Schema, hyp: Schema):
+        return self.evaluate(EvaluationContext(ref, hyp))
+
+    def evaluate(self, context: EvaluationContext):
+        windows = self._windows
+        times = context.times[0]
+        if times is None:
+            times = [0.] * len(context.interned.ref)
+        window_counts = get_window_counts(context.get_opcodes(self._differ_class), windows.locate(times))
+        result = []
+        for idx, counts in window_counts.items():
+            start, end = windows.bounds(idx)
+            row = OrderedDict((('start', start), ('end', end), ('wer', self._wer(counts))))
+            row.update(counts._asdict())
+            result.append(row)
+        return result
+
+
+class IncrementalWER(Base):
+    """
+    Word Error Rate of a hypothesis that comes in in parts, eg. the partial
+    results of live captioning: after :py:meth:`reset` with the reference,
+    each :py:meth:`feed` of the next words of the hypothesis only updates the
+    alignment for those words, and the WER so far is available at any point.
+
+    The words are aligned with a minimal edit (Levenshtein) alignment,
+    restricted to the reference words within `band` words of the best
+    alignment so far, so each hypothesis word takes time proportional to
+    `band` instead of to the length of the reference. Each cell of the
+    alignment keeps the opcode counts of its path, so no backtrace is
+    needed.
+
+    :param mode: 'strict' (default), 'hunt' or 'levenshtein', see WER
+    :param band: Amount of reference words before and after the best
+        alignment so far that the next hypothesis word may be aligned with,
+        default 100
+    """
+
+    def __init__(self, mode=None, band=None):
+        if band is None:
+            band = 100
+        band = int(band)
+        if band < 1:
+            raise ValueError("Band should be at least one word", band)
+        self._wer = WER(mode).from_counts
+        self._band = band
+        self._ref = None
+
+    def reset(self, ref: Schema):
+        """
+        Start aligning a new hypothesis to the reference `ref`
+        """
+        self._ref = list(traversible(ref))
+        # the cells (cost, equal, replace, insert, delete) of the reference
+        # words from self._lo, after aligning the hypothesis so far
+        self._lo = 0
+        self._cells = [(i, 0, 0, 0, i) for i in range(min(len(self._ref), self._band) + 1)]
+        self._best = 0
+
+    def feed(self, hyp):
+        """
+        Align the next words of the hypothesis
+
+        :param hyp: Schema, or list of words
+        """
+        if self._ref is None:
+            raise ValueError("No reference to align to, call reset() first")
+        ref = self._ref
+        band = self._band
+        for word in hyp:
+            if type(word) is not str:
+                word = word['item']
+            previous = self._cells
+            previous_lo = self._lo
+            previous_hi = previous_lo + len(previous) - 1
+            # the band only moves forward
+            lo = previous_lo + max(0, self._best - band)
+            hi = min(len(ref), previous_lo + self._best + band)
+
+            cells = []
+            best = 0
+            for i in range(lo, hi + 1):
+                if i <= previous_hi:
+                    # inserted
+                    cost, equal, replace, insert, delete = previous[i - previous_lo]
+                    cell = (cost + 1, equal, replace, insert + 1, delete)
+                    if i > previous_lo:
+                        cost, equal, replace, insert, delete = previous[i - 1 - previous_lo]
+                        if ref[i - 1] == word:
+                            if cost <= cell[0]:
+                                cell = (cost, equal + 1, replace, insert, delete)
+                        elif cost + 1 <= cell[0]:
+                            cell = (cost + 1, equal, replace + 1, insert, delete)
+                else:
+                    cell = None
+                if i > lo:
+                    # deleted
+                    cost, equal, replace, insert, delete = cells[-1]
+                    if cell is None or cost + 1 < cell[0]:
+                        cell = (cost + 1, equal, replace, insert, delete + 1)
+                if cell[0] <= cells[best][0] if cells else True:
+                    best = len(cells)
+                cells.append(cell)
+            self._lo = lo
+            self._cells = cells
+            self._best = best
+
+    def get_opcode_counts(self, complete=False) -> OpcodeCounts:
+        """
+        The opcode counts of the alignment of the hypothesis so far
+
+        :param complete: Count the reference words after the best alignment
+            so far as deleted, eg. once the hypothesis is complete. By default
+            only the reference up to where the hypothesis got is counted.
+        """
+        if self._ref is None:
+            raise ValueError("No reference to align to, call reset() first")
+        cells = self._cells
+        if complete:
+            end = len(self._ref) - self._lo
+            idx = min(range(len(cells)), key=lambda idx: (cells[idx][0] + end - idx, -idx))
+            cost, equal, replace, insert, delete = cells[idx]
+            return OpcodeCounts(equal, replace, insert, delete + end - idx)
+        return OpcodeCounts(*cells[self._best][1:])
+
+    def get_wer(self, complete=False):
+        """
+        The WER of the hypothesis so far, see :py:meth:`get_opcode_counts`
+        """
+        return self._wer(self.get_opcode_counts(complete))
+
+    def compare(self, ref: Schema, hyp: Schema):
+        self.reset(ref)
+        self.feed(hyp)
+        return self.get_wer(complete=True)
+
+
+def code_points(words):
+    """
+    The characters of the words, separated by a space, as array('I') of
+    unicode code points
+    """
+    result = array('I')
+    result.frombytes(' '.join(words).encode(_UTF32))
+    return result
+
+
+def word_offsets(words):
+    """
+    The position of each word in :py:func:`code_points`, i.e. the characters
+    of word `idx` and the space after it are ``offsets[idx]:offsets[idx + 1]``
+
+    :return: array of `len(words) + 1` offsets
+    """
+    offsets = array('q', [0])
+    offsets.extend(accumulate(len(word) + 1 for word in words))
+    if len(offsets) > 1:
+        # no space after the last word
+        offsets[-1] -= 1
+    return offsets
+
+
+def get_character_opcodes(a, b, opcodes):
+    """
+    Align the characters of the words `a` and `b` (see :py:func:`code_points`)
+    within the alignment of the words: the characters of each stretch of
+    differing words are aligned using the (bit-parallel) 'levenshtein' differ.
+
+    :param opcodes: The opcodes of the alignment of the words
+    :return: list of opcodes on the characters
+    """
+    chars_a = code_points(a)
+    chars_b = code_points(b)
+    offsets_a = word_offsets(a)
+    offsets_b = word_offsets(b)
+    result = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        alo, ahi = offsets_a[i1], offsets_a[i2]
+        blo, bhi = offsets_b[j1], offsets_b[j2]
+        # equal words only differ in the space after the last word of a transcript
+        if tag == 'equal' and ahi - alo == bhi - blo:
+            result.append((tag, alo, ahi, blo, bhi))
+            continue
+        result.extend((tag, alo + k1, alo + k2, blo + l1, blo + l2)
+                      for tag, k1, k2, l1, l2 in Levenshtein(chars_a[alo:ahi], chars_b[blo:bhi]).get_opcodes())
+    return result
+
+
+class CER(Base):
+    """
+    Character Error Rate, the WER on the characters of the words (with a
+    space in between) instead of on the words, eg. for languages that
+    don't separate their words by spaces.
+
+    To keep it fast for transcripts of a million characters and more, the
+    words are aligned first, the characters are then only aligned within each
+    stretch of differing words, using a minimal edit alignment (see the
+    'levenshtein' differ). So in 'levenshtein' mode, the result can be
+    slightly higher than the edit distance of all characters.
+
+    :param mode: 'strict' (default), 'hunt' or 'levenshtein', see WER
+    :param differ_class: The differ used to align the words, either a class or
+        the name of one of the available differs (eg. 'myers'). Default is
+        'ratcliffobershelp', or 'levenshtein' in 'levenshtein' mode.
+    """
+
+    def __init__(self, mode=None, differ_class=None):
+        if differ_class is None:
+            differ_class = Levenshtein if mode == WER.MODE_LEVENSHTEIN else RatcliffObershelp
+        self._differ_class = differ_class
+        self._wer = WER(mode).from_counts
+
+    def compare(self, ref: Schema, hyp: Schema):
+        return self.evaluate(EvaluationContext(ref, hyp))
+
+    def evaluate(self, context: EvaluationContext):
+        opcodes = get_character_opcodes(traversible(context.ref), traversible(context.hyp),
+                                        context.get_opcodes(self._differ_class))
+        return self._wer(get_opcode_counts(opcodes))
+
+
 class DiffCounts(Base):
     """
     Get the amount of differences between reference and hypothesis
+
+    :param differ_class: The differ to use, either a class or the name of one
+        of the available differs (eg. 'myers'). Default is 'ratcliffobershelp'.
     """
 
     def __init__(self, differ_class=None):
@@ -153,8 +641,10 @@ class DiffCounts(Base):
         self._differ_class = differ_class
 
     def compare(self, ref: Schema, hyp: Schema):
-        diffs = get_differ(ref, hyp, differ_class=self._differ_class)
-        return get_opcode_counts(diffs.get_opcodes())
+        return self.evaluate(EvaluationContext(ref, hyp))
+
+    def evaluate(self, context: EvaluationContext):
+        return context.get_opcode_counts(self._differ_class)
 
 
 # For a future version
@@ -0,0 +1,203 @@
+"""
+Confidence intervals and significance tests for corpus level WER, using
+bootstrap resampling of the per pair (utterance)
+:py:class:`benchmarkstt.metrics.core.OpcodeCounts`, so no alignment needs to be
+redone.
+
+.. attention::
+
+    Requires numpy (``pip install numpy``)
+
+"""
+
+from benchmarkstt.metrics.core import OpcodeCounts, WER
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+ConfidenceInterval = namedtuple('ConfidenceInterval', ('wer', 'low', 'high', 'confidence'))
+PairedBootstrap = namedtuple('PairedBootstrap', ('wer_a', 'wer_b', 'difference', 'low', 'high', 'p_value'))
+
+
+def _require_numpy():
+    if np is None:  # pragma: no cover
+        raise ImportError("benchmarkstt.metrics.significance requires numpy, install it using: pip install numpy")
+
+
+class UtteranceCounts:
+    """
+    Compact store of the OpcodeCounts of each reference and hypothesis pair,
+    as a (pairs x 4) numpy array with columns equal, replace, insert and
+    delete.
+
+    :param counts: Iterable of OpcodeCounts (or dicts) to start with
+    """
+
+    def __init__(self, counts=None):
+        _require_numpy()
+        self._data = np.zeros((64, 4), dtype=np.int64)
+        self._len = 0
+        if counts is not None:
+            for item in counts:
+                self.add(item)
+
+    def add(self, counts: OpcodeCounts):
+        if not isinstance(counts, tuple):
+            counts = OpcodeCounts(**counts)
+        if self._len == len(self._data):
+            self._data = np.concatenate((self._data, np.zeros_like(self._data)))
+        self._data[self._len] = counts
+        self._len += 1
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def array(self):
+        return self._data[:self._len]
+
+    def errors(self, mode=None):
+        """
+        Weighted amount of errors per pair, using the penalties of the WER mode
+        """
+        wer = WER(mode)
+        data = self.array
+        return data[:, 1] * wer.SUB_PENALTY + data[:, 2] * wer.INS_PENALTY + data[:, 3] * wer.DEL_PENALTY
+
+    def reference_lengths(self):
+        data = self.array
+        return data[:, 0] + data[:, 1] + data[:, 3]
+
+    def wer(self, mode=None):
+        """Pooled WER of all pairs"""
+        return WER(mode).from_counts(OpcodeCounts(*self.array.sum(axis=0).tolist()))
+
+    def save(self, file):
+        np.save(file, self.array)
+
+    @classmethod
+    def load(cls, file):
+        instance = cls()
+        data = np.load(file)
+        instance._data = np.array(data, dtype=np.int64).reshape(-1, 4)
+        instance._len = len(instance._data)
+        return instance
+
+
+def resample_sums(values, iterations, seed=None):
+    """
+    Sums of the rows of `values` for each of `iterations` bootstrap samples
+    (n rows drawn with replacement).
+
+    Identical rows are grouped first, the bootstrap sample is then drawn as
+    multinomial counts of each distinct row, which is a lot cheaper than
+    drawing n row indices when there are few distinct rows (as is the case for
+    per utterance counts).
+
+    :param values: (n x columns) array
+    :return: (iterations x columns) array
+    """
+    _require_numpy()
+    rng = np.random.default_rng(seed)
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    unique, frequencies = np.unique(values, axis=0, return_counts=True)
+
+    # drawing a multinomial costs about 8 times as much per distinct row as drawing an index
+    if len(unique) * 8 < n:
+        weights = rng.multinomial(n, frequencies / n, size=iterations)
+        return weights @ unique
+
+    result = np.empty((iterations, values.shape[1]))
+    chunk = max(1, 2 ** 22 // n)
+    for start in range(0, iterations, chunk):
+        end = min(iterations, start + chunk)
+        indices = rng.integers(0, n, size=(end - start, n))
+        result[start:end] = values[indices].sum(axis=1)
+    return result
+
+
+def _interval(samples, confidence):
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(samples, (alpha, 1 - alpha))
+    return float(low), float(high)
+
+
+def _check(counts, iterations, confidence):
+    if not len(counts):
+        raise ValueError("No counts to resample")
+    if iterations < 1:
+        raise ValueError("Need at least 1 iteration", iterations)
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence should be between 0 and 1", confidence)
+
+
+def bootstrap(counts: UtteranceCounts, iterations=None, confidence=None, mode=None, seed=None):
+    """
+    Percentile bootstrap confidence interval of the pooled corpus WER
+
+    :param counts: The per pair counts
+    :param iterations: Amount of bootstrap samples, default 10000
+    :param confidence: Default 0.95
+    :param mode: WER mode ('strict' or 'hunt')
+    :param seed: Seed for the random generator, for reproducible results
+    :return: ConfidenceInterval
+    """
+    if iterations is None:
+        iterations = 10000
+    if confidence is None:
+        confidence = .95
+    _check(counts, iterations, confidence)
+
+    errors = counts.errors(mode)
+    lengths = counts.reference_lengths()
+    sums = resample_sums(np.stack((errors, lengths), axis=1), iterations, seed)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        samples = sums[:, 0] / sums[:, 1]
+    low, high = _interval(samples, confidence)
+    return ConfidenceInterval(counts.wer(mode), low, high, confidence)
+
+
+def paired_bootstrap(counts_a: UtteranceCounts, counts_b: UtteranceCounts, iterations=None, confidence=None,
+                     mode=None, seed=None):
+    """
+    Paired bootstrap test between two hypothesis sets for the same references
+    (in the same order), eg. two STT vendors.
+
+    The confidence interval is the one of the difference `wer_b - wer_a`, the
+    (two-sided) p-value is the fraction of bootstrap differences, shifted to
+    a zero mean, that are at least as extreme as the observed difference.
+
+    :param counts_a: The per pair counts of the first hypothesis set
+    :param counts_b: The per pair counts of the second hypothesis set
+    :param iterations: Amount of bootstrap samples, default 10000
+    :param confidence: Default 0.95
+    :param mode: WER mode ('strict' or 'hunt')
+    :param seed: Seed for the random generator, for reproducible results
+    :return: PairedBootstrap
+    """
+    if iterations is None:
+        iterations = 10000
+    if confidence is None:
+        confidence = .95
+    _check(counts_a, iterations, confidence)
+
+    lengths = counts_a.reference_lengths()
+    if len(counts_a) != len(counts_b) or not np.array_equal(lengths, counts_b.reference_lengths()):
+        raise ValueError("Both hypothesis sets should be for the same references, in the same order")
+
+    # only the difference in errors per pair matters, which keeps the amount of distinct rows small
+    difference = counts_b.errors(mode) - counts_a.errors(mode)
+    sums = resample_sums(np.stack((difference, lengths), axis=1), iterations, seed)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        samples = sums[:, 0] / sums[:, 1]
+
+    wer_a = counts_a.wer(mode)
+    wer_b = counts_b.wer(mode)
+    observed = wer_b - wer_a
+    low, high = _interval(samples, confidence)
+    p_value = float(np.mean(np.abs(samples - observed) >= abs(observed)))
+    return PairedBootstrap(wer_a, wer_b, observed, low, high, p_value)
@@ -1,8 +1,9 @@
-from benchmarkstt.normalization.logger import log
+from benchmarkstt.normalization.logger import log, Logger
 import logging
 from benchmarkstt.factory import Factory
 from benchmarkstt import settings
 from benchmarkstt import csv
+from benchmarkstt.normalization.cache import file_stat, load_cached
 import os
 
 _normalizer_namespaces = (
@@ -46,20 +47,45 @@ class NormalizationComposite(Base):
 
     def __init__(self, title=None):
         self._normalizers = []
+        self._compiled = None
         self._title = type(self).__name__ if title is None else title
 
     def add(self, normalizer):
         """Adds a normalizer to the composite "stack"
         """
         self._normalizers.append(normalizer)
+        self._compiled = None
+
+    def compile(self):
+        """
+        Combine consecutive literal search and replace rules into single
+        passes, see :py:mod:`benchmarkstt.normalization.compiler`
+
+        :return: list of callables normalizing a text
+        """
+        if self._compiled is None:
+            from benchmarkstt.normalization.compiler import compile_normalizers
+            self._compiled = compile_normalizers(self._normalizers)
+        return self._compiled
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_compiled'] = None
+        return state
 
     def _normalize(self, text: str) -> str:
         # allow for an empty file
         if not self._normalizers:
             return text
 
-        for normalizer in self._normalizers:
-            text = normalizer.normalize(text)
+        if Logger.is_active():
+            # normalizations are being logged, apply each rule separately so each one gets logged
+            for normalizer in self._normalizers:
+                text = normalizer.normalize(text)
+            return text
+
+        for normalize in self.compile():
+            text = normalize(text)
         return text
 
     def __repr__(self):
@@ -89,13 +115,18 @@ class File(Base):
         if path is not None:
             file = os.path.join(path, file)
 
-        with open(file, encoding=encoding) as f:
-            self._normalizer = NormalizationComposite(title=title)
-            for line in csv.reader(f):
-                try:
-                    self._normalizer.add(normalizer(*line))
-                except TypeError as e:
-                    raise ValueError("%s:%d %r(%r) %r" % (file, line.lineno, normalizer, line, e))
+        def load():
+            self.dependencies = [(os.path.realpath(file), file_stat(file))]
+            with open(file, encoding=encoding) as f:
+                self._normalizer = NormalizationComposite(title=title)
+                for line in csv.reader(f):
+                    try:
+                        self._normalizer.add(normalizer(*line))
+                    except TypeError as e:
+                        raise ValueError("%s:%d %r(%r) %r" % (file, line.lineno, normalizer, line, e))
+
+        key = (os.path.realpath(file), title, encoding, repr(normalizer))
+        load_cached(self, key, load)
 
     def _normalize(self, text: str) -> str:
         return self._normalizer.normalize(text)
@@ -0,0 +1,314 @@
+"""
+On-disk cache of the normalization rules loaded from files, so rules files and
+config files are only parsed (and their normalizers only instantiated) again
+when one of the files they depend on changed.
+
+The cache is disabled by default, it is enabled by setting the environment
+variable ``NORMALIZATION_CACHE`` to the directory to store it in. Its total
+size is limited to ``NORMALIZATION_CACHE_SIZE`` bytes (default 256 MiB), the
+least recently used entries are removed first.
+
+Each entry is stored in a separate file, written atomically, so the cache can
+be shared by parallel processes.
+
+The normalizers built from config texts (as sent along with each api call)
+are kept in an in-memory :py:class:`ConfigCache` instead.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from io import StringIO
+from benchmarkstt import __version__, settings
+
+logger = logging.getLogger(__name__)
+
+_suffix = '.pickle'
+
+
+def file_stat(file):
+    """
+    :return: tuple identifying the current version of the file
+    """
+    stat = os.stat(file)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class RulesCache:
+    """
+    Stores picklable values, each along with the files they were loaded from,
+    a value is only returned as long as none of these files changed.
+
+    :param path: The directory to store the cache in
+    :param max_size: Maximum total size of the cache in bytes
+    """
+
+    def __init__(self, path, max_size=None):
+        if max_size is None:
+            max_size = settings.normalization_cache_size
+        self.path = path
+        self.max_size = max_size
+        # total size of the entries as far as known by this process, the
+        # entries written by other processes are only counted when pruning
+        self.size = None
+        os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def key(*args):
+        """
+        :param args: Values identifying the cached value, their repr should
+            be deterministic
+        """
+        return hashlib.sha1(repr((__version__,) + args).encode('utf-8')).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key + _suffix)
+
+    def get(self, key):
+        """
+        :return: The cached value, or None if there is none or any of the
+            files it depends on changed
+        """
+        file = self._file(key)
+        try:
+            with open(file, 'rb') as f:
+                dependencies = pickle.load(f)
+                if any(file_stat(dependency) != stat for dependency, stat in dependencies):
+                    return None
+                value = pickle.load(f)
+            # mark as recently used
+            os.utime(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning('Ignoring invalid cache entry %s: %r', file, e)
+            return None
+        return value
+
+    def set(self, key, value, dependencies):
+        """
+        Store the value, unless it cannot be pickled
+
+        :param dependencies: The files the value was loaded from, their stats
+            should be taken before reading them
+        :type dependencies: list of (file, stat) tuples, see :py:func:`file_stat`
+        """
+        file = self._file(key)
+        tmp_file = '%s.%d.tmp' % (file, os.getpid())
+        try:
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(list(dependencies), f, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            try:
+                size -= os.stat(file).st_size
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_file, file)
+        except (pickle.PicklingError, AttributeError, TypeError, OSError) as e:
+            logger.info('Not caching %s: %r', key, e)
+            try:
+                os.remove(tmp_file)
+            except FileNotFoundError:
+                pass
+            return
+
+        if self.size is not None:
+            self.size += size
+            if self.size <= self.max_size:
+                return
+        self.prune()
+
+    def prune(self):
+        """
+        Remove the least recently used entries until the cache fits its
+        maximum size. Done when storing a value takes the (known) size of
+        the cache over its maximum.
+        """
+        entries = []
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith(_suffix):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self.size = total
+
+    def clear(self):
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(_suffix):
+                os.remove(entry.path)
+        self.size = 0
+
+
+_caches = {}
+
+
+def get_cache():
+    """
+    :return: The :py:class:`RulesCache` as configured by the environment, or
+        None if caching is disabled
+    """
+    path = settings.normalization_cache
+    if not path:
+        return None
+    max_size = settings.normalization_cache_size
+    if (path, max_size) not in _caches:
+        _caches[path, max_size] = RulesCache(path, max_size)
+    return _caches[path, max_size]
+
+
+def load_cached(instance, key_args, load):
+    """
+    Restore the state of `instance` from the cache if possible, otherwise
+    initialize it by calling `load()` and cache the resulting state.
+
+    `load()` should set ``instance.dependencies``, the list of files (and their
+    stats) the state was loaded from.
+
+    :param instance: The object to initialize
+    :param key_args: Values that, together with the type of `instance`,
+        identify the state
+    :param callable load: Initializes the state of `instance` without the cache
+    """
+    cache = get_cache()
+    if cache is None:
+        load()
+        return
+
+    cls = type(instance)
+    # the referenced files without an encoding of their own are read using the default encoding
+    key = cache.key(cls.__module__, cls.__qualname__, settings.default_encoding, *key_args)
+    state = cache.get(key)
+    if state is not None:
+        instance.__dict__.update(state)
+        return
+
+    load()
+    cache.set(key, instance.__dict__, instance.dependencies)
+
+
+class ConfigCache:
+    """
+    In-memory cache of the normalizers built from config texts, keyed by a
+    hash of their content, so a config that is sent along with each api call
+    is only parsed (and its normalizers only instantiated) once per process.
+    The least recently used normalizers are removed first.
+
+    A cached normalizer is rebuilt if any of the files it refers to changed.
+
+    :param max_entries: Maximum amount of cached normalizers, default is the
+        ``CONFIG_CACHE_ENTRIES`` environment variable, or 64
+    :param max_size: Maximum total size of the cached normalizers in bytes
+        (estimated by their pickled size), default is the
+        ``CONFIG_CACHE_SIZE`` environment variable, or 64 MiB
+    """
+
+    def __init__(self, max_entries=None, max_size=None):
+        if max_entries is None:
+            max_entries = settings.config_cache_entries
+        if max_size is None:
+            max_size = settings.config_cache_size
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (normalizer, size)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(config, section):
+        return hashlib.sha256(repr((__version__, section, config)).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _size(normalizer, config):
+        try:
+            return len(pickle.dumps(normalizer.__dict__, pickle.HIGHEST_PROTOCOL))
+        except (pickle.PicklingError, AttributeError, TypeError):
+            return len(config.encode('utf-8'))
+
+    def get(self, config: str, section='normalization'):
+        """
+        :param config: The config text
+        :param section: The section of the config to use
+        :return: The normalizer for the config, see
+            :py:class:`benchmarkstt.normalization.core.Config`
+        """
+        from benchmarkstt.normalization.core import Config
+
+        key = self.key(config, section)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                normalizer, size = entry
+                if all(file_stat(file) == stat for file, stat in normalizer.dependencies):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return normalizer
+                self._remove(key)
+            self.misses += 1
+
+        normalizer = Config(StringIO(config), section=section)
+        size = self._size(normalizer, config)
+        if size > self.max_size or self.max_entries < 1:
+            return normalizer
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (normalizer, size)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_size:
+                self._remove(next(iter(self._entries)))
+        return normalizer
+
+    def _remove(self, key):
+        normalizer, size = self._entries.pop(key)
+        self.size -= size
+
+    def stats(self):
+        """
+        :return: dict with the amount of hits and misses, and the amount and
+            total size of the cached normalizers along with their limits
+        """
+        with self._lock:
+            return OrderedDict((('hits', self.hits), ('misses', self.misses),
+                                ('entries', len(self._entries)), ('max_entries', self.max_entries),
+                                ('size', self.size), ('max_size', self.max_size)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+
+_config_cache = None
+
+
+def get_config_cache():
+    """
+    :return: The :py:class:`ConfigCache` of this process
+    """
+    global _config_cache
+    if _config_cache is None:
+        _config_cache = ConfigCache()
+    return _config_cache
@@ -72,6 +72,7 @@ def get_normalizer_from_args(args):
 
     if 'normalizers' in args:
         for item in args.normalizers:
+            item = list(item)
             normalizer_name = item.pop(0).replace('-', '.')
             normalizer = factory.create(normalizer_name, *item)
             composite.add(normalizer)
@@ -0,0 +1,286 @@
+"""
+Compile a list of normalizers into fewer passes over the text.
+
+Consecutive literal search and replace rules (:py:class:`core.Replace`, and
+:py:class:`core.Regex` rules without any special characters) and consecutive
+:py:class:`core.ReplaceWords` rules of single words are combined into a single
+regex pass with a replacement lookup table, as long as this gives exactly the
+same result as applying them one after the other, i.e. as long as none of the
+rules can match text that overlaps with what another rule in the group matched
+or replaced.
+"""
+
+import re
+from benchmarkstt import normalization
+from benchmarkstt.normalization import core
+
+# longer searches or replacements are never combined
+MAX_LENGTH = 64
+
+_regex_special_chars = set('.^$*+?{}[]\\|()')
+_word = re.compile(r'\w+')
+
+
+def literal_rule(normalizer):
+    """
+    :return: (search, replace) if the normalizer is a plain literal search and
+        replace, or None
+    """
+    cls = type(normalizer)
+    if cls is core.Replace:
+        search, replace = normalizer._search, normalizer._replace
+    elif cls is core.Regex:
+        # (inline flags contain special characters as well)
+        search, replace = normalizer._search, normalizer._substitution
+        if type(search) is not str or not _regex_special_chars.isdisjoint(search) or \
+                type(replace) is not str or '\\' in replace:
+            return None
+    else:
+        return None
+
+    if not search or len(search) > MAX_LENGTH or len(replace) > MAX_LENGTH:
+        return None
+    return search, replace
+
+
+def word_rule(normalizer):
+    """
+    :return: (search, replace) if the normalizer is a ReplaceWords of a single
+        word, or None
+    """
+    if type(normalizer) is not core.ReplaceWords:
+        return None
+    search = normalizer._search
+    if len(search) > MAX_LENGTH or not _word.fullmatch(search):
+        return None
+    return search, normalizer._replace
+
+
+def trie_pattern(words):
+    """
+    Regex pattern matching any of `words`, structured as a trie so matching
+    does not depend on the amount of words.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        alternatives = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if '' in node and alternatives:
+            alternatives.append('')
+        if len(alternatives) < 2:
+            return ''.join(alternatives)
+        return '(?:%s)' % ('|'.join(alternatives),)
+
+    return build(trie)
+
+
+class _Strings:
+    """
+    Set of strings, with fast lookups of the ways another string can overlap
+    with any of them
+    """
+
+    def __init__(self):
+        self.strings = set()
+        self.lengths = set()
+        self.substrings = set()
+        self.prefixes = set()
+        self.suffixes = set()
+
+    def add(self, string):
+        length = len(string)
+        self.strings.add(string)
+        self.lengths.add(length)
+        for start in range(length):
+            for end in range(start + 1, length + 1):
+                self.substrings.add(string[start:end])
+        for idx in range(1, length):
+            self.prefixes.add(string[:idx])
+            self.suffixes.add(string[idx:])
+
+    def contained(self, string):
+        """Whether `string` contains or is contained in one of the strings"""
+        if string in self.substrings:
+            return True
+        length = len(string)
+        for size in self.lengths:
+            if size < length and any(string[idx:idx + size] in self.strings for idx in range(length - size + 1)):
+                return True
+        return False
+
+    def overlaps_left(self, string):
+        """Whether the end of `string` can overlap with the start of one of the strings"""
+        return any(string[idx:] in self.prefixes for idx in range(1, len(string)))
+
+    def overlaps_right(self, string):
+        """Whether the start of `string` can overlap with the end of one of the strings"""
+        return any(string[:idx] in self.suffixes for idx in range(1, len(string)))
+
+
+class LiteralReplaceGroup:
+    """
+    Literal search and replace rules that can be applied in one pass.
+
+    The pass replaces the leftmost match of any of the rules first, so a rule
+    may only be added if each of its matches is either also replaced when
+    applying the rules one by one or destroyed by a match of an earlier rule
+    (that is, one that sticks out to the left of it):
+
+    - it may not contain or be contained in an earlier search
+    - its end may not overlap with the start of an earlier search
+    - it may not overlap with an earlier replacement at all (it could match
+      text that did not exist before that rule was applied)
+    - if an earlier rule removes text, it should be a single character
+      (the removal joins the text around it)
+    """
+
+    def __init__(self):
+        self.table = {}
+        self._deletes = False
+        self._searches = _Strings()
+        self._replacements = _Strings()
+
+    def add(self, search, replace):
+        """
+        Add the rule if it can be combined with the rules already in the group
+
+        :return: bool Whether the rule was added
+        """
+        if self.table:
+            if self._deletes and len(search) > 1:
+                return False
+            searches = self._searches
+            if searches.contained(search) or searches.overlaps_left(search):
+                return False
+            replacements = self._replacements
+            if replacements.contained(search) or replacements.overlaps_left(search) or \
+                    replacements.overlaps_right(search):
+                return False
+
+        self.table[search] = replace
+        self._searches.add(search)
+        if replace:
+            self._replacements.add(replace)
+        else:
+            self._deletes = True
+        return True
+
+    def compile(self):
+        """
+        :return: callable normalizing a text
+        """
+        if len(self.table) == 1:
+            (search, replace), = self.table.items()
+            return lambda text: text.replace(search, replace)
+
+        table = self.table
+        pattern = re.compile(trie_pattern(table))
+
+        def replace(match):
+            return table[match.group(0)]
+
+        return lambda text: pattern.sub(replace, text)
+
+
+class WordReplaceGroup:
+    """
+    ReplaceWords rules of single words that can be applied in one pass.
+
+    Matches of these rules are complete words, so they never overlap, a rule
+    may be added as long as its word (with either case of the first letter) is
+    not already replaced by an earlier rule, nor one of the words of an earlier
+    replacement.
+    """
+
+    def __init__(self):
+        self.table = {}
+        self._replaced_words = set()
+
+    def add(self, search, replace):
+        """
+        Add the rule if it can be combined with the rules already in the group
+
+        :return: bool Whether the rule was added
+        """
+        # same as the character class used by ReplaceWords
+        words = set(char + search[1:] for char in search[0].upper() + search[0].lower())
+        if any(word in self.table or word in self._replaced_words or not _word.fullmatch(word) for word in words):
+            return False
+
+        for word in words:
+            self.table[word] = replace
+        if replace:
+            for variant in (replace[0].upper() + replace[1:], replace[0].lower() + replace[1:]):
+                self._replaced_words.update(_word.findall(variant))
+        return True
+
+    def compile(self):
+        """
+        :return: callable normalizing a text
+        """
+        table = self.table
+        pattern = re.compile(r'(?<!\w)%s(?!\w)' % (trie_pattern(table),))
+
+        def replace(match):
+            word = match.group(0)
+            replacement = table[word]
+            if len(replacement) == 0:
+                return ''
+            if word[0].isupper():
+                return ''.join([replacement[0].upper(), replacement[1:]])
+            return ''.join([replacement[0].lower(), replacement[1:]])
+
+        return lambda text: pattern.sub(replace, text)
+
+
+def unlogged(normalizer):
+    """
+    The normalize method of the normalizer without the logging wrapper (if
+    the normalizer does not override it)
+    """
+    if type(normalizer).normalize is normalization.Base.normalize:
+        return normalizer._normalize
+    return normalizer.normalize
+
+
+def compile_normalizers(normalizers):
+    """
+    The result is meant to be used when normalizations are not logged, so
+    the logging of each normalizer is left out.
+
+    :param normalizers: list of normalizers, applied in order
+    :return: list of callables normalizing a text, with the same result as
+        applying the normalizers in order
+    """
+    compiled = []
+    group = None
+    for normalizer in normalizers:
+        group_class = LiteralReplaceGroup
+        rule = literal_rule(normalizer)
+        if rule is None:
+            group_class = WordReplaceGroup
+            rule = word_rule(normalizer)
+
+        if rule is None:
+            if group is not None:
+                compiled.append(group.compile())
+                group = None
+            compiled.append(unlogged(normalizer))
+            continue
+
+        if type(group) is not group_class or not group.add(*rule):
+            if group is not None:
+                compiled.append(group.compile())
+            group = group_class()
+            if not group.add(*rule):
+                compiled.append(unlogged(normalizer))
+                group = None
+
+    if group is not None:
+        compiled.append(group.compile())
+    return compiled
@@ -8,6 +8,7 @@ import os
 from unidecode import unidecode
 from benchmarkstt import normalization
 from benchmarkstt import config, settings
+from benchmarkstt.normalization.cache import file_stat, load_cached
 from contextlib import contextmanager
 # from benchmarkstt.modules import LoadObjectProxy
 
@@ -17,6 +18,28 @@ if hasattr(os, 'PathLike'):
     file_types = (str, os.PathLike)
 
 
+class _LazyPattern:
+    """
+    Leaves the compiled regex pattern out when pickled, it is compiled again
+    when first used instead of when unpickled (eg. when loading cached rules,
+    of which many are never used on their own).
+    """
+
+    def _compile(self):
+        raise NotImplementedError()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_pattern', None)
+        return state
+
+    def __getattr__(self, name):
+        if name != '_pattern':
+            raise AttributeError(name)
+        self._pattern = self._compile()
+        return self._pattern
+
+
 class Replace(normalization.BaseWithFileSupport):
     """
     Simple search replace
@@ -38,7 +61,7 @@ class Replace(normalization.BaseWithFileSupport):
         return text.replace(self._search, self._replace)
 
 
-class ReplaceWords(normalization.BaseWithFileSupport):
+class ReplaceWords(_LazyPattern, normalization.BaseWithFileSupport):
     """
     Simple search replace that only replaces "words", the first letter will be
     checked case insensitive as well with preservation of case..
@@ -55,15 +78,19 @@ class ReplaceWords(normalization.BaseWithFileSupport):
     def __init__(self, search: str, replace: str):
         search = search.strip()
         replace = replace.strip()
+        self._search = search
+        self._pattern = self._compile()
+        self._replace = replace
 
+    def _compile(self):
+        search = self._search
         args = tuple(map(re.escape, [
             search[0].upper(),
             search[0].lower(),
             search[1:] if len(search) > 1 else ''
         ]))
         regex = r'(?<!\w)[%s%s]%s(?!\w)' % args
-        self._pattern = re.compile(regex)
-        self._replace = replace
+        return re.compile(regex)
 
     def _replacement_callback(self, matches):
         if len(self._replace) == 0:
@@ -78,7 +105,7 @@ class ReplaceWords(normalization.BaseWithFileSupport):
         return self._pattern.sub(self._replacement_callback, text)
 
 
-class Regex(normalization.BaseWithFileSupport):
+class Regex(_LazyPattern, normalization.BaseWithFileSupport):
     r"""
     Simple regex replace. By default the pattern is interpreted
     case-sensitive.
@@ -115,9 +142,13 @@ class Regex(normalization.BaseWithFileSupport):
     """
 
     def __init__(self, search: str, replace: str):
-        self._pattern = re.compile(search)
+        self._search = search
+        self._pattern = self._compile()
         self._substitution = replace
 
+    def _compile(self):
+        return re.compile(self._search)
+
     def _normalize(self, text: str) -> str:
         return self._pattern.sub(self._substitution, text)
 
@@ -216,11 +247,21 @@ class Config(normalization.Base):
         elif section is self.MAIN_SECTION:
             section = None
 
+        if type(file) not in file_types:
+            self._load(file, section, encoding)
+            return
+
+        key = (os.path.realpath(file), file, section, encoding)
+        load_cached(self, key, lambda: self._load(file, section, encoding))
+
+    def _load(self, file, section, encoding):
+        self.dependencies = []
         if type(file) in file_types:
             # next filenames are relative from path of the config file...
             path = os.path.dirname(os.path.realpath(file))
             title = file
 
+            self.dependencies.append((os.path.realpath(file), file_stat(file)))
             with open(file, encoding=encoding) as f:
                 reader = config.reader(f)
         else:
@@ -247,6 +288,8 @@ class Config(normalization.Base):
             except ImportError:
                 raise ValueError("Unknown normalizer %s on line %d: %s" %
                                  (repr(line[0]), line.lineno, repr(' '.join(line))))
+            # referenced rules and config files
+            self.dependencies.extend(getattr(normalizer, 'dependencies', ()))
 
     def _normalize(self, text: str) -> str:
         return self._normalizer.normalize(text)
@@ -14,6 +14,14 @@ class Logger:
     logger.propagate = False
     stack = []
 
+    @classmethod
+    def is_active(cls):
+        """
+        Whether normalizations are being logged, i.e. a handler (eg. from
+        :py:class:`LogCapturer` or ``--log``) is attached
+        """
+        return bool(cls.logger.handlers)
+
 
 class ListHandler(logging.StreamHandler):
     def __init__(self):
@@ -105,15 +113,19 @@ def log(func):
     """
 
     def _(cls, text):
-        Logger.stack.append(repr(cls))
-
-        result = func(cls, text)
         logger_ = Logger.logger
+        if not logger_.handlers:
+            # nobody is listening, skip all logging overhead
+            return func(cls, text)
 
-        if text != result:
-            logger_.info(NormalizedLogItem(list(Logger.stack), text, result))
+        Logger.stack.append(repr(cls))
+        try:
+            result = func(cls, text)
 
-        Logger.stack.pop()
+            if text != result:
+                logger_.info(NormalizedLogItem(list(Logger.stack), text, result))
+        finally:
+            Logger.stack.pop()
         return result
     return _
 
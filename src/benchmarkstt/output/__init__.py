@@ -13,6 +13,10 @@ class Base:
         pass
 
     def result(self, title, result):
+        """
+        :param result: The result, or a function writing it (as JSON) to a
+            file-like object
+        """
         raise NotImplementedError()
 
 
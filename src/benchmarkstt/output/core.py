@@ -1,10 +1,28 @@
 from benchmarkstt import output
-from benchmarkstt.schema import Schema
+from benchmarkstt.schema import JSONEncoder, write_chunks
 from collections import OrderedDict
+import sys
+
+
+def _cell(value):
+    if type(value) is float:
+        return "%.6f" % (value,)
+    if value is None:
+        return ''
+    return str(value)
+
+
+def _table_row(row, widths, separator='  '):
+    return separator.join(cell.ljust(width) for cell, width in zip(row, widths))
 
 
 class SimpleTextBase(output.Base):
     def print(self, result):
+        if callable(result):
+            result(sys.stdout)
+            print()
+            return
+
         if hasattr(result, '_asdict'):
             result = result._asdict()
 
@@ -13,9 +31,24 @@ class SimpleTextBase(output.Base):
         elif type(result) is dict or type(result) is OrderedDict:
             for k, v in result.items():
                 print("%s: %r" % (k, v))
+        elif type(result) is list and len(result) and \
+                all(type(row) is dict or type(row) is OrderedDict for row in result):
+            # eg. a time series
+            keys = list(result[0])
+            rows = [keys] + [[_cell(row.get(key)) for key in keys] for row in result]
+            widths = [max(len(row[idx]) for row in rows) for idx in range(len(keys))]
+            self.print_table(rows, widths)
         else:
             print(result)
 
+    def print_table(self, rows, widths):
+        """
+        :param rows: list of rows of cells, the first row being the header
+        :param widths: The width of each column
+        """
+        for row in rows:
+            print(_table_row(row, widths).rstrip())
+
 
 class ReStructuredText(SimpleTextBase):
     def result(self, title, result):
@@ -25,6 +58,15 @@ class ReStructuredText(SimpleTextBase):
         self.print(result)
         print()
 
+    def print_table(self, rows, widths):
+        border = '  '.join('=' * width for width in widths)
+        print(border)
+        for idx, row in enumerate(rows):
+            print(_table_row(row, widths).rstrip())
+            if idx == 0:
+                print(border)
+        print(border)
+
 
 class MarkDown(SimpleTextBase):
     def result(self, title, result):
@@ -33,6 +75,12 @@ class MarkDown(SimpleTextBase):
         self.print(result)
         print()
 
+    def print_table(self, rows, widths):
+        for idx, row in enumerate(rows):
+            print('| %s |' % (_table_row(row, widths, ' | '),))
+            if idx == 0:
+                print('|%s|' % ('|'.join('-' * (width + 2) for width in widths),))
+
 
 class Json(output.Base):
     def __init__(self):
@@ -58,4 +106,11 @@ class Json(output.Base):
         if isinstance(result, tuple) and hasattr(result, '_asdict'):
             result = result._asdict()
 
-        print(Schema.dumps(OrderedDict((('title', title), ('result', result)))), end='')
+        if callable(result):
+            print('{"title": %s, "result": ' % (JSONEncoder().encode(title),), end='')
+            result(sys.stdout)
+            print('}', end='')
+            return
+
+        # written a part at a time, so a large result never exists as a single string
+        write_chunks(sys.stdout, JSONEncoder().iterencode(OrderedDict((('title', title), ('result', result)))))
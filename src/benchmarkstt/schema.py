@@ -1,11 +1,22 @@
 """
 Defines the main schema for comparison and implements json serialization
+
+JSON is parsed using `orjson <https://github.com/ijl/orjson>`_ if it is
+installed (``pip install orjson``), and the standard library otherwise.
 """
 import json
-from collections.abc import Mapping
+import re
+from array import array
+from operator import itemgetter
+from collections.abc import Mapping, Sequence
 from typing import Union
 from collections import defaultdict
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 
 class SchemaError(ValueError):
     """Top Error class for all schema related exceptions"""
@@ -26,6 +37,8 @@ class Item(Mapping):
     :raises: ValueError, SchemaInvalidItemError
     """
 
+    __slots__ = ('_val', '_meta')
+
     def __init__(self, *args, **kwargs):
         if len(args) > 1:
             raise ValueError('Expected max 1 argument')
@@ -37,7 +50,25 @@ class Item(Mapping):
             self._val = args[0]
         else:
             self._val = dict(**kwargs)
-        self.meta = Meta()
+        self._meta = None
+
+    @classmethod
+    def _from_dict(cls, val):
+        """Create the item without checking `val`, which should be a dict"""
+        item = cls.__new__(cls)
+        item._val = val
+        item._meta = None
+        return item
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            self._meta = Meta()
+        return self._meta
+
+    @meta.setter
+    def meta(self, meta):
+        self._meta = meta
 
     def __getitem__(self, k):
         return self._val[k]
@@ -97,22 +128,66 @@ class Schema:
         return self._data[item]
 
     """
+    :param bool columnar: Load into a :py:class:`ColumnarSchema`
     :raises: SchemaJSONError
     """
     @staticmethod
-    def load(*args, **kwargs):
-        return json.load(*args, **kwargs, cls=JSONDecoder)
+    def load(fp, *args, columnar=False, **kwargs):
+        if args or kwargs:
+            return Schema._convert(json.load(fp, *args, **kwargs, cls=JSONDecoder), columnar)
+        return Schema._from_json(fp.read(), columnar)
 
     """
+    :param bool columnar: Load into a :py:class:`ColumnarSchema`
     :raises: SchemaJSONError
     """
     @staticmethod
-    def loads(*args, **kwargs):
-        return json.loads(*args, **kwargs, cls=JSONDecoder)
+    def loads(s, *args, columnar=False, **kwargs):
+        if args or kwargs:
+            return Schema._convert(json.loads(s, *args, **kwargs, cls=JSONDecoder), columnar)
+        return Schema._from_json(s, columnar)
+
+    """
+    Load the items of a JSON array one at a time, reading the file in chunks,
+    eg. ``ColumnarSchema(Schema.iterload(fp))`` loads a file without ever
+    keeping all of it (or an Item for each element) in memory.
+
+    :param fp: File-like object (text)
+    :param int chunk_size: Amount of characters to read at once
+    :return: generator of :py:class:`Item`
+    :raises: SchemaJSONError, SchemaInvalidItemError
+    """
+    @staticmethod
+    def iterload(fp, chunk_size=None):
+        return _iterload(fp, chunk_size)
+
+    @staticmethod
+    def _convert(schema, columnar):
+        return ColumnarSchema(schema) if columnar else schema
+
+    @staticmethod
+    def _from_json(data, columnar):
+        """Parse a JSON array of objects straight into the schema storage"""
+        result = _parse_json(data)
+        if type(result) is not list:
+            raise SchemaJSONError("Expected a list")
+        for obj in result:
+            if not isinstance(obj, dict):
+                raise SchemaInvalidItemError("Expected a dict object", obj)
+        if columnar:
+            return ColumnarSchema(result)
+        schema = Schema()
+        schema._data = list(map(Item._from_dict, result))
+        return schema
 
+    """
+    Write the JSON to `fp` in chunks of about `buffer_size` characters, a
+    :py:class:`Schema` is encoded a batch of items at a time, so the complete
+    JSON never needs to be in memory.
+    """
     @staticmethod
-    def dump(cls, *args, **kwargs):
-        return json.dump(cls, *args, **kwargs, cls=JSONEncoder)
+    def dump(obj, fp, *, buffer_size=None, **kwargs):
+        write_chunks(fp, JSONEncoder(**kwargs).iterencode(obj), buffer_size)
 
     @staticmethod
     def dumps(cls, *args, **kwargs):
@@ -140,17 +215,648 @@ class Schema:
     def _aslist(self):
         return self._data
 
+    def _iterdicts(self):
+        """The items as dicts"""
+        return map(Item._asdict, self._data)
+
     def __eq__(self, other):
-        if type(other) is Schema:
+        if isinstance(other, Schema):
             other = other._aslist()
-        return self._data == other
+        return self._aslist() == other
 
     def __ne__(self, other):
-        return self._data != other
+        return not self == other
+
+
+class Column(Sequence):
+    """
+    Read-only view of the values of a string column of a
+    :py:class:`ColumnarSchema`
+
+    :param ids: array of ids into `values`
+    :param values: list of the distinct values
+    """
+
+    def __init__(self, ids, values):
+        self.ids = ids
+        self.values = values
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, idx):
+        if type(idx) is slice:
+            values = self.values
+            return [values[id_] for id_ in self.ids[idx]]
+        return self.values[self.ids[idx]]
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.ids)
+
+
+class ColumnarSchema(Schema):
+    """
+    A :py:class:`Schema` storing its items column-wise instead of as separate
+    :py:class:`Item` objects, which takes only a fraction of the memory for
+    large transcripts.
+
+    For each key, string values are stored as ids (array of unsigned ints)
+    into a list of their distinct values, integer and float values in arrays
+    and any other values in a list. The keys of each item (in order) and
+    their type are stored as an id of the combination.
+
+    Items are created when accessed, so changes to the :py:attr:`Item.meta`
+    of an accessed item are not kept.
+    """
+
+    # amount of items appended at once by extend()
+    _batch_size = 4096
+
+    def __init__(self, data=None):
+        super().__init__()
+        self._len = 0
+        self._layouts = []
+        self._layout_ids = {}
+        self._rows = array('I')
+        self._columns = {}
+        self._values = {}
+        self._value_ids = {}
+        if data is not None:
+            self.extend(data)
+
+    def __len__(self):
+        return self._len
+
+    def _dict(self, idx):
+        columns = self._columns
+        values = self._values
+        item = {}
+        for key, kind in self._layouts[self._rows[idx]]:
+            value = columns[key, kind][idx]
+            if kind == 'I':
+                value = values[key][value]
+            item[key] = value
+        return item
+
+    def _item(self, idx):
+        return Item._from_dict(self._dict(idx))
+
+    def _iterdicts(self):
+        return map(self._dict, range(self._len))
+
+    def __iter__(self):
+        return map(self._item, range(self._len))
+
+    def __getitem__(self, idx):
+        if type(idx) is slice:
+            return [self._item(row) for row in range(self._len)[idx]]
+        return self._item(range(self._len)[idx])
+
+    def _aslist(self):
+        return list(self)
+
+    @staticmethod
+    def _asdict(obj):
+        if isinstance(obj, Item):
+            return obj._asdict()
+        if not isinstance(obj, dict):
+            raise SchemaError("Wrong type", type(obj))
+        return obj
+
+    def append(self, obj: Union[Item, dict]):
+        self._append(self._asdict(obj))
+
+    def extend(self, iterable):
+        batch = []
+        for obj in iterable:
+            try:
+                batch.append(self._asdict(obj))
+            except SchemaError:
+                if batch:
+                    self._extend(batch)
+                raise
+            if len(batch) == self._batch_size:
+                self._extend(batch)
+                batch = []
+        if batch:
+            self._extend(batch)
+
+    def _extend(self, batch):
+        """
+        Append the items column by column instead of one by one, if they all
+        have the same keys and types of values as the first one
+        """
+        first = batch[0]
+        self._append(first)
+        rest = batch[1:]
+        keys = tuple(first)
+        types = tuple(map(type, first.values()))
+        if not all(tuple(obj) == keys and tuple(map(type, obj.values())) == types for obj in rest):
+            for obj in rest:
+                self._append(obj)
+            return
+
+        layout_id = self._rows[-1]
+        new_columns = []
+        for key, kind in self._layouts[layout_id]:
+            values = list(map(itemgetter(key), rest))
+            if kind == 'I':
+                value_ids = self._value_ids[key]
+                distinct = self._values[key]
+                for value in dict.fromkeys(values):
+                    if value not in value_ids:
+                        value_ids[value] = len(value_ids)
+                        distinct.append(value)
+                values = array(kind, map(value_ids.__getitem__, values))
+            elif kind != 'O':
+                try:
+                    values = array(kind, values)
+                except OverflowError:
+                    # an int that does not fit in the array
+                    for obj in rest:
+                        self._append(obj)
+                    return
+            new_columns.append((self._columns[key, kind], values))
+
+        for column, values in new_columns:
+            column.extend(values)
+        self._rows.extend(array('I', [layout_id]) * len(rest))
+        self._len += len(rest)
+
+    def _pad(self, column):
+        """Fill in the rows of a column for the previous items that did not have a value in it"""
+        amount = self._len - len(column)
+        if type(column) is list:
+            column.extend([None] * amount)
+        else:
+            column.extend(array(column.typecode, [0]) * amount)
+
+    def _append(self, obj):
+        row = self._len
+        layout = []
+        for key, value in obj.items():
+            value_type = type(value)
+            if value_type is str:
+                kind = 'I'
+                value_ids = self._value_ids.setdefault(key, {})
+                id_ = value_ids.get(value)
+                if id_ is None:
+                    id_ = value_ids[value] = len(value_ids)
+                    self._values.setdefault(key, []).append(value)
+                value = id_
+            elif value_type is int and -2 ** 63 <= value < 2 ** 63:
+                kind = 'q'
+            elif value_type is float:
+                kind = 'd'
+            else:
+                kind = 'O'
+            layout.append((key, kind))
+
+            column = self._columns.get((key, kind))
+            if column is None:
+                column = self._columns[key, kind] = [] if kind == 'O' else array(kind)
+            if len(column) < row:
+                # the key was missing, or of another type, for the previous items
+                self._pad(column)
+            column.append(value)
+
+        layout = tuple(layout)
+        layout_id = self._layout_ids.get(layout)
+        if layout_id is None:
+            layout_id = self._layout_ids[layout] = len(self._layouts)
+            self._layouts.append(layout)
+        self._rows.append(layout_id)
+        self._len += 1
+
+    def codes(self, key='item'):
+        """
+        The values of `key` without creating the items, as long as each item
+        has a string value for it
+
+        :return: tuple of an array of ids and the list of distinct values the
+            ids refer to (in order of first occurrence), or None
+        """
+        if not all((key, 'I') in layout for layout in self._layouts):
+            return None
+        if not self._len:
+            return array('I'), []
+        return self._columns[key, 'I'], self._values[key]
+
+    def column(self, key='item'):
+        """
+        :return: Sequence of the values of `key` for each item, a view on the
+            stored values if all items have a value of the same type for it
+        """
+        codes = self.codes(key)
+        if codes is not None:
+            return Column(*codes)
+        for kind in ('d', 'q', 'O'):
+            if self._len and all((key, kind) in layout for layout in self._layouts):
+                return self._columns[key, kind]
+        return [item[key] for item in self]
+
+
+def _parse_json(data):
+    """Parse JSON without any hooks, using orjson if available"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # not necessarily invalid for the standard library (eg. NaN or
+            # very large integers), which also gives the usual error messages
+            pass
+    return json.loads(data)
+
+
+_whitespace = re.compile(r'[ \t\n\r]*')
+_separator = re.compile(r'[ \t\n\r]*(?:(,)[ \t\n\r]*|\])')
+_structure = re.compile(r'["\[\]{}]')
+
+
+def _backslashes(text, start, end):
+    """:return: The amount of backslashes right before `end` (from `start` on)"""
+    pos = end
+    while pos > start and text[pos - 1] == '\\':
+        pos -= 1
+    return end - pos
+
+
+def _find_value_end(text, pos, depth=0, in_string=False, escaped=False):
+    """
+    Find the end of the string, array or object starting at `pos`, by only
+    looking at its strings and brackets, or continue looking for it in the
+    next part of the text (with the `depth`, `in_string` and `escaped` state
+    returned for the previous part)
+
+    :return: tuple of the end (None if the value continues after `text`)
+        and the state to continue with
+    """
+    length = len(text)
+    if escaped:
+        pos += 1
+    while pos < length:
+        if in_string:
+            quote = text.find('"', pos)
+            if quote == -1:
+                # the string continues in the next part, maybe halfway an escape sequence
+                return None, depth, True, _backslashes(text, pos, length) % 2 == 1
+            escaped_quote = _backslashes(text, pos, quote) % 2
+            pos = quote + 1
+            if escaped_quote:
+                continue
+            in_string = False
+            if not depth:
+                return pos, depth, False, False
+            continue
+
+        match = _structure.search(text, pos)
+        if match is None:
+            break
+        pos = match.end()
+        char = match.group()
+        if char == '"':
+            in_string = True
+        elif char in '[{':
+            depth += 1
+        else:
+            depth -= 1
+            if not depth:
+                return pos, depth, False, False
+    return None, depth, in_string, False
+
+
+def _truncated(error, length):
+    """
+    Whether the decoding error may be caused by the JSON being cut off at
+    `length`, rather than by the JSON being invalid
+    """
+    # the error of a cut off literal or number is reported at its start, the longest being -Infinity
+    return error.pos >= length - len('-Infinity') or error.msg.startswith('Unterminated string')
+
+
+class _JSONReader:
+    """
+    Parses JSON from a file-like object one value at a time, reading it in
+    chunks, so only the value being parsed needs to be in memory
+    """
+
+    def __init__(self, fp, chunk_size=None):
+        self._fp = fp
+        self._chunk_size = 65536 if chunk_size is None else chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _read(self, size=None):
+        """
+        Append the next chunk to the unparsed part of the buffer, or as many
+        chunks as needed to append at least `size` characters
+        """
+        parts = [self._buffer[self._pos:]]
+        length = 0
+        while True:
+            chunk = self._fp.read(self._chunk_size)
+            self._eof = not chunk
+            parts.append(chunk)
+            length += len(chunk)
+            if self._eof or size is None or length >= size:
+                break
+        self._buffer = ''.join(parts)
+        self._pos = 0
+
+    def peek(self):
+        """:return: the next character that is not whitespace, '' at the end"""
+        while True:
+            self._pos = _whitespace.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or self._eof:
+                return self._buffer[self._pos:self._pos + 1]
+            self._read()
+
+    def skip_to(self, char):
+        """Skip everything up to the next occurrence of `char`"""
+        while True:
+            pos = self._buffer.find(char, self._pos)
+            if pos >= 0:
+                self._pos = pos
+                return
+            self._pos = len(self._buffer)
+            if self._eof:
+                return
+            self._read()
+
+    def error(self, msg):
+        return json.JSONDecodeError(msg, self._buffer, self._pos)
+
+    def expect(self, char, msg):
+        """Skip the next character, which should be `char`"""
+        if self.peek() != char:
+            raise self.error(msg)
+        self._pos += 1
+
+    def value(self):
+        """:return: the next JSON value"""
+        self.peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                if self._eof or not _truncated(e, len(self._buffer)):
+                    raise
+                # incomplete value, at least double what's buffered of it before trying again so a
+                # large value is only decoded a few times
+                self._read(len(self._buffer) - self._pos)
+                continue
+            if end < len(self._buffer) or self._eof:
+                break
+            # a number at the end of the buffer may continue in the next chunk
+            self._read()
+        self._pos = end
+        return obj
+
+    def skip(self):
+        """
+        Skip the next JSON value without decoding it, strings, arrays and
+        objects are only scanned for their end (so their contents aren't
+        validated)
+        """
+        if self.peek() not in ('"', '[', '{'):
+            self.value()
+            return
+        end, *state = _find_value_end(self._buffer, self._pos)
+        while end is None and not self._eof:
+            # no need to keep what's scanned already
+            self._pos = len(self._buffer)
+            self._read()
+            end, *state = _find_value_end(self._buffer, 0, *state)
+        if end is None:
+            raise self.error("Unterminated value")
+        self._pos = end
+
+    def elements(self):
+        """
+        Iterate over the elements of the array that comes next, the array
+        itself should already be skipped with :py:meth:`expect`
+        """
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        decode = self._decoder.raw_decode
+        separator = _separator.match
+        while True:
+            # fast path: an element and its separator that are complete in the buffer
+            try:
+                obj, end = decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                end = len(self._buffer)
+            if end >= len(self._buffer):
+                obj = self.value()
+                end = self._pos
+            yield obj
+
+            match = separator(self._buffer, end)
+            if match is not None and match.end() < len(self._buffer):
+                self._pos = match.end()
+                if match.group(1) is None:
+                    return
+                continue
+
+            self._pos = end
+            char = self.peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", self._buffer, self._pos - 1)
+            self.peek()
+
+    def find_key(self, key):
+        """
+        Skip the members of the object that comes next, the opening brace
+        included, up to the value of `key`
+
+        :return: bool Whether `key` was found
+        """
+        self.expect('{', "Expecting '{'")
+        if self.peek() == '}':
+            self._pos += 1
+            return False
+        while True:
+            if self.peek() != '"':
+                raise self.error("Expecting property name enclosed in double quotes")
+            name = self.value()
+            self.expect(':', "Expecting ':' delimiter")
+            if name == key:
+                return True
+            self.skip()
+            char = self.peek()
+            self._pos += 1
+            if char == '}':
+                return False
+            if char != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", self._buffer, self._pos - 1)
+
+
+def iterload_array(fp, path=(), chunk_size=None, preamble=False):
+    """
+    Iterate over the elements of a JSON array, reading the file in chunks.
+    The array is either the JSON itself, or found by following the keys in
+    `path` through nested objects, anything after the array is not read.
+
+    :param fp: File-like object (text)
+    :param path: The keys of the array, eg. ``('results', 'items')``
+    :param int chunk_size: Amount of characters to read at once
+    :param bool preamble: Skip any text before the first JSON object
+    :raises: SchemaJSONError, json.JSONDecodeError
+    """
+    reader = _JSONReader(fp, chunk_size)
+    if preamble:
+        reader.skip_to('{')
+    char = reader.peek()
+    if char == '':
+        raise reader.error("Expecting value")
+
+    for key in path:
+        if reader.peek() != '{':
+            raise SchemaJSONError("Expected an object", key)
+        if not reader.find_key(key):
+            raise SchemaJSONError("Missing key", key)
+
+    if reader.peek() != '[':
+        raise SchemaJSONError("Expected a list")
+    reader.expect('[', "Expecting '['")
+    yield from reader.elements()
+
+    if not path and reader.peek() != '':
+        raise reader.error("Extra data")
+
+
+def _iterload(fp, chunk_size=None):
+    return map(Item, iterload_array(fp, chunk_size=chunk_size))
+
+
+def write_chunks(fp, chunks, buffer_size=None):
+    """
+    Write the chunks of text to `fp`, joining small chunks so that about
+    `buffer_size` characters are written at a time
+    """
+    if buffer_size is None:
+        buffer_size = 65536
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            fp.write(''.join(buffer))
+            buffer = []
+            size = 0
+    if buffer:
+        fp.write(''.join(buffer))
+
+
+def _encode_elements(encoder, elements, first):
+    """
+    Encode a batch of elements of a JSON array as they appear inside the
+    array, preceded by a separator unless they're the first elements
+    """
+    text = encoder.encode(elements)
+    # strip the brackets (and the newline before the closing one)
+    text = text[1:-1] if encoder.indent is None else text[1:-2]
+    return text if first else encoder.item_separator + text
+
+
+def _end_of_array(encoder, empty):
+    return ']' if empty or encoder.indent is None else '\n]'
+
+
+def iterencode_list(encoder, elements, batch_size=None):
+    """
+    Encode an iterable as a JSON array, a batch of elements at a time, with
+    the same result as encoding the list of all elements
+
+    :param json.JSONEncoder encoder:
+    :param int batch_size: Amount of elements to encode at a time
+    :return: generator of chunks of JSON
+    """
+    if batch_size is None:
+        batch_size = 1000
+    yield '['
+    first = True
+    batch = []
+    for element in elements:
+        batch.append(element)
+        if len(batch) == batch_size:
+            yield _encode_elements(encoder, batch, first)
+            first = False
+            batch = []
+    if batch:
+        yield _encode_elements(encoder, batch, first)
+        first = False
+    yield _end_of_array(encoder, first)
+
+
+class JSONListWriter:
+    """
+    Write a JSON array to a file-like object while its elements are added,
+    with the same result as dumping the list of all elements.
+
+    :param fp: File-like object to write to
+    :param encoder: The json.JSONEncoder to use, default :py:class:`JSONEncoder`
+    :param int batch_size: Amount of elements to encode at a time
+    :param int buffer_size: Amount of characters to write at a time
+    """
+
+    def __init__(self, fp, encoder=None, batch_size=None, buffer_size=None):
+        self._fp = fp
+        self._encoder = JSONEncoder() if encoder is None else encoder
+        self._batch_size = 1000 if batch_size is None else batch_size
+        self._buffer_size = 65536 if buffer_size is None else buffer_size
+        self._batch = []
+        self._buffer = []
+        self._size = 0
+        self._first = True
+        self._write('[')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, element):
+        self._batch.append(element)
+        if len(self._batch) == self._batch_size:
+            self._encode()
+
+    def _encode(self):
+        if self._batch:
+            self._write(_encode_elements(self._encoder, self._batch, self._first))
+            self._first = False
+            self._batch = []
+
+    def _write(self, chunk):
+        self._buffer.append(chunk)
+        self._size += len(chunk)
+        if self._size >= self._buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write everything encoded so far"""
+        if self._buffer:
+            self._fp.write(''.join(self._buffer))
+            self._buffer = []
+            self._size = 0
+
+    def close(self):
+        """End the array, does not close the file-like object itself"""
+        self._encode()
+        self._write(_end_of_array(self._encoder, self._first))
+        self.flush()
 
 
 class JSONEncoder(json.JSONEncoder):
-    """Custom JSON encoding for schema"""
+    """Custom JSON encoding for schema, encoding a Schema a batch of items at a time"""
 
     def default(self, o):
         if isinstance(o, Schema):
@@ -162,6 +868,9 @@ class JSONEncoder(json.JSONEncoder):
         return super().default(o)
 
     def encode(self, obj):
+        if isinstance(obj, Schema):
+            return ''.join(self.iterencode(obj))
+
         try:
             obj = self.default(obj)
         except TypeError:
@@ -169,6 +878,11 @@ class JSONEncoder(json.JSONEncoder):
 
         return super().encode(obj)
 
+    def iterencode(self, o, _one_shot=False):
+        if isinstance(o, Schema):
+            return iterencode_list(self, o._iterdicts())
+        return super().iterencode(o, _one_shot)
+
 
 class JSONDecoder(json.JSONDecoder):
     """Custom JSON decoding for schema"""
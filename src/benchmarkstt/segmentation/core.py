@@ -10,32 +10,67 @@ from benchmarkstt.segmentation import Base
 class Simple(Base):
     """
     Simplest case, split into words by white space
+
+    The text can also be given as a file-like object, which is then read in
+    chunks of :py:attr:`chunk_size` characters while iterating (unless a
+    normalizer is given: normalization needs the complete text).
     """
 
+    chunk_size = 65536
+
     def __init__(self, text: str, pattern=r'[\n\t\s]+', normalizer=None):
         self._text = text
         self._re = re.compile('(%s)' % (pattern,))
         self._normalizer = normalizer
         if self._normalizer is not None:
+            if not isinstance(text, str):
+                text = text.read()
             self._text = self._normalizer.normalize(text)
 
+    def _words(self):
+        """
+        Yields each word followed by its separator, the separator of the last
+        word is None
+        """
+        if isinstance(self._text, str):
+            text = self._text
+            pos = 0
+            for match in self._re.finditer(text):
+                yield text[pos:match.start()], match.group(0)
+                pos = match.end()
+            yield text[pos:], None
+            return
+
+        buffer = ''
+        while True:
+            chunk = self._text.read(self.chunk_size)
+            buffer += chunk
+            pos = 0
+            for match in self._re.finditer(buffer):
+                if chunk and match.end() >= len(buffer):
+                    # the separator may continue in the next chunk
+                    break
+                yield buffer[pos:match.start()], match.group(0)
+                pos = match.end()
+            if not chunk:
+                yield buffer[pos:], None
+                return
+            buffer = buffer[pos:]
+
     def __iter__(self):
-        start_match = self._re.match(self._text)
-        iterable = self._re.split(self._text)
-        if iterable[0] == '':
-            iterable.pop(0)
-
-        pos = 0
-        length = len(iterable)
-
-        # special case, starts with word break, add it to first word
-        if start_match is not None:
-            matches = iterable[0:3]
-            pos = 3
-            yield Item({"item": matches[1], "type": "word", "@raw": ''.join(matches)})
-
-        while pos < length:
-            raw = ''.join(iterable[pos:pos+2])
+        words = self._words()
+        prefix = ''
+        word, separator = next(words)
+        if word == '' and separator is not None:
+            # special case, starts with word break, add it to the first word
+            prefix = separator
+            word, separator = next(words)
+
+        while True:
+            raw = prefix + word + (separator or '')
             if raw != '':
-                yield Item({"item": iterable[pos], "type": "word", "@raw": raw})
-            pos += 2
+                yield Item({"item": word, "type": "word", "@raw": raw})
+            if separator is None:
+                return
+            prefix = ''
+            word, separator = next(words)
@@ -0,0 +1,174 @@
+from benchmarkstt.__meta__ import __version__
+from benchmarkstt.api.asyncserver import Server, WorkerPool, SERVER_BUSY_CODE
+from benchmarkstt.api.jsonrpc import WORKER_LOST_CODE
+import asyncio
+import os
+import pytest
+import json
+import sys
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 6), reason="requires python3.6 or higher")
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def request(method, params=None, id_=1):
+    result = dict(jsonrpc='2.0', id=id_, method=method)
+    if params is not None:
+        result['params'] = params
+    return result
+
+
+@pytest.fixture
+def server():
+    pool = WorkerPool(1, 2)
+    yield Server(pool=pool)
+    pool.shutdown()
+
+
+def dispatch(server, payload):
+    status, response = run(server.dispatch(json.dumps(payload)))
+    return status, json.loads(response)
+
+
+def test_dispatch(server):
+    assert dispatch(server, request('version')) == (200, dict(jsonrpc='2.0', result=__version__, id=1))
+    assert dispatch(server, request('metrics.wer', dict(ref='a b', hyp='a c'))) == \
+        (200, dict(jsonrpc='2.0', result=.5, id=1))
+    assert dispatch(server, request('metrics.diffcounts', dict(ref='Hello M', hyp='Hello W'))) == \
+        (200, dict(jsonrpc='2.0', result=dict(equal=1, replace=1, insert=0, delete=0), id=1))
+    status, response = dispatch(server, request('normalization.config', dict(text='a', file='/etc/hosts')))
+    assert status == 400
+    assert response['error']['code'] == -32602
+    status, response = dispatch(server, request('metrics.wer', dict(nonexistent='a')))
+    assert status == 400
+    assert server.pool.pending == 0
+
+
+def test_batch(server):
+    batch = [request('metrics.wer', dict(ref='a b', hyp='a c'), id_=idx) for idx in range(4)]
+    batch.append(request('version', id_='x'))
+    del batch[1]['id']
+    status, response = dispatch(server, batch)
+    assert status == 200
+    assert [item['id'] for item in response] == [0, 2, 3, 'x']
+    assert [item['result'] for item in response] == [.5, .5, .5, __version__]
+
+    assert run(server.dispatch(json.dumps(batch[1:2]))) == (204, '')
+
+
+def test_busy(server):
+    server.pool.pending = server.pool.max_pending
+    status, response = dispatch(server, request('metrics.wer', dict(ref='a', hyp='a')))
+    assert status == 429
+    assert response['error']['code'] == SERVER_BUSY_CODE
+
+    status, response = dispatch(server, [request('metrics.wer', dict(ref='a', hyp='a')), request('version', id_=2)])
+    assert status == 200
+    assert [item['id'] for item in response] == [1, 2]
+    status, response = dispatch(server, [request('metrics.wer', dict(ref='a', hyp='a')),
+                                         request('metrics.wer', dict(ref='a', hyp='b'), id_=2)])
+    assert status == 429
+
+    # small calls are still answered
+    assert dispatch(server, request('version'))[0] == 200
+    assert dispatch(server, request('list.metrics'))[0] == 200
+
+
+def test_http(server):
+    async def post(port, path, body, method='POST'):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        head = '%s %s HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % (method, path, len(body))
+        writer.write(head.encode() + body)
+        writer.write(b'POST /api HTTP/1.1\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+        data = await reader.read()
+        writer.close()
+        return data.decode()
+
+    async def test():
+        http_server = await server.start('127.0.0.1', 0)
+        port = http_server.sockets[0].getsockname()[1]
+        try:
+            response = await post(port, '/api', json.dumps(request('version')).encode())
+            assert response.startswith('HTTP/1.1 200 OK\r\n')
+            assert '"result": "%s"' % (__version__,) in response
+            # the second, empty, request on the same connection
+            assert response.count('HTTP/1.1') == 2
+            assert 'HTTP/1.1 400 Bad Request' in response
+
+            assert (await post(port, '/', b'')).startswith('HTTP/1.1 404 ')
+            assert (await post(port, '/api', b'', 'GET')).startswith('HTTP/1.1 405 ')
+        finally:
+            http_server.close()
+            await http_server.wait_closed()
+
+    run(test())
+
+
+def test_http_bodies(server):
+    server.max_request_size = 1000
+    body = json.dumps(request('version')).encode()
+
+    async def send(data):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(data)
+        writer.write(b'POST /api HTTP/1.1\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+        response = await reader.read()
+        writer.close()
+        return response.decode()
+
+    async def test():
+        nonlocal port
+        http_server = await server.start('127.0.0.1', 0)
+        port = http_server.sockets[0].getsockname()[1]
+        try:
+            chunked = b'POST /api HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n' + \
+                b'%x;ext=1\r\n%s\r\n%x\r\n%s\r\n0\r\n\r\n' % (5, body[:5], len(body) - 5, body[5:])
+            response = await send(chunked)
+            assert response.startswith('HTTP/1.1 200 OK\r\n')
+            assert '"result": "%s"' % (__version__,) in response
+            # followed by the response to the second request
+            assert 'HTTP/1.1 400 Bad Request' in response
+
+            for head, status in [('Content-Length: -5', '400 '), ('Content-Length: abc', '400 '),
+                                 ('Content-Length: 1001', '413 '), ('Transfer-Encoding: gzip', '501 ')]:
+                response = await send(('POST /api HTTP/1.1\r\n%s\r\n\r\n' % (head,)).encode())
+                assert response.startswith('HTTP/1.1 %s' % (status,))
+                # the connection is closed
+                assert response.count('HTTP/1.1') == 1
+
+            response = await send(b'POST /api HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n3e9\r\n')
+            assert response.startswith('HTTP/1.1 413 ')
+            response = await send(b'POST /api HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\nxyz\r\n')
+            assert response.startswith('HTTP/1.1 400 ')
+        finally:
+            http_server.close()
+            await http_server.wait_closed()
+
+    port = None
+    run(test())
+
+
+def test_worker_lost(server):
+    # kill the worker process
+    server.pool._executor.submit(os._exit, 1)
+    status, response = dispatch(server, request('metrics.wer', dict(ref='a', hyp='a')))
+    assert status == 503
+    assert response['error']['code'] == WORKER_LOST_CODE
+    # the workers are restarted
+    assert dispatch(server, request('metrics.wer', dict(ref='a', hyp='b'))) == \
+        (200, dict(jsonrpc='2.0', result=1., id=1))
+    assert server.pool.pending == 0
+
+
+def test_pool_errors():
+    with pytest.raises(ValueError):
+        WorkerPool(0)
+    with pytest.raises(ValueError):
+        WorkerPool(1, 0)
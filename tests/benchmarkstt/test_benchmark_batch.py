@@ -0,0 +1,111 @@
+from benchmarkstt.benchmark import batch
+from benchmarkstt.cli import main_parser
+import shutil
+import os
+import pytest
+
+a_file = './resources/test/_data/a.txt'
+b_file = './resources/test/_data/b.txt'
+
+
+@pytest.fixture
+def corpus(tmpdir):
+    ref_dir = tmpdir.mkdir('ref')
+    hyp_dir = tmpdir.mkdir('hyp')
+    shutil.copy(a_file, str(ref_dir.join('1.txt')))
+    shutil.copy(b_file, str(hyp_dir.join('1.txt')))
+    shutil.copy(a_file, str(ref_dir.join('2.txt')))
+    shutil.copy(a_file, str(hyp_dir.join('2.txt')))
+    shutil.copy(a_file, str(ref_dir.join('only-ref.txt')))
+    return tmpdir
+
+
+def parse(argv):
+    return main_parser().parse_args(argv)
+
+
+def test_pairs_from_directories(corpus):
+    pairs = list(batch.pairs_from_directories(str(corpus.join('ref')), str(corpus.join('hyp'))))
+    assert [pair.title for pair in pairs] == ['1.txt', '2.txt']
+    assert pairs[0].hypothesis == os.path.join(str(corpus.join('hyp')), '1.txt')
+
+
+def test_read_manifest(corpus):
+    manifest = corpus.join('manifest.csv')
+    manifest.write('# reference, hypothesis, title\nref/1.txt, hyp/1.txt, first\nref/2.txt, hyp/2.txt\n')
+    pairs = list(batch.read_manifest(str(manifest)))
+    assert [pair.title for pair in pairs] == ['first', 'hyp/2.txt']
+    assert pairs[0].reference == os.path.join(str(corpus), 'ref', '1.txt')
+
+    manifest = corpus.join('manifest.jsonl')
+    manifest.write('{"reference": "ref/1.txt", "hypothesis": "hyp/1.txt"}\n\n'
+                   '{"reference": "ref/2.txt", "hypothesis": "hyp/2.txt", "title": "second"}\n')
+    pairs = list(batch.read_manifest(str(manifest)))
+    assert [pair.title for pair in pairs] == ['hyp/1.txt', 'second']
+
+
+@pytest.mark.parametrize('content,ext', [
+    ['ref/1.txt\n', 'csv'],
+    ['{"reference": "ref/1.txt"}\n', 'jsonl'],
+    ['not json\n', 'jsonl'],
+])
+def test_invalid_manifest(corpus, content, ext):
+    manifest = corpus.join('manifest.' + ext)
+    manifest.write(content)
+    with pytest.raises(batch.ManifestError):
+        list(batch.read_manifest(str(manifest)))
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_run(corpus, jobs):
+    args = parse(['--reference-dir', str(corpus.join('ref')), '--hypothesis-dir', str(corpus.join('hyp')),
+                  '--wer', '--diffcounts', '--lowercase'])
+    pairs = list(batch.pairs_from_directories(args.reference_dir, args.hypothesis_dir))
+    results = {pair.title: (result, exception)
+               for pair, result, counts, exception in batch.run(pairs, args, jobs)}
+    assert results['1.txt'] == ({'wer': 0.0, 'diffcounts': {'equal': 7, 'replace': 0, 'insert': 0, 'delete': 0}},
+                                None)
+    assert results['2.txt'][0]['wer'] == 0.0
+
+
+def test_run_errors(corpus):
+    args = parse(['--reference-dir', '.', '--hypothesis-dir', '.', '--wer'])
+    pairs = [batch.Pair('missing', str(corpus.join('doesnotexist.txt')), b_file),
+             batch.Pair('ok', a_file, b_file)]
+    results = list(batch.run(pairs, args, 1))
+    assert results[0][0].title == 'missing'
+    assert type(results[0][3]) is FileNotFoundError
+    assert results[1][1] == {'wer': 1 / 7}
+
+
+def test_main(corpus, capsys):
+    manifest = corpus.join('manifest.csv')
+    manifest.write('ref/1.txt, hyp/1.txt, first\n')
+    args = parse(['--manifest', str(manifest), '--jobs', '1', '--wer', '-o', 'json'])
+    batch.main(main_parser(), args)
+    assert capsys.readouterr().out == '[\n\t{"title": "first", "result": {"wer": %r}}\n]\n' % (1 / 7,)
+
+
+def test_main_aggregate(corpus, capsys):
+    args = parse(['--reference-dir', str(corpus.join('ref')), '--hypothesis-dir', str(corpus.join('hyp')),
+                  '--jobs', '1', '--aggregate', 'strict', 'myers', '-o', 'json'])
+    batch.main(main_parser(), args)
+    out = capsys.readouterr().out
+    assert out.startswith('[\n\t{"title": "aggregate", "result": {"pairs": 2, "micro": %r, "macro": %r, ' %
+                          (1 / 14, 1 / 14))
+
+
+@pytest.mark.parametrize('argv', [
+    ['--manifest', 'x.csv'],
+    ['--manifest', 'x.csv', '--aggregate', 'levenshtein'],
+    ['--manifest', 'x.csv', '--aggregate', 'strict', 'myers', 'toomany'],
+    ['--manifest', 'x.csv', '-r', 'a.txt', '--wer'],
+    ['--reference-dir', '.', '--wer'],
+    ['--manifest', 'doesnotexist.csv', '--wer'],
+    ['--manifest', 'x.csv', '--jobs', '0', '--wer'],
+])
+def test_main_errors(argv):
+    parser = main_parser()
+    with pytest.raises(SystemExit) as err:
+        batch.main(parser, parser.parse_args(argv))
+    assert err.value.code == 2
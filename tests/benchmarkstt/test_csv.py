@@ -171,3 +171,29 @@ def test_debugger(capsys):
     with open('./resources/test/_data/csv.debugging.output.txt', encoding='UTF-8') as f:
         expected_debug = f.read()
     assert capsys.readouterr().out == expected_debug
+
+
+class SemicolonDialect(csv.Dialect):
+    delimiter = ';'
+
+
+def parse(method, text, dialect, chunk_size):
+    reader = csv.Reader(StringIO(text), dialect)
+    reader.chunk_size = chunk_size
+    try:
+        return [(list(line), line.lineno) for line in getattr(reader, method)()]
+    except csv.CSVParserError as e:
+        return type(e), e.message, e.line, e.char, e.index
+
+
+@pytest.mark.parametrize('dialect', [csv.DefaultDialect, csv.WhitespaceDialect, SemicolonDialect])
+@pytest.mark.parametrize('seed', range(5))
+def test_chunked_same_as_chars(dialect, seed):
+    import random
+    rnd = random.Random(seed)
+    chars = ['a', 'b', ' ', '\t', ',', ';', '"', '""', '#', '\n', '\r\n', 'xyz']
+    for _ in range(300):
+        text = ''.join(rnd.choice(chars) for _ in range(rnd.randint(0, 40)))
+        expected = parse('_iter_chars', text, dialect, 1)
+        for chunk_size in (1, 3, 65536):
+            assert parse('_iter_chunks', text, dialect, chunk_size) == expected, text
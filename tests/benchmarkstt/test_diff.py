@@ -1,8 +1,40 @@
 from benchmarkstt import diff
+from benchmarkstt.diff.core import RatcliffObershelp, Myers, Anchored, Hirschberg, TimeBanded, Levenshtein, \
+    _unique_anchors, _bit_parallel_row, _levenshtein_row, _bit_parallel_matches, _levenshtein_matches
+from benchmarkstt.metrics.core import get_opcode_counts
+import editdistance
 import pytest
+import random
 
 differs = [differ.cls for differ in diff.factory]
 differs_decorator = pytest.mark.parametrize('differ', differs)
+# differs that maximize the amount of equal items rather than minimize the amount of edits
+lcs_differs_decorator = pytest.mark.parametrize('differ', [differ for differ in differs
+                                                           if differ not in (Hirschberg, Levenshtein, TimeBanded)])
+
+
+def assert_valid_opcodes(a, b, opcodes):
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == 'equal':
+            assert a[i1:i2] == b[j1:j2]
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+
+
+def count_equal(opcodes):
+    return sum(i2 - i1 for tag, i1, i2, j1, j2 in opcodes if tag == 'equal')
+
+
+def lcs_length(a, b):
+    row = [0] * (len(b) + 1)
+    for x in a:
+        prev = row
+        row = [0]
+        for idx, y in enumerate(b):
+            row.append(prev[idx] + 1 if x == y else max(prev[idx + 1], row[idx]))
+    return row[-1]
 
 
 @differs_decorator
@@ -17,6 +49,15 @@ def test_one_insert(differ):
     ref = "a b c d e f"
     hyp = "a b d e kfmod fgdjn idf giudfg diuf dufg idgiudgd"
     sm = differ(ref, hyp)
+    opcodes = list(sm.get_opcodes())
+    assert_valid_opcodes(ref, hyp, opcodes)
+    assert count_equal(opcodes) == 9
+
+
+def test_one_insert_ratcliffobershelp():
+    ref = "a b c d e f"
+    hyp = "a b d e kfmod fgdjn idf giudfg diuf dufg idgiudgd"
+    sm = RatcliffObershelp(ref, hyp)
     assert list(sm.get_opcodes()) == [('equal', 0, 3, 0, 3),
                                       ('delete', 3, 5, 3, 3),
                                       ('equal', 5, 10, 3, 8),
@@ -31,3 +72,144 @@ def test_one_delete(differ):
     assert list(sm.get_opcodes()) == [('equal', 0, 40, 0, 40),
                                       ('delete', 40, 41, 40, 40),
                                       ('equal', 41, 81, 40, 80)]
+
+
+@lcs_differs_decorator
+def test_words(differ):
+    ref = 'the cat sat on the mat'.split()
+    hyp = 'the the cat sat on mat today'.split()
+    opcodes = list(differ(ref, hyp).get_opcodes())
+    assert_valid_opcodes(ref, hyp, opcodes)
+    assert count_equal(opcodes) == 5
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_myers_is_minimal(seed):
+    rnd = random.Random(seed)
+    for _ in range(200):
+        a = [rnd.choice('abcd') for _ in range(rnd.randint(0, 20))]
+        b = [rnd.choice('abcd') for _ in range(rnd.randint(0, 20))]
+        opcodes = Myers(a, b).get_opcodes()
+        assert_valid_opcodes(a, b, opcodes)
+        assert count_equal(opcodes) == lcs_length(a, b)
+
+
+def test_myers_shifts_left():
+    assert Myers('aab', 'ab').get_opcodes() == [('delete', 0, 1, 0, 0),
+                                                ('equal', 1, 3, 0, 2)]
+    assert Myers('x y', 'x y y').get_opcodes() == [('equal', 0, 1, 0, 1),
+                                                   ('insert', 1, 1, 1, 3),
+                                                   ('equal', 1, 3, 3, 5)]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_anchored(seed):
+    rnd = random.Random(seed)
+    vocabulary = ['uh', 'the', 'a'] * 20 + ['w%d' % (idx,) for idx in range(300)]
+    for _ in range(50):
+        a = [rnd.choice(vocabulary) for _ in range(rnd.randint(0, 200))]
+        b = [word for word in a if rnd.random() > .1]
+        b = [rnd.choice(vocabulary) if rnd.random() < .1 else word for word in b]
+        opcodes = Anchored(a, b).get_opcodes()
+        assert_valid_opcodes(a, b, opcodes)
+        assert count_equal(opcodes) <= lcs_length(a, b)
+        assert Anchored(a, b, differ_class='ratcliffobershelp').get_opcodes() is not None
+
+
+def test_anchored_segments():
+    a = 'uh the x y uh the uh v z the the'.split()
+    b = 'the uh x y the the uh v z uh the'.split()
+    matches, segments = Anchored(a, b)._find_segments()
+    assert sorted(matches) == [(2, 2, 1), (3, 3, 1), (5, 5, 2), (7, 7, 1), (8, 8, 1), (10, 10, 1)]
+    assert sorted(segments) == [(0, 2, 0, 2), (4, 5, 4, 5), (9, 10, 9, 10)]
+
+
+def test_anchored_ignores_isolated_matches():
+    a = 'q a b c'.split()
+    b = 'a b c x q'.split()
+    assert _unique_anchors(a, 0, len(a), b, 0, len(b)) == [(1, 0), (2, 1), (3, 2)]
+
+
+def test_anchored_parallel():
+    rnd = random.Random(1)
+    vocabulary = ['uh', 'the'] * 50 + ['w%d' % (idx,) for idx in range(2000)]
+    a = [rnd.choice(vocabulary) for _ in range(2000)]
+    b = [rnd.choice(vocabulary) if rnd.random() < .2 else word for word in a]
+    assert Anchored(a, b, jobs=2).get_opcodes() == Anchored(a, b).get_opcodes()
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_hirschberg_is_minimal(seed):
+    rnd = random.Random(seed)
+    for _ in range(100):
+        a = [rnd.choice('abcd') for _ in range(rnd.randint(0, 120))]
+        b = [rnd.choice('abcd') for _ in range(rnd.randint(0, 120))]
+        opcodes = Hirschberg(a, b).get_opcodes()
+        assert_valid_opcodes(a, b, opcodes)
+        counts = get_opcode_counts(opcodes)
+        assert counts.replace + counts.insert + counts.delete == editdistance.eval(a, b)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_bit_parallel(seed):
+    rnd = random.Random(seed)
+    for _ in range(100):
+        a = [rnd.choice('abcd') for _ in range(rnd.randint(0, 80))]
+        b = [rnd.choice('abcd') for _ in range(rnd.randint(0, 80))]
+        assert _bit_parallel_row(a, b) == _levenshtein_row(a, b)
+        assert _bit_parallel_matches(a, b) == _levenshtein_matches(a, b)
+
+
+@pytest.mark.parametrize('matrix_size', [4, None])
+@pytest.mark.parametrize('seed', range(5))
+def test_levenshtein_is_minimal(seed, matrix_size, monkeypatch):
+    if matrix_size is not None:
+        monkeypatch.setattr(Levenshtein, 'MATRIX_SIZE', matrix_size)
+    rnd = random.Random(seed)
+    for _ in range(100):
+        a = [rnd.choice('abcd') for _ in range(rnd.randint(0, 120))]
+        b = [rnd.choice('abcd') for _ in range(rnd.randint(0, 120))]
+        differ = Levenshtein(a, b)
+        opcodes = differ.get_opcodes()
+        assert_valid_opcodes(a, b, opcodes)
+        counts = get_opcode_counts(opcodes)
+        assert counts.replace + counts.insert + counts.delete == differ.distance == editdistance.eval(a, b)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_time_banded(seed):
+    rnd = random.Random(seed)
+    for _ in range(100):
+        a = [rnd.choice('abcd') for _ in range(rnd.randint(0, 60))]
+        b = [rnd.choice('abcd') for _ in range(rnd.randint(0, 60))]
+        a_times = sorted(rnd.uniform(0, 30) for _ in a)
+        b_times = sorted(rnd.uniform(0, 30) for _ in b)
+        band = rnd.choice([0, 1, 5])
+        opcodes = TimeBanded(a, b, a_times, b_times, band).get_opcodes()
+        assert_valid_opcodes(a, b, opcodes)
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag != 'insert' and tag != 'delete':
+                # only items within the band are aligned
+                for i, j in zip(range(i1, i2), range(j1, j2)):
+                    assert abs(a_times[i] - b_times[j]) <= band
+        counts = get_opcode_counts(opcodes)
+        assert counts.replace + counts.insert + counts.delete >= editdistance.eval(a, b)
+
+        # a band wider than the transcripts gives a minimal alignment
+        opcodes = TimeBanded(a, b, a_times, b_times, 30).get_opcodes()
+        counts = get_opcode_counts(opcodes)
+        assert counts.replace + counts.insert + counts.delete == editdistance.eval(a, b)
+
+
+def test_time_banded_far_apart():
+    a = 'a b c'.split()
+    b = 'a b c'.split()
+    assert TimeBanded(a, b, [0, 1, 2], [0, 1, 2], 0).get_opcodes() == [('equal', 0, 3, 0, 3)]
+    assert TimeBanded(a, b, [0, 1, 2], [10, 11, 12], 5).get_opcodes() == [
+        ('delete', 0, 3, 0, 0), ('insert', 3, 3, 0, 3)]
+    assert TimeBanded(a, b, [10, 11, 12], [0, 1, 2], 5).get_opcodes() == [
+        ('insert', 0, 0, 0, 3), ('delete', 0, 3, 3, 3)]
+    assert TimeBanded(a, b, [0, 1, 2], [0, 1, 12], 5).get_opcodes() == [
+        ('equal', 0, 2, 0, 2), ('delete', 2, 3, 2, 2), ('insert', 3, 3, 2, 3)]
+    # without timings
+    assert TimeBanded(a, b).get_opcodes() == [('equal', 0, 3, 0, 3)]
@@ -1,6 +1,7 @@
 import benchmarkstt.diff.formatter as formatter
 import pytest
 from collections import OrderedDict
+import json
 
 a = 'ABCDEFGHJKLMN'
 b = 'ABBCDEFHHIJKLM'
@@ -52,3 +53,7 @@ def test_dialect_exceptions():
 
 def test_default_dialect():
     assert formatter.DiffFormatter().diff(a, b) == formatter.format_diff(a, b)
+
+
+def test_json():
+    assert json.loads(formatter.format_diff(a, b, dialect='json')) == formatter.format_diff(a, b, dialect='list')
@@ -1,7 +1,9 @@
 from benchmarkstt.__meta__ import __version__
+from benchmarkstt.api.jsonrpc import WORKER_LOST_CODE
 from collections import OrderedDict
 import pytest
 import json
+import os
 import sys
 
 pytestmark = pytest.mark.skipif(sys.version_info < (3, 6), reason="requires python3.6 or higher")
@@ -153,3 +155,160 @@ def test_error_calls(method, params, code, result, client):
         assert response.status_code == code
     if result is not None:
         assert json.loads(response.data) == expected_response
+
+
+def test_batch(client):
+    batch = [
+        {"jsonrpc": "2.0", "id": 1, "method": "metrics.wer", "params": {"ref": "a b", "hyp": "a c"}},
+        {"jsonrpc": "2.0", "method": "metrics.wer", "params": {"ref": "a b", "hyp": "a c"}},
+        {"jsonrpc": "2.0", "id": "x", "method": "version"},
+        {"jsonrpc": "2.0", "id": 3, "method": "metrics.wer", "params": {"hyp": "a c", "ref": "a b"}},
+        {"jsonrpc": "2.0", "id": 4, "method": "doesntexistmethod"},
+        1,
+    ]
+    response = client.post('/api', data=json.dumps(batch))
+    assert response.status_code == 200
+    result = json.loads(response.data)
+    assert [item['id'] for item in result] == [1, "x", 3, 4, None]
+    assert [item.get('result') for item in result[:3]] == [.5, __version__, .5]
+    assert result[3]['error']['code'] == -32601
+    assert result[4]['error']['code'] == -32600
+
+    response = client.post('/api', data=json.dumps(batch[1:2]))
+    assert response.status_code == 204
+
+    assert client.post('/api', data='[]').status_code == 400
+    assert client.post('/api', data='[{').status_code == 400
+
+
+def test_cache_stats(client):
+    def call(method, params):
+        request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        return json.loads(client.post('/api', data=json.dumps(request)).data)['result']
+
+    params = dict(benchmarkparams, config=benchmarkparams['config'] + '\nUnidecode')
+    stats = call('cache.stats', {})
+    assert call('benchmark.wer', params) == {"wer": 0.2}
+    assert call('benchmark.diffcounts', params)['diffcounts']['equal'] == 4
+    result = call('cache.stats', {})
+    assert result['hits'] == stats['hits'] + 1
+    assert result['misses'] == stats['misses'] + 1
+    assert result['entries'] >= 1
+    assert result['pid'] == os.getpid()
+
+
+def test_batch_pool(monkeypatch):
+    from benchmarkstt.api import cli
+    from concurrent.futures import ThreadPoolExecutor
+    import gc
+
+    pools = []
+
+    class Pool(ThreadPoolExecutor):
+        def __init__(self, workers):
+            super().__init__(workers)
+            self.methods = []
+            self.stopped = False
+            pools.append(self)
+
+        def submit(self, fn, call):
+            self.methods.append(call['method'])
+            return super().submit(fn, call)
+
+        def shutdown(self, *args, **kwargs):
+            self.stopped = True
+            super().shutdown(*args, **kwargs)
+
+    monkeypatch.setattr(cli, 'ProcessPoolExecutor', Pool)
+    app = cli.create_app()
+    client = app.test_client()
+
+    def call(method, id_, **params):
+        return {"jsonrpc": "2.0", "id": id_, "method": method, "params": params}
+
+    # cheap calls are made directly
+    batch = [call('version', 1), call('help', 2), call('list.metrics', 3), call('metrics.wer', 4, ref='a', hyp='b')]
+    response = client.post('/api', data=json.dumps(batch))
+    assert [item['id'] for item in json.loads(response.data)] == [1, 2, 3, 4]
+    assert pools == []
+
+    batch = [call('version', 1), call('metrics.wer', 2, ref='a', hyp='b'), call('metrics.cer', 3, ref='a', hyp='b')]
+    response = client.post('/api', data=json.dumps(batch))
+    assert [item['result'] for item in json.loads(response.data)] == [__version__, 1., 1.]
+    assert len(pools) == 1
+    assert pools[0].methods == ['metrics.wer', 'metrics.cer']
+
+    del app, client
+    gc.collect()
+    assert pools[0].stopped
+
+
+def test_batch_worker_lost(monkeypatch):
+    from benchmarkstt.api import cli
+    from concurrent.futures import ProcessPoolExecutor
+
+    pools = []
+
+    class Pool(ProcessPoolExecutor):
+        def __init__(self, workers):
+            super().__init__(1)
+            pools.append(self)
+
+    monkeypatch.setattr(cli, 'ProcessPoolExecutor', Pool)
+    app = cli.create_app()
+    client = app.test_client()
+    batch = [{"jsonrpc": "2.0", "id": idx, "method": "metrics.wer", "params": {"ref": "a", "hyp": "b" * idx}}
+             for idx in range(1, 3)]
+
+    def post():
+        response = client.post('/api', data=json.dumps(batch))
+        assert response.status_code == 200
+        return json.loads(response.data)
+
+    assert [item['result'] for item in post()] == [1., 1.]
+    # kill the worker process
+    future = pools[0].submit(os._exit, 1)
+    with pytest.raises(Exception):
+        future.result()
+    result = post()
+    assert [item['id'] for item in result] == [1, 2]
+    assert [item['error']['code'] for item in result] == [WORKER_LOST_CODE] * 2
+    # the workers are restarted
+    assert [item['result'] for item in post()] == [1., 1.]
+    assert len(pools) == 2
+    for pool in pools:
+        pool.shutdown()
+
+
+def test_batch_pool_threads(monkeypatch):
+    from benchmarkstt.api import cli
+    from concurrent.futures import ThreadPoolExecutor
+    import threading
+    import time
+
+    pools = []
+
+    class Pool(ThreadPoolExecutor):
+        def __init__(self, workers):
+            # give the other threads the chance to create a pool as well
+            time.sleep(.05)
+            super().__init__(workers)
+            pools.append(self)
+
+    monkeypatch.setattr(cli, 'ProcessPoolExecutor', Pool)
+    app = cli.create_app()
+    batch = [{"jsonrpc": "2.0", "id": idx, "method": "metrics.wer", "params": {"ref": "a", "hyp": "b" * idx}}
+             for idx in range(1, 3)]
+    results = []
+
+    def post():
+        results.append(app.test_client().post('/api', data=json.dumps(batch)).status_code)
+
+    threads = [threading.Thread(target=post) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [200] * 4
+    assert len(pools) == 1
+    pools[0].shutdown()
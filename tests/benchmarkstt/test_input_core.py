@@ -1,6 +1,9 @@
-from benchmarkstt.input.core import PlainText, File
+from benchmarkstt.input.core import PlainText, File, AWS, Kaldi
+from benchmarkstt.normalization.core import Replace
 from benchmarkstt.schema import Item, Schema
 import pytest
+import json
+import io
 
 candide_file = './resources/test/_data/candide.txt'
 with open(candide_file) as f:
@@ -118,3 +121,51 @@ def test_exceptions():
     with pytest.raises(ValueError) as e:
         File('unknownextension.thisisntknowm')
     assert 'thisisntknowm' in str(e)
+
+
+aws_file = './resources/transcripts/aws.json'
+kaldi_file = './resources/transcripts/kaldi-bbc.json'
+
+
+def test_aws():
+    with open(aws_file) as f:
+        transcript = json.load(f)['results']['transcripts'][0]['transcript']
+    items = list(File(aws_file, 'aws'))
+    # punctuation is added to the preceding word
+    assert [item['item'] for item in items] == transcript.split()
+    assert items[0] == {"item": "To", "type": "word", "@raw": "To", "start": 0.54, "end": 0.67, "confidence": 0.9932}
+    assert items[9]['item'] == 'matter,'
+    with open(aws_file) as f:
+        assert list(AWS(f.read())) == items
+
+
+def test_kaldi():
+    expected = [
+        {"item": "To", "type": "word", "@raw": "To", "start": 0.52, "end": 0.66, "confidence": 1.0},
+        {"item": "administer.", "type": "word", "@raw": "administer.", "start": 0.66, "end": 1.27, "confidence": 1.0},
+    ]
+    assert list(File(kaldi_file, 'kaldi')) == expected
+    assert list(Kaldi('{"words": [{"word": "to", "start": 1, "end": 2}]}')) == [
+        {"item": "to", "type": "word", "@raw": "to", "start": 1.0, "end": 2.0, "confidence": None}]
+    assert [item['item'] for item in Kaldi('{"words": [{"punct": "To,"}, {"word": "be", "punct": null}]}')] == \
+        ['To,', 'be']
+
+    normalized = list(Kaldi(io.StringIO('{"words": [{"word": "A-B", "start": 1, "end": 2, "confidence": 0.5}, '
+                                        '{"word": "-", "start": 2, "end": 3, "confidence": 0.5}]}'),
+                            normalizer=Replace('-', ' ')))
+    assert normalized == [
+        {"item": "A", "type": "word", "@raw": "A-B", "start": 1.0, "end": 2.0, "confidence": 0.5},
+        {"item": "B", "type": "word", "@raw": "A-B", "start": 1.0, "end": 2.0, "confidence": 0.5},
+    ]
+
+
+@pytest.mark.parametrize('cls,text', [
+    [AWS, '{"results": {}}'],
+    [AWS, '{"results": []}'],
+    [Kaldi, '{"words": {}}'],
+    [Kaldi, '{"words": [{"word": "a"}'],
+    [Kaldi, ''],
+])
+def test_timed_words_errors(cls, text):
+    with pytest.raises(ValueError):
+        list(cls(text))
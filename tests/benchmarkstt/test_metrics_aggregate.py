@@ -0,0 +1,70 @@
+from benchmarkstt.metrics.aggregate import WERAggregate
+from benchmarkstt.metrics.core import OpcodeCounts, DiffCounts, WER
+from benchmarkstt.input.core import PlainText
+import pickle
+import pytest
+
+pairs = [
+    ['aa bb cc dd', 'aa bb cc dd'],
+    ['aa bb cc dd', 'aa bb ee dd'],
+    ['aa bb cc dd', 'aa aa bb cc dd dd'],
+    ['aa', 'bb aa cc'],
+    ['a b c d e f g h i j', 'a b e d c f g h i j'],
+]
+
+
+def counts(ref, hyp):
+    return DiffCounts().compare(PlainText(ref), PlainText(hyp))
+
+
+@pytest.mark.parametrize('mode', [WER.MODE_STRICT, WER.MODE_HUNT])
+def test_micro_macro(mode):
+    aggregate = WERAggregate(mode)
+    wers = []
+    for ref, hyp in pairs:
+        wer = aggregate.add(counts(ref, hyp))
+        assert wer == WER(mode).compare(PlainText(ref), PlainText(hyp))
+        wers.append(wer)
+
+    assert aggregate.pairs == len(pairs)
+    assert aggregate.macro == pytest.approx(sum(wers) / len(wers))
+    assert aggregate.percentile(50) == pytest.approx(sorted(wers)[2], abs=.001)
+    assert aggregate.percentile(100) == pytest.approx(max(wers), abs=.001)
+    assert aggregate.percentile(0) == pytest.approx(min(wers), abs=.001)
+
+    total = aggregate.counts
+    assert total.equal + total.replace + total.delete == sum(len(ref.split()) for ref, hyp in pairs)
+    assert aggregate.micro == WER(mode).from_counts(total)
+
+
+def test_merge():
+    full = WERAggregate()
+    parts = [WERAggregate(), WERAggregate()]
+    for idx, (ref, hyp) in enumerate(pairs):
+        full.add(counts(ref, hyp))
+        parts[idx % 2].add(counts(ref, hyp)._asdict())
+
+    # partial aggregates may come from another process
+    merged = pickle.loads(pickle.dumps(parts[0])).merge(parts[1])
+    assert merged.result() == full.result()
+
+    with pytest.raises(ValueError):
+        merged.merge(WERAggregate(WER.MODE_HUNT))
+
+
+def test_empty():
+    aggregate = WERAggregate()
+    assert aggregate.micro is None
+    assert aggregate.macro is None
+    assert aggregate.percentile(50) is None
+    assert aggregate.counts == OpcodeCounts(0, 0, 0, 0)
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        WERAggregate(WER.MODE_LEVENSHTEIN)
+
+    aggregate = WERAggregate()
+    aggregate.add(OpcodeCounts(1, 0, 0, 0))
+    with pytest.raises(ValueError):
+        aggregate.percentile(101)
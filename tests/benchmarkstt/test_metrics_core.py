@@ -1,10 +1,17 @@
-from benchmarkstt.metrics.core import DiffCounts, WER
-from benchmarkstt.metrics.core import OpcodeCounts
+from benchmarkstt.metrics.core import DiffCounts, WER, WindowedWER, TimeWindows, word_times, CER, code_points, \
+    word_offsets, get_character_opcodes, IncrementalWER
+from benchmarkstt.metrics.core import OpcodeCounts, EvaluationContext, WordDiffs, intern_tokens, traversible
+from benchmarkstt.diff.core import RatcliffObershelp
 from benchmarkstt.input.core import PlainText
+from benchmarkstt.schema import ColumnarSchema
+import editdistance
+import io
+import json
 import pytest
+import random
 
 
-@pytest.mark.parametrize('a,b,exp', [
+diffcounts_cases = [
     # ('equal', 'replace', 'insert', 'delete')
     ['Hello Test', 'Hello kind Test', (2, 0, 1, 0)],
     ['aaa aa bb', 'aaa bb', (2, 0, 0, 1)],
@@ -17,9 +24,21 @@ import pytest
     ['0 1 2 3 4', '0 1 2 3 4', (5, 0, 0, 0)],
     ['a b c d e f', 'a b d e kfmod fgdjn idf giudfg diuf dufg idgiudgd', (4, 1, 6, 1)],
     ['HELLO CRUEL WORLD OF MINE', 'GOODBYE WORLD OF MINE', (3, 1, 0, 1)],
-])
-def test_diffcounts(a, b, exp):
-    assert DiffCounts().compare(PlainText(a), PlainText(b)) == OpcodeCounts(*exp)
+]
+
+
+@pytest.mark.parametrize('differ_class', [None, 'ratcliffobershelp', 'myers', 'anchored'])
+@pytest.mark.parametrize('a,b,exp', diffcounts_cases)
+def test_diffcounts(a, b, exp, differ_class):
+    assert DiffCounts(differ_class=differ_class).compare(PlainText(a), PlainText(b)) == OpcodeCounts(*exp)
+
+
+@pytest.mark.parametrize('differ_class', ['hirschberg', 'levenshtein'])
+@pytest.mark.parametrize('a,b,exp', diffcounts_cases)
+def test_diffcounts_minimal(a, b, exp, differ_class):
+    counts = DiffCounts(differ_class=differ_class).compare(PlainText(a), PlainText(b))
+    assert counts.equal + counts.replace + counts.delete == len(a.split())
+    assert counts.replace + counts.insert + counts.delete == editdistance.eval(a.split(), b.split())
 
 
 @pytest.mark.parametrize('a,b,exp', [
@@ -39,3 +58,205 @@ def test_wer(a, b, exp):
     assert WER(mode=WER.MODE_STRICT).compare(PlainText(a), PlainText(b)) == wer_strict
     assert WER(mode=WER.MODE_HUNT).compare(PlainText(a), PlainText(b)) == wer_hunt
     assert WER(mode=WER.MODE_LEVENSHTEIN).compare(PlainText(a), PlainText(b)) == wer_levenshtein
+    assert WER(mode=WER.MODE_LEVENSHTEIN, differ_class='levenshtein').compare(PlainText(a), PlainText(b)) == \
+        wer_levenshtein
+
+
+@pytest.mark.parametrize('a,b,exp', [
+    # (cer_strict, cer_hunt, cer_levenshtein)
+    ['abc de', 'abc de', (0, 0, 0)],
+    ['abc de', 'abd de', (1 / 6, 1 / 6, 1 / 6)],
+    ['a b', 'a b c', (2 / 3, 1 / 3, 2 / 3)],
+    ['hello world', 'hello', (6 / 11, 3 / 11, 6 / 11)],
+    ['', 'x y', (1, 1, 1)],
+    ['文字 認識', '文学 認識', (1 / 5, 1 / 5, 1 / 5)],
+])
+def test_cer(a, b, exp):
+    cer_strict, cer_hunt, cer_levenshtein = exp
+
+    assert CER(mode=WER.MODE_STRICT).compare(PlainText(a), PlainText(b)) == cer_strict
+    assert CER(mode=WER.MODE_HUNT).compare(PlainText(a), PlainText(b)) == cer_hunt
+    assert CER(mode=WER.MODE_LEVENSHTEIN).compare(PlainText(a), PlainText(b)) == cer_levenshtein
+
+
+@pytest.mark.parametrize('differ_class', ['ratcliffobershelp', 'levenshtein'])
+@pytest.mark.parametrize('a,b,exp', diffcounts_cases)
+def test_character_opcodes(a, b, exp, differ_class):
+    a = a.split()
+    b = b.split()
+    text_a = ' '.join(a)
+    text_b = ' '.join(b)
+    assert list(code_points(a)) == [ord(char) for char in text_a]
+    assert [text_a[start:end] for start, end in zip(word_offsets(a), word_offsets(a)[1:])] == \
+        [word + ' ' for word in a[:-1]] + a[-1:]
+
+    context = EvaluationContext(PlainText(text_a), PlainText(text_b))
+    i = j = 0
+    for tag, i1, i2, j1, j2 in get_character_opcodes(a, b, context.get_opcodes(differ_class)):
+        assert (i1, j1) == (i, j)
+        if tag == 'equal':
+            assert text_a[i1:i2] == text_b[j1:j2]
+        i, j = i2, j2
+    assert (i, j) == (len(text_a), len(text_b))
+
+
+def test_incremental_wer():
+    wer = IncrementalWER()
+    with pytest.raises(ValueError):
+        wer.feed(['a'])
+    wer.reset(PlainText('a b c d'))
+    wer.feed(['a', 'b'])
+    assert wer.get_opcode_counts() == OpcodeCounts(2, 0, 0, 0)
+    assert wer.get_wer() == 0
+    assert wer.get_opcode_counts(complete=True) == OpcodeCounts(2, 0, 0, 2)
+    wer.feed(PlainText('x d'))
+    assert wer.get_opcode_counts() == OpcodeCounts(3, 1, 0, 0)
+    assert wer.get_wer(complete=True) == .25
+
+    assert IncrementalWER('hunt').compare(PlainText('a b c d'), PlainText('a b')) == .25
+    with pytest.raises(ValueError):
+        IncrementalWER(band=0)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_incremental_wer_feed(seed):
+    rnd = random.Random(seed)
+    for _ in range(100):
+        a = [rnd.choice('abcd') for _ in range(rnd.randint(0, 40))]
+        b = [rnd.choice('abcd') for _ in range(rnd.randint(0, 40))]
+        band = rnd.choice([1, 3, 40])
+        wer = IncrementalWER(band=band)
+        wer.reset(PlainText(' '.join(a)))
+        fed = 0
+        while fed < len(b):
+            size = rnd.randint(1, 5)
+            wer.feed(b[fed:fed + size])
+            fed = min(len(b), fed + size)
+            counts = wer.get_opcode_counts()
+            assert counts.equal + counts.replace + counts.insert == fed
+        counts = wer.get_opcode_counts(complete=True)
+        assert counts.equal + counts.replace + counts.delete == len(a)
+        assert counts.equal + counts.replace + counts.insert == len(b)
+        if band == 40:
+            assert counts.replace + counts.insert + counts.delete == editdistance.eval(a, b)
+
+
+@pytest.mark.parametrize('schema_class', [list, ColumnarSchema])
+def test_intern_tokens(schema_class):
+    interned = intern_tokens(schema_class(PlainText('a b a c')), schema_class(PlainText('c a d')))
+    assert list(interned.ref) == [0, 1, 0, 2]
+    assert list(interned.hyp) == [2, 0, 3]
+    assert interned.vocabulary == {'a': 0, 'b': 1, 'c': 2, 'd': 3}
+
+
+def test_evaluation_context_aligns_once():
+    aligned = []
+
+    class CountingDiffer(RatcliffObershelp):
+        def get_opcodes(self):
+            aligned.append(True)
+            return super().get_opcodes()
+
+    context = EvaluationContext(list(PlainText('aa bb cc dd')), list(PlainText('aa bb ee dd')))
+    assert WER(differ_class=CountingDiffer).evaluate(context) == .25
+    assert DiffCounts(differ_class=CountingDiffer).evaluate(context) == OpcodeCounts(3, 1, 0, 0)
+    WordDiffs(dialect='list', differ_class=CountingDiffer).evaluate(context)
+    assert len(aligned) == 1
+    assert context.interned is context.interned
+
+
+def test_columnar_schema():
+    a = 'a b c d e f'
+    b = 'a b d e kfmod fgdjn idf giudfg diuf dufg idgiudgd'
+    context = EvaluationContext(list(PlainText(a)), list(PlainText(b)))
+    columnar = EvaluationContext(ColumnarSchema(PlainText(a)), ColumnarSchema(PlainText(b)))
+    assert list(traversible(columnar.ref)) == a.split()
+    assert columnar.interned == context.interned
+    for metric in (WER(), DiffCounts(), WordDiffs(dialect='list')):
+        assert metric.evaluate(columnar) == metric.evaluate(context)
+
+
+def test_worddiffs_writer():
+    context = EvaluationContext(list(PlainText('a b c')), list(PlainText('a x c d')))
+    assert WordDiffs(dialect='list').writer(context) is None
+    stream = io.StringIO()
+    WordDiffs(dialect='json').writer(context)(stream)
+    assert stream.getvalue() == WordDiffs(dialect='json').evaluate(context)
+    assert json.loads(stream.getvalue()) == WordDiffs(dialect='list').evaluate(context)
+
+
+def timed(text, times):
+    return [dict(item=word, start=time) for word, time in zip(text.split(), times)]
+
+
+@pytest.mark.parametrize('schema_class', [list, ColumnarSchema])
+def test_windowed_wer(schema_class):
+    ref = schema_class(timed('a b c d e f', [0, 1, 10.5, 11, 12, 35]))
+    hyp = schema_class(PlainText('x a b d e e f g'))
+    result = WindowedWER(10).compare(ref, hyp)
+    assert [dict(row) for row in result] == [
+        dict(start=0., end=10., wer=.5, equal=2, replace=0, insert=1, delete=0),
+        dict(start=10., end=20., wer=2 / 3, equal=2, replace=0, insert=1, delete=1),
+        dict(start=30., end=40., wer=1, equal=1, replace=0, insert=1, delete=0),
+    ]
+
+    result = WindowedWER('0,10.5', 'hunt').compare(ref, hyp)
+    assert [(row['start'], row['end'], row['wer']) for row in result] == [(0, 10.5, .25), (10.5, None, .375)]
+
+
+@pytest.mark.parametrize('a,b,exp', diffcounts_cases)
+def test_windowed_wer_totals(a, b, exp):
+    ref = timed(a, range(100))
+    context = EvaluationContext(ref, list(PlainText(b)))
+    result = WindowedWER(3).evaluate(context)
+    assert all(row['end'] - row['start'] == 3 for row in result)
+    totals = [sum(row[key] for row in result) for key in OpcodeCounts._fields]
+    assert OpcodeCounts(*totals) == DiffCounts().evaluate(context)
+
+    result = WindowedWER(3, 'levenshtein').evaluate(context)
+    totals = OpcodeCounts(*[sum(row[key] for row in result) for key in OpcodeCounts._fields])
+    assert totals == DiffCounts('levenshtein').evaluate(context)
+    assert totals.replace + totals.insert + totals.delete == editdistance.eval(a.split(), b.split())
+
+
+def test_windowed_wer_untimed():
+    result = WindowedWER().compare(PlainText('a b c'), PlainText('a c'))
+    assert [dict(row) for row in result] == [dict(start=0., end=60., wer=1 / 3, equal=2, replace=0, insert=0,
+                                                  delete=1)]
+
+
+def test_word_times():
+    assert word_times([dict(start=None), dict(start=2.), dict(), dict(start=1.)]) == [0, 2., 2., 1.]
+    assert word_times(PlainText('a b')) is None
+    assert list(word_times(ColumnarSchema(timed('a b', [1., 2.])))) == [1., 2.]
+
+
+@pytest.mark.parametrize('window,times,expected', [
+    [2, [0, 1.9, 2, 7, -1], [0, 0, 1, 3, -1]],
+    ['2', [3], [1]],
+    [[10, 0, 5], [-1, 0, 4, 5, 100], [0, 0, 0, 1, 2]],
+    ['0,5,', [4, 5], [0, 1]],
+])
+def test_time_windows(window, times, expected):
+    assert TimeWindows(window).locate(times) == expected
+
+
+@pytest.mark.parametrize('window', [0, -1, '', [], 'a'])
+def test_time_windows_errors(window):
+    with pytest.raises(ValueError):
+        TimeWindows(window)
+
+
+def test_timed_differ():
+    ref = timed('a b c d', [0, 1, 2, 30])
+    hyp = timed('a b x d', [0, 1, 2, 3])
+    context = EvaluationContext(ColumnarSchema(ref), ColumnarSchema(hyp))
+    assert [list(times) for times in context.times] == [[0, 1, 2, 30], [0, 1, 2, 3]]
+    # 'd' is too far apart to be aligned
+    assert DiffCounts('timebanded').evaluate(context) == OpcodeCounts(2, 1, 1, 1)
+    assert DiffCounts('hirschberg').evaluate(context) == OpcodeCounts(3, 1, 0, 0)
+    assert WER(differ_class='timebanded').evaluate(context) == .75
+
+    # without timings
+    context = EvaluationContext(PlainText('a b c d'), PlainText('a b x d'))
+    assert DiffCounts('timebanded').evaluate(context) == OpcodeCounts(3, 1, 0, 0)
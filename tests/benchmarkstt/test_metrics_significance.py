@@ -0,0 +1,96 @@
+from benchmarkstt.metrics.core import OpcodeCounts, WER
+import pytest
+
+np = pytest.importorskip('numpy')
+significance = pytest.importorskip('benchmarkstt.metrics.significance')
+
+UtteranceCounts = significance.UtteranceCounts
+
+
+def make_counts(seed, amount, error_rate):
+    rnd = np.random.default_rng(seed)
+    counts = []
+    for _ in range(amount):
+        length = int(rnd.integers(1, 30))
+        replace, delete, insert = rnd.binomial(length, error_rate / 3, size=3).tolist()
+        delete = min(delete, length - replace)
+        counts.append(OpcodeCounts(length - replace - delete, replace, insert, delete))
+    return counts
+
+
+def test_utterance_counts(tmpdir):
+    items = make_counts(1, 200, .2)
+    counts = UtteranceCounts(items[:100])
+    for item in items[100:]:
+        counts.add(item._asdict())
+
+    assert len(counts) == 200
+    assert counts.array.shape == (200, 4)
+    assert counts.array[150].tolist() == list(items[150])
+    assert counts.reference_lengths()[3] == items[3].equal + items[3].replace + items[3].delete
+
+    total = OpcodeCounts(*map(sum, zip(*items)))
+    for mode in (WER.MODE_STRICT, WER.MODE_HUNT):
+        assert counts.wer(mode) == pytest.approx(WER(mode).from_counts(total))
+        assert counts.errors(mode)[3] == pytest.approx(WER(mode).from_counts(items[3]) *
+                                                       counts.reference_lengths()[3])
+
+    file = str(tmpdir.join('counts.npy'))
+    counts.save(file)
+    assert UtteranceCounts.load(file).array.tolist() == counts.array.tolist()
+
+
+@pytest.mark.parametrize('distinct', [False, True])
+def test_resample_sums(distinct):
+    values = np.arange(40).reshape(20, 2) if distinct else np.array([[1, 2]] * 15 + [[3, 4]] * 5)
+    sums = significance.resample_sums(values, 500, seed=1)
+    assert sums.shape == (500, 2)
+    # each bootstrap sample consists of exactly n rows
+    assert np.all((sums[:, 1] - sums[:, 0]) == 20)
+    assert sums[:, 0].mean() == pytest.approx(values[:, 0].sum(), rel=.05)
+    assert significance.resample_sums(values, 10, seed=2).tolist() == \
+        significance.resample_sums(values, 10, seed=2).tolist()
+
+
+def test_bootstrap():
+    counts = UtteranceCounts(make_counts(2, 2000, .2))
+    result = significance.bootstrap(counts, iterations=2000, seed=3)
+    assert result.wer == counts.wer()
+    assert result.confidence == .95
+    assert result.low < result.wer < result.high
+    assert result.high - result.low < .05
+
+    wider = significance.bootstrap(counts, iterations=2000, confidence=.99, seed=3)
+    assert wider.low <= result.low and wider.high >= result.high
+
+
+def test_paired_bootstrap():
+    a = make_counts(4, 1000, .1)
+    better = UtteranceCounts(a)
+    # same references, other hypotheses with more errors
+    worse = UtteranceCounts(OpcodeCounts(c.equal - min(c.equal, 2), c.replace + min(c.equal, 2), c.insert, c.delete)
+                            for c in a)
+
+    result = significance.paired_bootstrap(better, worse, iterations=2000, seed=5)
+    assert result.wer_a == better.wer()
+    assert result.wer_b == worse.wer()
+    assert result.difference == pytest.approx(result.wer_b - result.wer_a)
+    assert 0 < result.low < result.difference < result.high
+    assert result.p_value < .01
+
+    same = significance.paired_bootstrap(better, better, iterations=500, seed=5)
+    assert same.difference == 0
+    assert same.p_value == 1
+
+    with pytest.raises(ValueError):
+        significance.paired_bootstrap(better, UtteranceCounts(make_counts(6, 1000, .1)))
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        significance.bootstrap(UtteranceCounts())
+    counts = UtteranceCounts([OpcodeCounts(1, 1, 0, 0)])
+    with pytest.raises(ValueError):
+        significance.bootstrap(counts, iterations=0)
+    with pytest.raises(ValueError):
+        significance.bootstrap(counts, confidence=1)
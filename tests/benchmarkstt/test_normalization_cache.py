@@ -0,0 +1,176 @@
+from benchmarkstt.normalization import core, File
+from benchmarkstt.normalization.cache import RulesCache, ConfigCache, file_stat
+from benchmarkstt import normalization
+import os
+import pickle
+import pytest
+
+
+@pytest.fixture
+def cache_dir(tmpdir, monkeypatch):
+    path = str(tmpdir.join('cache'))
+    monkeypatch.setenv('NORMALIZATION_CACHE', path)
+    return path
+
+
+def write(file, text):
+    # make sure the change is noticed, even on filesystems with a coarse mtime
+    stat = os.stat(file) if os.path.exists(file) else None
+    file.write(text)
+    if stat is not None:
+        os.utime(str(file), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_file(cache_dir, tmpdir, monkeypatch):
+    rules = tmpdir.join('rules.csv')
+    write(rules, 'a,b\nc,d\n')
+    assert File(core.Replace, str(rules)).normalize('abcd') == 'bbdd'
+    assert len(os.listdir(cache_dir)) == 1
+
+    def reader(*args, **kwargs):
+        raise AssertionError('should be loaded from cache')
+
+    with monkeypatch.context() as m:
+        m.setattr(normalization.csv, 'reader', reader)
+        assert File(core.Replace, str(rules)).normalize('abcd') == 'bbdd'
+
+    write(rules, 'a,x\n')
+    assert File(core.Replace, str(rules)).normalize('abcd') == 'xbcd'
+    assert File(core.ReplaceWords, str(rules)).normalize('a b') == 'x b'
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_config_dependencies(cache_dir, tmpdir):
+    rules = tmpdir.join('rules.csv')
+    write(rules, 'a,b\n')
+    subconfig = tmpdir.join('sub.conf')
+    write(subconfig, '[normalization]\nreplace rules.csv\n')
+    config = tmpdir.join('main.conf')
+    write(config, '[normalization]\nlowercase\nconfig %s\n' % (str(subconfig),))
+
+    assert core.Config(str(config)).normalize('AC') == 'bc'
+    assert len(core.Config(str(config)).dependencies) == 3
+
+    write(rules, 'a,c\n')
+    assert core.Config(str(config)).normalize('AC') == 'cc'
+    write(subconfig, '[normalization]\nregex rules.csv\n')
+    assert core.Config(str(config)).normalize('A.C') == 'c.c'
+
+
+def test_prune(tmpdir):
+    cache = RulesCache(str(tmpdir), max_size=1000)
+    dependency = str(tmpdir.join('rules.csv'))
+    write(tmpdir.join('rules.csv'), 'a,b\n')
+    stat = file_stat(dependency)
+    for idx in range(10):
+        cache.set(cache.key(idx), 'x' * 300, [(dependency, stat)])
+        # least recently used
+        assert cache.get(cache.key(0)) is not None
+    assert len(os.listdir(str(tmpdir))) == 3
+    assert cache.get(cache.key(0)) == 'x' * 300
+    assert cache.get(cache.key(9)) == 'x' * 300
+    assert cache.get(cache.key(8)) is None
+
+
+def test_prune_when_full(tmpdir, monkeypatch):
+    cache = RulesCache(str(tmpdir), max_size=1000)
+    scandir = os.scandir
+    scans = []
+
+    def counting_scandir(path):
+        scans.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', counting_scandir)
+    for idx in range(3):
+        cache.set(cache.key(idx), 'x' * 100, [])
+    assert len(scans) == 1
+    # overwriting an entry doesn't change the size much
+    cache.set(cache.key(0), 'y' * 100, [])
+    assert len(scans) == 1
+    cache.set(cache.key(3), 'x' * 900, [])
+    assert len(scans) == 2
+    assert cache.size <= 1000
+    assert cache.size == sum(os.path.getsize(str(file)) for file in tmpdir.listdir())
+
+
+def test_default_encoding(cache_dir, tmpdir, monkeypatch):
+    rules = tmpdir.join('rules.csv')
+    rules.write_binary('\u00e9,e\n'.encode('utf-8'))
+    config = tmpdir.join('main.conf')
+    write(config, '[normalization]\nreplace rules.csv\n')
+
+    monkeypatch.setenv('DEFAULT_ENCODING', 'UTF-8')
+    assert core.Config(str(config), encoding='UTF-8').normalize('\u00e9') == 'e'
+    monkeypatch.setenv('DEFAULT_ENCODING', 'latin-1')
+    assert core.Config(str(config), encoding='UTF-8').normalize('\u00e9') == '\u00e9'
+    assert core.Config(str(config), encoding='UTF-8').normalize('\u00c3\u00a9') == 'e'
+
+
+def test_unpicklable(cache_dir, tmpdir):
+    class Local(core.Replace):
+        pass
+
+    rules = tmpdir.join('rules.csv')
+    write(rules, 'a,b\n')
+    assert File(Local, str(rules)).normalize('ab') == 'bb'
+    assert File(Local, str(rules)).normalize('ab') == 'bb'
+    assert os.listdir(cache_dir) == []
+
+
+def test_pickled_patterns():
+    normalizers = [core.Regex('(?i)(h)a', '\\1e'), core.ReplaceWords('ni', 'ecky')]
+    for normalizer in normalizers:
+        state = normalizer.__getstate__()
+        assert '_pattern' not in state
+    regex, words = pickle.loads(pickle.dumps(normalizers))
+    assert '_pattern' not in regex.__dict__
+    assert regex.normalize('HAHA! Hahaha!') == 'HeHe! Hehehe!'
+    assert words.normalize('Ni! ni') == 'Ecky! ecky'
+    with pytest.raises(AttributeError):
+        regex.unknown
+
+
+def test_config_cache(tmpdir):
+    cache = ConfigCache(max_entries=2)
+    config = '[normalization]\nLowercase\n'
+    normalizer = cache.get(config)
+    assert normalizer.normalize('ABC') == 'abc'
+    assert cache.get(config) is normalizer
+    assert cache.get('[normalization]\nLowercase\nUnidecode\n') is not normalizer
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 2)
+    assert stats['size'] > 0
+
+    # least recently used first removed
+    assert cache.get(config) is normalizer
+    cache.get('[normalization]\nUnidecode\n')
+    assert cache.get(config) is normalizer
+    assert cache.stats()['entries'] == 2
+    cache.get('[normalization]\nLowercase\nUnidecode\n')
+    assert cache.stats()['misses'] == 4
+
+    rules = tmpdir.join('rules.csv')
+    write(rules, 'a,b\n')
+    config = '[normalization]\nReplace "%s"\n' % (rules,)
+    assert cache.get(config).normalize('abc') == 'bbc'
+    write(rules, 'a,x\n')
+    assert cache.get(config).normalize('abc') == 'xbc'
+
+    cache.clear()
+    assert cache.stats() == dict(hits=0, misses=0, entries=0, max_entries=2, size=0, max_size=cache.max_size)
+
+
+def test_config_cache_size():
+    config = '[normalization]\nLowercase\n'
+    cache = ConfigCache(max_size=0)
+    assert cache.get(config) is not cache.get(config)
+    assert cache.stats()['entries'] == 0
+
+    cache = ConfigCache()
+    cache.get(config)
+    size = cache.size
+    cache.max_size = size * 2 - 1
+    cache.get('[normalization]\nUnidecode\n')
+    assert cache.stats()['entries'] == 1
+    assert cache.size <= cache.max_size
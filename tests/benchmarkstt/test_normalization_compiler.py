@@ -0,0 +1,133 @@
+from benchmarkstt.normalization import core, NormalizationComposite
+from benchmarkstt.normalization.compiler import compile_normalizers, literal_rule, word_rule, trie_pattern
+from benchmarkstt.normalization.compiler import LiteralReplaceGroup, WordReplaceGroup
+from benchmarkstt.normalization.logger import LogCapturer
+import random
+import re
+import pytest
+
+
+def sequential(normalizers, text):
+    for normalizer in normalizers:
+        text = normalizer.normalize(text)
+    return text
+
+
+def compiled(normalizers, text):
+    for normalize in compile_normalizers(normalizers):
+        text = normalize(text)
+    return text
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_same_as_sequential(seed):
+    rnd = random.Random(seed)
+
+    def random_text(minimum, maximum):
+        return ''.join(rnd.choice('abcde ') for _ in range(rnd.randint(minimum, maximum)))
+
+    for _ in range(20):
+        normalizers = []
+        for _ in range(rnd.randint(1, 30)):
+            choice = rnd.random()
+            if choice < .5:
+                normalizers.append(core.Replace(random_text(1, 4), random_text(0, 3)))
+            elif choice < .7:
+                words = rnd.choice(['a', 'A', 'ab', 'Ab', 'b', 'ba', 'c', 'a b', 'b-c'])
+                normalizers.append(core.ReplaceWords(words, rnd.choice(['a', 'A', 'ab', 'b', 'c', 'c a', '', '-'])))
+            elif choice < .9:
+                normalizers.append(core.Regex(random_text(1, 3), random_text(0, 3)))
+            else:
+                normalizers.append(core.Lowercase())
+        for _ in range(5):
+            text = random_text(0, 80)
+            assert compiled(normalizers, text) == sequential(normalizers, text)
+
+
+def test_groups():
+    normalizers = [
+        core.Replace('colour', 'color'),
+        core.Replace('favourite', 'favorite'),
+        core.Regex('gonna', 'going to'),
+        core.Replace('1', '2'),
+        # may match what the previous rule replaced
+        core.Replace('2', '3'),
+        core.Lowercase(),
+        core.Replace('#', ''),
+        core.Replace('_', ' '),
+        # may match the text joined by a removal
+        core.Replace('<>', '0'),
+    ]
+    assert len(compile_normalizers(normalizers)) == 5
+    text = 'My favourite colour, gonna be 1_<#>'
+    assert compiled(normalizers, text) == sequential(normalizers, text) == 'my favorite color, going to be 3 0'
+
+
+def test_literal_rule():
+    assert literal_rule(core.Replace('a', 'b')) == ('a', 'b')
+    assert literal_rule(core.Regex('a b', 'c')) == ('a b', 'c')
+    assert literal_rule(core.Regex('a.b', 'c')) is None
+    assert literal_rule(core.Regex('(?i)ab', 'c')) is None
+    assert literal_rule(core.Regex('ab', r'\\')) is None
+    assert literal_rule(core.Replace('', 'b')) is None
+    assert literal_rule(core.Replace('a' * 100, 'b')) is None
+    assert literal_rule(core.Lowercase()) is None
+
+
+def test_group_overlaps():
+    group = LiteralReplaceGroup()
+    assert group.add('abc', 'x')
+    # a match of a later rule that sticks out to the right is destroyed by both
+    assert group.add('bcd', 'y')
+    assert not group.add('zab', 'y')
+    assert not group.add('b', 'y')
+    assert not group.add('zabcz', 'y')
+    assert not group.add('x', 'y')
+    assert not group.add('zx', 'y')
+    assert not group.add('xz', 'y')
+    assert group.add('zz', 'y')
+    assert group.table == {'abc': 'x', 'bcd': 'y', 'zz': 'y'}
+
+
+def test_word_group():
+    normalizers = [
+        core.ReplaceWords('colour', 'color'),
+        core.ReplaceWords('Colours', 'colors'),
+        core.ReplaceWords('gonna', 'going to'),
+        core.ReplaceWords('to', 'towards'),
+        core.ReplaceWords('don\'t', 'do not'),
+    ]
+    assert word_rule(normalizers[0]) == ('colour', 'color')
+    assert word_rule(normalizers[-1]) is None
+    assert len(compile_normalizers(normalizers)) == 3
+    text = "Colour, colours! Gonna go to colourful colour don't"
+    assert compiled(normalizers, text) == sequential(normalizers, text) == \
+        "Color, colors! Going towards go towards colourful color do not"
+
+    group = WordReplaceGroup()
+    assert group.add('a', 'b c')
+    assert not group.add('A', 'x')
+    assert not group.add('C', 'x')
+    assert group.add('d', '')
+    assert sorted(group.table) == ['A', 'D', 'a', 'd']
+
+
+def test_trie_pattern():
+    pattern = re.compile(trie_pattern(['cat', 'car', 'dog', 'c.t']))
+    assert pattern.findall('cat car cot c.t dogs') == ['cat', 'car', 'c.t', 'dog']
+    pattern = re.compile(r'\b%s\b' % (trie_pattern(['do', 'dog', 'dogs']),))
+    assert pattern.findall('do dog dogs doggy') == ['do', 'dog', 'dogs']
+
+
+def test_composite_logs_each_rule():
+    normalizer = NormalizationComposite()
+    normalizer.add(core.Replace('a', 'b'))
+    normalizer.add(core.Replace('c', 'd'))
+    assert len(normalizer.compile()) == 1
+    with LogCapturer(dialect='text') as logcap:
+        assert normalizer.normalize('ac') == 'bd'
+        assert len(logcap.logs) == 3
+    assert normalizer.normalize('ac') == 'bd'
+
+    normalizer.add(core.Lowercase())
+    assert len(normalizer.compile()) == 2
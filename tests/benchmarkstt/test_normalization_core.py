@@ -1,4 +1,5 @@
 from benchmarkstt.normalization import core, NormalizationComposite, File, BaseWithFileSupport, FileFactory
+from benchmarkstt.normalization.logger import Logger, LogCapturer
 import logging
 from io import StringIO
 import pytest
@@ -138,3 +139,28 @@ def test_base_with_file_notimplemented():
 def test_filefactory():
     with pytest.raises(NotImplementedError):
         FileFactory.__getitem__(None, 'whatever')
+
+
+def test_log_only_when_listening(monkeypatch):
+    # recent pytest versions attach their own handlers to every logger
+    monkeypatch.setattr(Logger.logger, 'handlers', [])
+
+    class Counting(core.Lowercase):
+        reprs = 0
+
+        def __repr__(self):
+            Counting.reprs += 1
+            return 'Counting'
+
+    normalizer = Counting()
+    assert not Logger.is_active()
+    assert normalizer.normalize('ABC') == 'abc'
+    assert Counting.reprs == 0
+    assert Logger.stack == []
+
+    with LogCapturer(dialect='text') as logcap:
+        assert Logger.is_active()
+        assert normalizer.normalize('ABC') == 'abc'
+        assert Counting.reprs == 1
+        assert len(logcap.logs) == 1
+    assert not Logger.is_active()
@@ -1,4 +1,5 @@
 from benchmarkstt.output import Base, factory
+from collections import OrderedDict
 import pytest
 
 
@@ -52,6 +53,47 @@ def test_core(kind, expected, capsys):
     assert captured.out == expected
 
 
+@pytest.mark.parametrize('kind,expected', [
+    [
+        'restructuredtext',
+        '''windows
+=======
+
+========  ========  ===
+start     end       wer
+========  ========  ===
+0.000000  0.500000  1
+0.500000            a
+========  ========  ===
+
+'''
+    ],
+    [
+        'markdown',
+        '''# windows
+
+| start    | end      | wer |
+|----------|----------|-----|
+| 0.000000 | 0.500000 | 1   |
+| 0.500000 |          | a   |
+
+'''
+    ],
+    [
+        'json',
+        '[\n\t{"title": "windows", "result": [{"start": 0.0, "end": 0.5, "wer": 1}, '
+        '{"start": 0.5, "end": null, "wer": "a"}]}\n]\n'
+    ],
+])
+def test_table(kind, expected, capsys):
+    rows = [OrderedDict((('start', 0.), ('end', .5), ('wer', 1))), OrderedDict((('start', .5), ('end', None),
+                                                                               ('wer', 'a')))]
+    with factory.create(kind) as cls:
+        cls.result('windows', rows)
+
+    assert capsys.readouterr().out == expected
+
+
 @pytest.mark.parametrize('cls', ['json'])
 def test_already_open(cls):
     with pytest.raises(ValueError) as exc:
@@ -59,3 +101,19 @@ def test_already_open(cls):
             with instance as test:
                 raise NotImplementedError("Shouldnt get here")
     assert 'Already open' in str(exc)
+
+
+@pytest.mark.parametrize('kind,expected', [
+    ['restructuredtext', 'diff\n====\n\n[1, 2]\n\n'],
+    ['markdown', '# diff\n\n[1, 2]\n\n'],
+    ['json', '[\n\t{"title": "diff", "result": [1, 2]}\n]\n'],
+])
+def test_written_result(kind, expected, capsys):
+    def write(stream):
+        stream.write('[1, ')
+        stream.write('2]')
+
+    with factory.create(kind) as cls:
+        cls.result('diff', write)
+
+    assert capsys.readouterr().out == expected
@@ -1,4 +1,6 @@
-from benchmarkstt.schema import Schema, Item, JSONEncoder
+from benchmarkstt.schema import Schema, Item, JSONEncoder, ColumnarSchema, Column, JSONListWriter, iterencode_list, \
+    iterload_array
+from benchmarkstt import schema as schema_module
 from benchmarkstt.schema import SchemaError, SchemaJSONError, SchemaInvalidItemError
 import textwrap
 from random import sample, randint
@@ -8,6 +10,7 @@ import json
 from collections import OrderedDict
 from pytest import raises
 import io
+from array import array
 
 
 def test_equality():
@@ -142,3 +145,198 @@ def test_item():
                           'Item({"b": "b_", "a": "a_"})']
 
     assert item1 != item
+
+
+def test_columnar():
+    items = [
+        Item(item='a', type='word', start=1, end=2.5),
+        Item(item='b', type='word', start=3, end=None),
+        Item(item='a', type='word', confidence=.5),
+        Item(start=2 ** 70, type='punctuation', item='.', extra=[1, 2], flag=True),
+        Item(item='c', start=4.5, end=6),
+        Item(item='b', type='word', start=3, end=None),
+    ]
+    schema = ColumnarSchema(items)
+    assert len(schema) == len(items)
+    assert schema == Schema(items) == items
+    assert Schema(items) == schema
+    assert schema != Schema(items[:-1])
+    assert schema.json() == Schema(items).json()
+    assert Schema.loads(schema.json()) == schema
+    for idx in range(-len(items), len(items)):
+        assert type(schema[idx]) is Item
+        assert list(schema[idx].items()) == list(items[idx].items())
+    assert schema[1:4] == items[1:4]
+    assert schema[::-2] == items[::-2]
+    with raises(IndexError):
+        schema[len(items)]
+    with raises(SchemaError):
+        schema.append(None)
+
+    column = schema.column('item')
+    assert type(column) is Column
+    assert list(column) == [item['item'] for item in items]
+    assert column[1:3] == ['b', 'a']
+    ids, values = schema.codes('item')
+    assert list(ids) == [0, 1, 0, 2, 3, 1]
+    assert values == ['a', 'b', '.', 'c']
+    assert schema.codes('type') is None
+    assert schema.codes('start') is None
+    with raises(KeyError):
+        schema.column('type')
+    with raises(KeyError):
+        schema.column('start')
+
+    timed = ColumnarSchema(item for item in items if type(item.get('end')) is float)
+    assert timed.column('end') == array('d', [2.5])
+    assert ColumnarSchema([dict(start=1), dict(start=2)]).column('start') == array('q', [1, 2])
+
+    assert ColumnarSchema().codes('item') == (array('I'), [])
+
+
+json_schemas = [
+    '[]',
+    ' [ ] ',
+    '[{"item": "test"}]',
+    json.dumps([dict(item='w%d' % (idx,), type='word', start=idx * .5, end=idx, extra=[{'a': None}])
+                for idx in range(30)], indent=2),
+    '[{"item": "a", "start": Infinity}, {"item": "b", "start": 123456789012345678901234567890}]',
+]
+
+
+@pytest.mark.parametrize('orjson', [schema_module.orjson, None])
+@pytest.mark.parametrize('text', json_schemas)
+def test_fast_load(text, orjson, monkeypatch):
+    monkeypatch.setattr(schema_module, 'orjson', orjson)
+    expected = json.loads(text, cls=schema_module.JSONDecoder)
+    for columnar in (False, True):
+        for schema in (Schema.loads(text, columnar=columnar), Schema.load(io.StringIO(text), columnar=columnar)):
+            assert type(schema) is (ColumnarSchema if columnar else Schema)
+            assert schema == expected
+            assert all(type(item) is Item for item in schema)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, None])
+@pytest.mark.parametrize('text', json_schemas)
+def test_iterload(text, chunk_size):
+    items = list(Schema.iterload(io.StringIO(text), chunk_size))
+    assert all(type(item) is Item for item in items)
+    assert items == Schema.loads(text)
+
+
+@pytest.mark.parametrize('text,exception', [
+    ('', JSONDecodeError),
+    ('{"test": "test"}', SchemaJSONError),
+    ('[{"a": 1},]', JSONDecodeError),
+    ('[{"a": 1} {"b": 2}]', JSONDecodeError),
+    ('[{"a": 1}] []', JSONDecodeError),
+    ('[{"a": 1}', JSONDecodeError),
+    ('[{"a": "b', JSONDecodeError),
+    ('[{"a": 1}, "test"]', SchemaInvalidItemError),
+])
+def test_load_errors(text, exception):
+    with pytest.raises(exception):
+        Schema.loads(text)
+    with pytest.raises(exception):
+        Schema.loads(text, columnar=True)
+    with pytest.raises(exception):
+        list(Schema.iterload(io.StringIO(text), 2))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, None])
+@pytest.mark.parametrize('text,path,preamble,expected', [
+    ('[1, 2]', (), False, [1, 2]),
+    ('{"a": 1, "b": {"c": [], "d": [3, {"e": 4}]}} garbage', ('b', 'd'), False, [3, {"e": 4}]),
+    ('{"b": {"d": []}}', ('b', 'd'), True, []),
+    ('NOTE: some text\n\n{"b": [{}]}', ('b',), True, [{}]),
+])
+def test_iterload_array(text, path, preamble, expected, chunk_size):
+    assert list(iterload_array(io.StringIO(text), path, chunk_size, preamble)) == expected
+
+
+@pytest.mark.parametrize('text,path,exception', [
+    ('{"a": [1]}', ('b',), SchemaJSONError),
+    ('{}', ('b',), SchemaJSONError),
+    ('[{"b": [1]}]', ('b',), SchemaJSONError),
+    ('{"b": {"c": 1}}', ('b',), SchemaJSONError),
+    ('{"a": 1 "b": [1]}', ('b',), JSONDecodeError),
+    ('{"a" 1, "b": [1]}', ('b',), JSONDecodeError),
+    ('{a: 1}', ('b',), JSONDecodeError),
+    ('{"b": [1 2]}', ('b',), JSONDecodeError),
+])
+def test_iterload_array_errors(text, path, exception):
+    with pytest.raises(exception):
+        list(iterload_array(io.StringIO(text), path, 2))
+
+
+class ReadCounter(io.StringIO):
+    reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return super().read(size)
+
+
+def test_iterload_large_values(monkeypatch):
+    decodes = []
+    raw_decode = json.JSONDecoder.raw_decode
+
+    def counting_raw_decode(self, s, idx=0):
+        decodes.append(idx)
+        return raw_decode(self, s, idx)
+
+    monkeypatch.setattr(json.JSONDecoder, 'raw_decode', counting_raw_decode)
+    text = json.dumps({"a": ["x" * 10000, {"y": list(range(1000))}], "b": [1, "\\\""]})
+    assert list(iterload_array(io.StringIO(text), ('b',), 16)) == [1, '\\\"']
+    # the incomplete value is decoded again only once what's buffered of it at least doubled
+    assert len(decodes) < 30
+
+
+@pytest.mark.parametrize('text', ['{"b": [[1, x, %s]]}', '{"a": tru, "b": [%s]}', '[1, 2 3, %s]'])
+def test_iterload_invalid_early(text):
+    fp = ReadCounter(text % (', '.join(['2'] * 100000),))
+    with pytest.raises(JSONDecodeError):
+        list(iterload_array(fp, ('b',) if text.startswith('{') else (), 64))
+    assert fp.reads < 5
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, None])
+def test_iterload_skip(chunk_size):
+    skipped = ['a\\', '\\"]}', 'x\\\\"\\\\\\', [{'"[': ['{', '\\\\']}, []], {}]
+    text = json.dumps(OrderedDict([('s%d' % (idx,), value) for idx, value in enumerate(skipped)] + [('b', [1])]))
+    assert list(iterload_array(io.StringIO(text), ('b',), chunk_size)) == [1]
+
+    with pytest.raises(JSONDecodeError):
+        list(iterload_array(io.StringIO(text[:text.index('"b"') - 5]), ('b',), chunk_size))
+
+
+class WriteCounter(io.StringIO):
+    writes = 0
+
+    def write(self, s):
+        self.writes += 1
+        return super().write(s)
+
+
+@pytest.mark.parametrize('options', [{}, dict(indent=2), dict(indent=0), dict(sort_keys=True, separators=(',', ':'))])
+@pytest.mark.parametrize('length', [0, 1, 5, 2500])
+def test_incremental_encoding(length, options):
+    items = [dict(item='w%d' % (idx,), start=idx / 2, extra=[{'a': None}]) for idx in range(length)]
+    expected = json.dumps(items, **options)
+
+    for schema in (Schema(items), ColumnarSchema(items)):
+        assert schema.json(**options) == expected
+
+        buffer = WriteCounter()
+        schema.dump(buffer, buffer_size=1000, **options)
+        assert buffer.getvalue() == expected
+        assert buffer.writes <= len(expected) // 1000 + 1
+
+    encoder = JSONEncoder(**options)
+    assert ''.join(iterencode_list(encoder, iter(items), batch_size=2)) == expected
+
+    buffer = WriteCounter()
+    with JSONListWriter(buffer, encoder, batch_size=3, buffer_size=50) as writer:
+        for item in items:
+            writer.write(item)
+    assert buffer.getvalue() == expected
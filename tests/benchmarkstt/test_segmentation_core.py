@@ -1,9 +1,9 @@
 from benchmarkstt.segmentation import core
 from benchmarkstt.schema import Item
+from io import StringIO
 import pytest
 
-
-@pytest.mark.parametrize('text,expected', [
+simple_cases = [
     ('hello    world! how are you doing?!    ', ['hello    ', 'world! ', 'how ', 'are ', 'you ', 'doing?!    ']),
     ('\nhello    world! how are you doing?!    ', ['\nhello    ', 'world! ', 'how ', 'are ', 'you ', 'doing?!    ']),
     ('single-word', ['single-word']),
@@ -14,7 +14,10 @@ import pytest
     ('test  B', ['test  ', 'B']),
     ('test  B ', ['test  ', 'B ']),
     ('\n\n', ['\n\n'])
-])
+]
+
+
+@pytest.mark.parametrize('text,expected', simple_cases)
 def test_simple(text, expected):
     result = list(core.Simple(text))
     assert ''.join([word['@raw'] for word in result]) == text
@@ -26,3 +29,12 @@ def test_simple(text, expected):
         assert type(gotten) is Item
         assert expected_raw == gotten['@raw']
         assert expected_raw.strip() == gotten['item']
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 5, 65536])
+@pytest.mark.parametrize('text,expected', simple_cases + [('', [])])
+def test_simple_file(text, expected, chunk_size):
+    segmenter = core.Simple(StringIO(text))
+    segmenter.chunk_size = chunk_size
+    assert list(segmenter) == list(core.Simple(text))
+    assert [word['@raw'] for word in core.Simple(StringIO(text))] == expected